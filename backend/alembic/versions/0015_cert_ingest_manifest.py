@@ -0,0 +1,37 @@
+"""add certificate ingest manifest table
+
+Revision ID: 0015_cert_ingest_manifest
+Revises: 0014_device_installed_certs
+Create Date: 2025-03-12 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0015_cert_ingest_manifest"
+down_revision = "0014_device_installed_certs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cert_ingest_manifest",
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("mtime_ns", sa.BigInteger(), nullable=False),
+        sa.Column("content_hash", sa.String(), nullable=True),
+        sa.Column("cert_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("parse_ok", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("parse_error", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["cert_id"], ["certificates.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("org_id", "path"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cert_ingest_manifest")
@@ -0,0 +1,23 @@
+"""store winning decode strategy in the ingest manifest
+
+Revision ID: 0016_manifest_decode_strategy
+Revises: 0015_cert_ingest_manifest
+Create Date: 2025-03-13 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0016_manifest_decode_strategy"
+down_revision = "0015_cert_ingest_manifest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("cert_ingest_manifest", sa.Column("strategy", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("cert_ingest_manifest", "strategy")
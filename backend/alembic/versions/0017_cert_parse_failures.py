@@ -0,0 +1,34 @@
+"""add negative parse cache table
+
+Revision ID: 0017_cert_parse_failures
+Revises: 0016_manifest_decode_strategy
+Create Date: 2025-03-14 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0017_cert_parse_failures"
+down_revision = "0016_manifest_decode_strategy"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cert_parse_failures",
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(), nullable=False),
+        sa.Column("parser_version", sa.String(), nullable=False),
+        sa.Column("candidates_digest", sa.String(), nullable=False),
+        sa.Column("parse_error", sa.String(), nullable=True),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("org_id", "content_hash", "parser_version"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cert_parse_failures")
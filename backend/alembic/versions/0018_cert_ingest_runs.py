@@ -0,0 +1,41 @@
+"""add certificate ingest run checkpoints
+
+Revision ID: 0018_cert_ingest_runs
+Revises: 0017_cert_parse_failures
+Create Date: 2025-03-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0018_cert_ingest_runs"
+down_revision = "0017_cert_parse_failures"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cert_ingest_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("full_rescan", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("last_path", sa.String(), nullable=True),
+        sa.Column("inserted", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("unchanged", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_cert_ingest_runs_org_status", "cert_ingest_runs", ["org_id", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cert_ingest_runs_org_status", table_name="cert_ingest_runs")
+    op.drop_table("cert_ingest_runs")
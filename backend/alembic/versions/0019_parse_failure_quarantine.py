@@ -0,0 +1,26 @@
+"""quarantine flag for parse failures that ran out of time
+
+Revision ID: 0019_parse_failure_quarantine
+Revises: 0018_cert_ingest_runs
+Create Date: 2025-03-20 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0019_parse_failure_quarantine"
+down_revision = "0018_cert_ingest_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "cert_parse_failures",
+        sa.Column("quarantined", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("cert_parse_failures", "quarantined")
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import json
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
@@ -11,7 +15,7 @@ from sqlalchemy.orm import Session, selectinload
 from app.core.audit import log_audit
 from app.core.config import settings
 from app.core.security import require_admin_or_dev, require_dev
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.core.security import AUTH_TOKEN_PURPOSE_SET_PASSWORD, generate_token, hash_token
 from app.models import (
     AuthToken,
@@ -22,7 +26,13 @@ from app.models import (
     User,
     UserDevice,
 )
-from app.schemas.cert_ingest import CertIngestRequest, CertIngestResponse
+from app.schemas.cert_ingest import (
+    CertIngestJobCreateResponse,
+    CertIngestJobStatus,
+    CertIngestRequest,
+    CertIngestResponse,
+    CertParseFailuresClearResponse,
+)
 from app.schemas.device import (
     DeviceCreate,
     DeviceCreateResponse,
@@ -32,7 +42,13 @@ from app.schemas.device import (
 )
 from app.schemas.user import UserCreate, UserCreateResponse, UserRead, UserUpdate
 from app.schemas.user_device import UserDeviceCreate, UserDeviceRead, UserDeviceReadWithUser
-from app.services.certificate_ingest import ingest_certificates_from_fs
+from app.services.certificate_ingest import (
+    clear_parse_failures,
+    ingest_certificates_from_fs,
+    iter_certificate_ingest,
+)
+from app.workers.jobs_certificates import INGEST_JOB_RESULT_TTL, ingest_certificates_job
+from app.workers.queue import enqueue_unique_atomic, get_queue
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -465,6 +481,8 @@ def ingest_certificates_from_filesystem(
             limit=payload.limit,
             prune_missing=payload.prune_missing,
             dedupe=payload.dedupe,
+            full_rescan=payload.full_rescan,
+            resume=payload.resume,
         )
     except FileNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
@@ -481,12 +499,175 @@ def ingest_certificates_from_filesystem(
                 "inserted": result["inserted"],
                 "updated": result["updated"],
                 "failed": result["failed"],
+                "unchanged": result["unchanged"],
+                "negative_cache_hits": result["negative_cache_hits"],
+                "quarantined": result["quarantined"],
+                "quarantine_skipped": result["quarantine_skipped"],
                 "total": result["total"],
                 "pruned": result["pruned"],
                 "deduped": result["deduped"],
+                "decoders": result["decoders"],
                 "limit": payload.limit,
             },
         )
         db.commit()
 
     return CertIngestResponse(**result)
+
+
+@router.post("/certificates/ingest-from-fs/stream")
+def stream_certificates_from_filesystem(
+    payload: CertIngestRequest = CertIngestRequest(),
+    current_user=Depends(require_dev),
+) -> StreamingResponse:
+    """Stream ingest events as NDJSON: progress, one line per file, then the summary."""
+    org_id = current_user.org_id
+    actor_user_id = current_user.id
+    root_path = settings.certs_root_path.expanduser()
+    if not root_path.is_dir():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CERTS_ROOT_PATH not found: {root_path}",
+        )
+
+    def ndjson():
+        # Request-scoped dependencies are closed before the body is sent, so
+        # the stream owns its session for as long as it runs.
+        db = SessionLocal()
+        try:
+            for event in iter_certificate_ingest(
+                db,
+                org_id=org_id,
+                dry_run=payload.dry_run,
+                limit=payload.limit,
+                prune_missing=payload.prune_missing,
+                dedupe=payload.dedupe,
+                full_rescan=payload.full_rescan,
+                resume=payload.resume,
+            ):
+                if event["type"] == "summary" and not payload.dry_run:
+                    log_audit(
+                        db=db,
+                        org_id=org_id,
+                        action="CERT_INGEST_FROM_FS",
+                        entity_type="certificate",
+                        entity_id=None,
+                        actor_user_id=actor_user_id,
+                        meta={
+                            **{
+                                key: value
+                                for key, value in event.items()
+                                if key not in {"type", "errors"}
+                            },
+                            "limit": payload.limit,
+                        },
+                    )
+                    db.commit()
+                yield json.dumps(jsonable_encoder(event)) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post(
+    "/certificates/ingest-jobs",
+    response_model=CertIngestJobCreateResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def enqueue_certificate_ingest(
+    payload: CertIngestRequest = CertIngestRequest(),
+    current_user=Depends(require_dev),
+) -> CertIngestJobCreateResponse:
+    root_path = settings.certs_root_path.expanduser()
+    if not root_path.is_dir():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CERTS_ROOT_PATH not found: {root_path}",
+        )
+    # One full ingest per org: a second one would race the first on the same
+    # manifest and checkpoint rows.
+    job, deduped = enqueue_unique_atomic(
+        get_queue(),
+        ingest_certificates_job,
+        current_user.org_id,
+        str(current_user.id),
+        payload.model_dump(),
+        job_id=f"ingest-fs-org-{current_user.org_id}",
+        job_timeout=settings.ingest_job_timeout_seconds,
+        result_ttl=INGEST_JOB_RESULT_TTL,
+        failure_ttl=INGEST_JOB_RESULT_TTL,
+        meta={"org_id": current_user.org_id},
+    )
+    if deduped:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"ingest already in progress: {job.id}",
+        )
+    return CertIngestJobCreateResponse(job_id=job.id, status=job.get_status().value)
+
+
+@router.get("/certificates/ingest-jobs/{job_id}", response_model=CertIngestJobStatus)
+def get_certificate_ingest_job(
+    job_id: str,
+    current_user=Depends(require_dev),
+) -> CertIngestJobStatus:
+    job = get_queue().fetch_job(job_id)
+    if job is None or job.meta.get("org_id") != current_user.org_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job not found")
+
+    job_status = job.get_status().value
+    progress = job.meta.get("progress") or {}
+    # Rate from decoded files only: unchanged files are skipped almost for free.
+    parsed = progress.get("parsed", 0)
+    to_parse = progress.get("to_parse")
+    eta_seconds = None
+    if job_status == "started" and to_parse is not None:
+        if parsed >= to_parse:
+            eta_seconds = 0.0
+        elif parsed:
+            elapsed = time.time() - progress["started_at"]
+            eta_seconds = round(elapsed / parsed * (to_parse - parsed), 1)
+    result = job.return_value() if job_status == "finished" else None
+    if result is not None:
+        progress = {**progress, **result, "processed": result["total"]}
+    error = None
+    if job_status == "failed" and job.exc_info:
+        # Last traceback line carries the exception type and message.
+        error = job.exc_info.strip().splitlines()[-1]
+    return CertIngestJobStatus(
+        job_id=job.id,
+        status=job_status,
+        processed=progress.get("processed", 0),
+        total=progress.get("total"),
+        inserted=progress.get("inserted", 0),
+        updated=progress.get("updated", 0),
+        failed=progress.get("failed", 0),
+        unchanged=progress.get("unchanged", 0),
+        eta_seconds=eta_seconds,
+        result=CertIngestResponse(**result) if result is not None else None,
+        error=error,
+    )
+
+
+@router.delete(
+    "/certificates/parse-failures",
+    response_model=CertParseFailuresClearResponse,
+    status_code=status.HTTP_200_OK,
+)
+def clear_certificate_parse_failures(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_dev),
+) -> CertParseFailuresClearResponse:
+    cleared = clear_parse_failures(db, org_id=current_user.org_id)
+    log_audit(
+        db=db,
+        org_id=current_user.org_id,
+        action="CERT_PARSE_FAILURES_CLEARED",
+        entity_type="certificate",
+        entity_id=None,
+        actor_user_id=current_user.id,
+        meta={"cleared": cleared},
+    )
+    db.commit()
+    return CertParseFailuresClearResponse(cleared=cleared)
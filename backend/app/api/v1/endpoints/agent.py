@@ -36,7 +36,7 @@ from app.schemas.agent import (
 from app.schemas.device import DeviceRead
 from app.schemas.installed_cert import InstalledCertReportRequest
 from app.schemas.install_job import InstallJobRead
-from app.services.certificate_ingest import guess_password_from_path
+from app.services.certificate_ingest import guess_password_from_path, password_for_payload
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
@@ -512,13 +512,13 @@ def job_payload(
     path = Path(certificate.source_path)
     if not path.exists():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="certificate file not found")
-    password = guess_password_from_path(path)
-    if password is None:
+    if guess_password_from_path(path) is None:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="certificate password not available in filename",
         )
     raw_bytes = path.read_bytes()
+    password = password_for_payload(path, raw_bytes)
     encoded = base64.b64encode(raw_bytes).decode("utf-8")
     log_audit(
         db=db,
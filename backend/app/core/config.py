@@ -18,6 +18,19 @@ class Settings(BaseSettings):
     api_v1_prefix: str = "/api/v1"
     certs_root_path: Path = Field(Path("certs"), alias="CERTS_ROOT_PATH")
     openssl_path: Path = Field(Path("openssl"), alias="OPENSSL_PATH")
+    ingest_workers: int = Field(1, alias="INGEST_WORKERS")
+    ingest_batch_size: int = Field(500, alias="INGEST_BATCH_SIZE")
+    ingest_bulk_write: bool = Field(False, alias="INGEST_BULK_WRITE")
+    ingest_recursive: bool = Field(False, alias="INGEST_RECURSIVE")
+    ingest_include_globs: str = Field("", alias="INGEST_INCLUDE_GLOBS")
+    ingest_exclude_globs: str = Field("", alias="INGEST_EXCLUDE_GLOBS")
+    parse_cache_enabled: bool = Field(False, alias="PARSE_CACHE_ENABLED")
+    parse_cache_ttl_seconds: int = Field(7 * 24 * 3600, alias="PARSE_CACHE_TTL_SECONDS")
+    parse_cache_max_entries: int = Field(100_000, alias="PARSE_CACHE_MAX_ENTRIES")
+    ingest_job_timeout_seconds: int = Field(3600, alias="INGEST_JOB_TIMEOUT_SECONDS")
+    ingest_file_timeout_seconds: float = Field(30.0, alias="INGEST_FILE_TIMEOUT_SECONDS")
+    ingest_max_file_bytes: int = Field(1024 * 1024, alias="INGEST_MAX_FILE_BYTES")
+    ingest_max_kdf_iterations: int = Field(600_000, alias="INGEST_MAX_KDF_ITERATIONS")
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     access_token_ttl_min: int = Field(30, alias="ACCESS_TOKEN_TTL_MIN")
     device_token_ttl_min: int = Field(10, alias="DEVICE_TOKEN_TTL_MIN")
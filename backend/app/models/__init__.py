@@ -1,6 +1,14 @@
 from app.models.audit_log import AuditLog
 from app.models.auth_token import AuthToken
 from app.models.certificate import Certificate
+from app.models.cert_ingest_manifest import CertIngestManifest
+from app.models.cert_ingest_run import (
+    CertIngestRun,
+    INGEST_RUN_STATUS_ABANDONED,
+    INGEST_RUN_STATUS_DONE,
+    INGEST_RUN_STATUS_RUNNING,
+)
+from app.models.cert_parse_failure import CertParseFailure
 from app.models.cert_install_job import (
     CertInstallJob,
     CLEANUP_MODE_DEFAULT,
@@ -25,6 +33,12 @@ __all__ = [
     "AuthToken",
     "UserSession",
     "Certificate",
+    "CertIngestManifest",
+    "CertIngestRun",
+    "INGEST_RUN_STATUS_RUNNING",
+    "INGEST_RUN_STATUS_DONE",
+    "INGEST_RUN_STATUS_ABANDONED",
+    "CertParseFailure",
     "CertInstallJob",
     "CLEANUP_MODE_DEFAULT",
     "CLEANUP_MODE_KEEP_UNTIL",
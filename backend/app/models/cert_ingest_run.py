@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+INGEST_RUN_STATUS_RUNNING = "RUNNING"
+INGEST_RUN_STATUS_DONE = "DONE"
+INGEST_RUN_STATUS_ABANDONED = "ABANDONED"
+
+
+class CertIngestRun(Base):
+    __tablename__ = "cert_ingest_runs"
+    __table_args__ = (Index("ix_cert_ingest_runs_org_status", "org_id", "status"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default=INGEST_RUN_STATUS_RUNNING)
+    full_rescan: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    last_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    inserted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    unchanged: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
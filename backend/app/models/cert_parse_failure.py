@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CertParseFailure(Base):
+    __tablename__ = "cert_parse_failures"
+
+    org_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    parser_version: Mapped[str] = mapped_column(String, primary_key=True)
+    candidates_digest: Mapped[str] = mapped_column(String, nullable=False)
+    parse_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Parse ran past INGEST_FILE_TIMEOUT_SECONDS; skipped until the content changes.
+    quarantined: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    failed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -8,6 +10,8 @@ class CertIngestRequest(BaseModel):
     limit: int = Field(0, ge=0)
     prune_missing: bool = False
     dedupe: bool = False
+    full_rescan: bool = False
+    resume: bool = False
 
 
 class CertIngestError(BaseModel):
@@ -20,7 +24,35 @@ class CertIngestResponse(BaseModel):
     inserted: int
     updated: int
     failed: int
+    unchanged: int = 0
+    negative_cache_hits: int = 0
+    quarantined: int = 0
+    quarantine_skipped: int = 0
     total: int
     pruned: int = 0
     deduped: int = 0
+    decoders: dict[str, int] = Field(default_factory=dict)
     errors: list[CertIngestError]
+
+
+class CertIngestJobCreateResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class CertIngestJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "started", "finished", "failed", "canceled", "deferred", "scheduled", "stopped"]
+    processed: int = 0
+    total: int | None = None
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    eta_seconds: float | None = None
+    result: CertIngestResponse | None = None
+    error: str | None = None
+
+
+class CertParseFailuresClearResponse(BaseModel):
+    cleared: int
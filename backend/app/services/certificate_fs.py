@@ -0,0 +1,169 @@
+"""Directory listing for certificate trees.
+
+Built on ``os.scandir`` so file/dir checks reuse the dirent type and only
+matching files are stat'ed (on Windows shares even that stat comes from the
+directory listing). Include/exclude globs are ``fnmatch`` patterns matched
+against the path relative to the root, in POSIX form (``clientes/*``,
+``*/arquivo/*``); a directory matching an exclude glob is not descended into.
+
+A walk that cannot read part of the tree (permissions, a flaky share) reports
+the failed paths through ``unreadable``; callers that treat "not listed" as
+"deleted" must leave everything under them alone.
+"""
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+
+CERT_EXTENSIONS = {".pfx", ".p12"}
+
+
+def parse_globs(raw: str | Iterable[str] | None) -> tuple[str, ...]:
+    """Split a comma-separated setting into glob patterns."""
+    if not raw:
+        return ()
+    items = raw.split(",") if isinstance(raw, str) else raw
+    return tuple(item.strip() for item in items if item and item.strip())
+
+
+def matches_globs(
+    relative_path: str,
+    *,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+) -> bool:
+    relative_path = relative_path.casefold()
+    if any(fnmatchcase(relative_path, pattern.casefold()) for pattern in exclude):
+        return False
+    if not include:
+        return True
+    return any(fnmatchcase(relative_path, pattern.casefold()) for pattern in include)
+
+
+def relative_posix(path: str | Path, root: Path) -> str | None:
+    """Return ``path`` relative to ``root`` in POSIX form, or None if outside it."""
+    try:
+        return PurePosixPath(*Path(path).relative_to(root).parts).as_posix()
+    except ValueError:
+        return None
+
+
+def _excluded_dir(relative_dir: str, exclude: Sequence[str]) -> bool:
+    return any(
+        fnmatchcase(candidate.casefold(), pattern.casefold())
+        for pattern in exclude
+        for candidate in (relative_dir, f"{relative_dir}/")
+    )
+
+
+def path_key(path: str | Path) -> str:
+    """Comparable form of a path: absolute, normalized, case-folded where the OS is."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def is_under(path: str | Path, directories: Iterable[str | Path]) -> bool:
+    """True if ``path`` is one of ``directories`` or lies below one of them."""
+    key = path_key(path)
+    for directory in directories:
+        directory_key = path_key(directory)
+        if key == directory_key or key.startswith(directory_key.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def covers_path(
+    path: str | Path,
+    root: Path,
+    *,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+) -> bool:
+    """True if a walk with these options would list ``path`` were it present.
+
+    Lets callers treat absence from a walk snapshot as "missing on disk"
+    without stat'ing the path again.
+    """
+    relative_path = relative_posix(os.path.abspath(path), Path(os.path.abspath(root)))
+    if not relative_path or relative_path == ".":
+        return False
+    if os.path.splitext(relative_path)[1].lower() not in CERT_EXTENSIONS:
+        return False
+    parts = relative_path.split("/")
+    if len(parts) > 1 and not recursive:
+        return False
+    for depth in range(1, len(parts)):
+        if _excluded_dir("/".join(parts[:depth]), exclude):
+            return False
+    return matches_globs(relative_path, include=include, exclude=exclude)
+
+
+def iter_certificate_files(
+    root: Path,
+    *,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    extensions: Iterable[str] = CERT_EXTENSIONS,
+    unreadable: list[Path] | None = None,
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """Yield ``(path, stat)`` for certificate files under ``root``, unordered.
+
+    Symlinked directories are not followed, so loops in a share cannot recurse
+    forever. Entries that vanish mid-walk are skipped; entries and
+    subdirectories that exist but cannot be read are skipped too and, when
+    ``unreadable`` is given, appended to it. An unreadable ``root`` raises.
+    """
+    extensions = {extension.lower() for extension in extensions}
+    pending: list[tuple[str, str]] = [(str(root), "")]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative = f"{prefix}{entry.name}"
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not _excluded_dir(relative, exclude):
+                                pending.append((entry.path, f"{relative}/"))
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in extensions:
+                            continue
+                        if not entry.is_file():
+                            continue
+                        if not matches_globs(relative, include=include, exclude=exclude):
+                            continue
+                        yield Path(entry.path), entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    except OSError:
+                        if unreadable is not None:
+                            unreadable.append(Path(entry.path))
+                        continue
+        except FileNotFoundError:
+            if not prefix:
+                raise
+        except OSError:
+            if not prefix:
+                raise
+            if unreadable is not None:
+                unreadable.append(Path(directory))
+
+
+def list_certificate_files(
+    root: Path,
+    *,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    unreadable: list[Path] | None = None,
+) -> list[tuple[Path, os.stat_result]]:
+    """Sorted snapshot of ``iter_certificate_files``, ordered by path string."""
+    return sorted(
+        iter_certificate_files(
+            root, recursive=recursive, include=include, exclude=exclude, unreadable=unreadable
+        ),
+        key=lambda item: str(item[0]),
+    )
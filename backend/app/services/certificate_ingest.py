@@ -1,24 +1,130 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
 import re
 import subprocess
+import time
 import uuid
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, TypeVar
 
-from sqlalchemy import select
+from sqlalchemy import Row, and_, bindparam, delete, func, not_, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.models import Certificate
+from app.models import (
+    CertIngestManifest,
+    CertIngestRun,
+    CertParseFailure,
+    Certificate,
+    INGEST_RUN_STATUS_ABANDONED,
+    INGEST_RUN_STATUS_DONE,
+    INGEST_RUN_STATUS_RUNNING,
+)
+from app.services.certificate_fs import (
+    CERT_EXTENSIONS,
+    covers_path,
+    is_under,
+    iter_certificate_files,
+    list_certificate_files,
+    parse_globs,
+    path_key,
+)
+from app.services.parse_cache import get_parse_cache
+from app.services.pfx_strategies import DecodeAttempt, StrategyLearner, password_kind
+from app.services.pkcs12_legacy import (
+    DecodeDeadlineExceeded,
+    decode_deadline,
+    kdf_iterations,
+    load_pkcs12_certificate,
+    remaining_time,
+)
+from cryptography import x509
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.serialization.pkcs12 import load_key_and_certificates
 
+logger = logging.getLogger(__name__)
+
 DATE_FORMAT = "%b %d %H:%M:%S %Y %Z"
-CERT_EXTENSIONS = {".pfx", ".p12"}
+# Bump whenever decoders change, so cached parse failures are retried.
+PARSER_VERSION = "2"
 MAX_ERRORS = 50
+UNREADABLE_PATH_ERROR = "unreadable, prune skipped"
+DUPLICATE_NAME_ERROR = "duplicate certificate name {name!r}, also at {other}"
+PARSE_CHUNK_MAX = 32
+# Chunks in flight per worker; bounds what a close or writer error waits on.
+PARSE_WINDOW_PER_WORKER = 2
+UPSERT_COLUMNS = (
+    "subject",
+    "issuer",
+    "serial_number",
+    "not_before",
+    "not_after",
+    "sha1_fingerprint",
+    "parse_ok",
+    "parse_error",
+    "source_path",
+    "last_ingested_at",
+    "last_error_at",
+)
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+DECODER_CRYPTOGRAPHY = "cryptography"
+DECODER_LEGACY = "legacy"
+DECODER_OPENSSL = "openssl"
+DECODER_OPENSSL_LEGACY = "openssl-legacy"
+# Not a decoder: metadata reused from the shared parse cache.
+DECODER_CACHE = "cache"
+# In-process decoders always run before the subprocess ones, unless a cached
+# strategy for the exact content says otherwise.
+DECODER_TIERS = {
+    DECODER_CRYPTOGRAPHY: 0,
+    DECODER_LEGACY: 0,
+    DECODER_OPENSSL: 1,
+    DECODER_OPENSSL_LEGACY: 1,
+}
+
+# Successful decodes per decoder path in this process (plus "failed").
+DECODER_STATS: Counter[str] = Counter()
+STRATEGIES = StrategyLearner()
+# Known failures for PARSER_VERSION, per org:
+# org_id -> {(content hash, candidates digest): error}.
+KNOWN_FAILURES: dict[int, dict[tuple[str, str], str | None]] = {}
+# Content hashes whose parse ran past INGEST_FILE_TIMEOUT_SECONDS, per org:
+# org_id -> {content hash: error}. Unlike KNOWN_FAILURES these are skipped
+# whatever the candidate passwords.
+QUARANTINED: dict[int, dict[str, str | None]] = {}
+DELETE_CHUNK_SIZE = 500
+# Manifest columns a rescan needs to decide whether a file changed.
+MANIFEST_COLUMNS = (
+    CertIngestManifest.path,
+    CertIngestManifest.size,
+    CertIngestManifest.mtime_ns,
+    CertIngestManifest.cert_id,
+    CertIngestManifest.parse_ok,
+    CertIngestManifest.strategy,
+    CertIngestManifest.content_hash,
+)
+METADATA_FIELDS = (
+    "subject",
+    "issuer",
+    "serial_number",
+    "not_before",
+    "not_after",
+    "sha1_fingerprint",
+)
+
+T = TypeVar("T")
 
 
 class CertificateParserError(Exception):
@@ -37,6 +143,12 @@ class ParsedCertificate:
     sha1_fingerprint: str | None
     password_used: str | None
     parse_error: str | None
+    content_hash: str | None = None
+    decoder: str | None = None
+    strategy: str | None = None
+    candidates_digest: str | None = None
+    cached_failure: bool = False
+    timed_out: bool = False
 
 
 def _guess_password(path: Path) -> str | None:
@@ -56,13 +168,12 @@ def _parse_datetime(raw_value: str) -> datetime:
     return datetime.strptime(normalized, DATE_FORMAT).replace(tzinfo=timezone.utc)
 
 
-def _run_openssl_extract(path: Path, password: str, *, legacy: bool = False) -> str:
+def _run_openssl_extract(raw_bytes: bytes, password: str, *, legacy: bool = False) -> str:
     try:
+        # The bundle is piped through stdin so openssl never re-reads the file.
         pkcs12_cmd = [
             str(settings.openssl_path),
             "pkcs12",
-            "-in",
-            str(path),
             "-passin",
             f"pass:{password}",
             "-nokeys",
@@ -71,7 +182,9 @@ def _run_openssl_extract(path: Path, password: str, *, legacy: bool = False) ->
         ]
         if legacy:
             pkcs12_cmd.append("-legacy")
-        pem_bytes = subprocess.check_output(pkcs12_cmd, stderr=subprocess.PIPE)
+        pem_bytes = subprocess.check_output(
+            pkcs12_cmd, input=raw_bytes, stderr=subprocess.PIPE, timeout=_subprocess_timeout()
+        )
         x509_cmd = [
             str(settings.openssl_path),
             "x509",
@@ -84,67 +197,242 @@ def _run_openssl_extract(path: Path, password: str, *, legacy: bool = False) ->
             "-sha1",
         ]
         return subprocess.check_output(
-            x509_cmd, input=pem_bytes, stderr=subprocess.PIPE
+            x509_cmd, input=pem_bytes, stderr=subprocess.PIPE, timeout=_subprocess_timeout()
         ).decode("utf-8", errors="ignore")
+    except subprocess.TimeoutExpired as exc:
+        raise DecodeDeadlineExceeded("parse deadline exceeded in openssl") from exc
     except subprocess.CalledProcessError as exc:
         stderr = exc.stderr.decode("utf-8", errors="ignore").strip()
         raise CertificateParserError(stderr or "unable to parse certificate") from exc
 
 
-def _extract_metadata(path: Path, candidates: Iterable[str]) -> tuple[ParsedCertificate, bool]:
+def _subprocess_timeout() -> float | None:
+    remaining = remaining_time()
+    if remaining is None:
+        return None
+    if remaining <= 0:
+        raise DecodeDeadlineExceeded("parse deadline exceeded")
+    return remaining
+
+
+def _failed_certificate(path: Path, error: str | None) -> ParsedCertificate:
+    return ParsedCertificate(
+        path=path,
+        name=path.stem,
+        subject=None,
+        issuer=None,
+        serial_number=None,
+        not_before=None,
+        not_after=None,
+        sha1_fingerprint=None,
+        password_used=None,
+        parse_error=error or "failed to parse certificate",
+    )
+
+
+def _candidates_digest(candidates: list[str]) -> str:
+    return hashlib.sha256("\0".join(candidates).encode("utf-8")).hexdigest()
+
+
+def _extract_metadata(
+    path: Path, candidates: Iterable[str], *, org_id: int | None = None
+) -> tuple[ParsedCertificate, bool]:
+    """Parse ``path`` trying ``candidates``; ``org_id`` selects its negative cache."""
+    max_bytes = settings.ingest_max_file_bytes
+    try:
+        with path.open("rb") as handle:
+            raw_bytes = handle.read(max_bytes + 1) if max_bytes > 0 else handle.read()
+    except OSError as exc:
+        DECODER_STATS["failed"] += 1
+        return _failed_certificate(path, str(exc)), False
+    if max_bytes > 0 and len(raw_bytes) > max_bytes:
+        DECODER_STATS["failed"] += 1
+        return _failed_certificate(path, f"file exceeds {max_bytes} bytes; not parsed"), False
+    content_hash = hashlib.sha256(raw_bytes).hexdigest()
+    candidates = list(dict.fromkeys(candidates))
+    candidates_digest = _candidates_digest(candidates)
+    failure_key = (content_hash, candidates_digest)
+    known_failures = KNOWN_FAILURES.get(org_id, {})
+    quarantined = QUARANTINED.get(org_id, {})
+    if content_hash in quarantined:
+        # Timed out before with these exact bytes; wait for the content to change.
+        DECODER_STATS["quarantined"] += 1
+        parsed = _failed_certificate(path, quarantined[content_hash])
+        success = False
+        parsed.cached_failure = True
+        parsed.timed_out = True
+    elif failure_key in known_failures:
+        # Same bytes, same passwords, same parser: the cascade would fail again.
+        DECODER_STATS["negative-cache"] += 1
+        parsed = _failed_certificate(path, known_failures[failure_key])
+        success = False
+        parsed.cached_failure = True
+    elif (parsed := _parse_from_cache(path, candidates, content_hash)) is not None:
+        success = True
+    else:
+        parsed, success = _extract_metadata_from_bytes(
+            path, raw_bytes, candidates, content_hash=content_hash
+        )
+        if success and (cache := get_parse_cache()) is not None:
+            cache.put(
+                PARSER_VERSION,
+                content_hash,
+                {
+                    **{field: getattr(parsed, field) for field in METADATA_FIELDS},
+                    "strategy": parsed.strategy,
+                    "password_digest": _password_digest(content_hash, parsed.password_used or ""),
+                },
+            )
+    parsed.content_hash = content_hash
+    parsed.candidates_digest = candidates_digest
+    return parsed, success
+
+
+def _password_digest(content_hash: str, password: str) -> str:
+    """Keyed digest of the password that opened ``content_hash``; never the password itself."""
+    return hmac.new(content_hash.encode("utf-8"), password.encode("utf-8"), "sha256").hexdigest()
+
+
+def _password_for_entry(
+    candidates: Iterable[str], content_hash: str, entry: dict[str, object]
+) -> str | None:
+    """Pick the candidate that is the password recorded as opening these bytes.
+
+    Matching only the password kind is not enough: a copy of the same bytes
+    under another name may carry a different (wrong) password in its name.
+    """
+    digest = entry.get("password_digest")
+    if not digest:
+        return None
+    for password in candidates:
+        if hmac.compare_digest(_password_digest(content_hash, password), str(digest)):
+            return password
+    return None
+
+
+def _parse_from_cache(
+    path: Path, candidates: list[str], content_hash: str
+) -> ParsedCertificate | None:
+    cache = get_parse_cache()
+    if cache is None:
+        return None
+    entry = cache.get(PARSER_VERSION, content_hash)
+    if entry is None or not entry.get("strategy"):
+        return None
+    password = _password_for_entry(candidates, content_hash, entry)
+    if password is None:
+        # No candidate is the password that opened these bytes: decode for real.
+        return None
+    DECODER_STATS[DECODER_CACHE] += 1
+    STRATEGIES.record(content_hash, entry["strategy"])
+    return ParsedCertificate(
+        path=path,
+        name=path.stem,
+        password_used=password or None,
+        parse_error=None,
+        decoder=DECODER_CACHE,
+        strategy=entry["strategy"],
+        **{field: entry.get(field) for field in METADATA_FIELDS},
+    )
+
+
+def password_for_payload(path: Path, raw_bytes: bytes) -> str | None:
+    """Filename password, narrowed to the variant that opened these bytes when cached."""
+    guessed = _guess_password(path)
+    cache = get_parse_cache()
+    if guessed is None or cache is None:
+        return guessed
+    content_hash = hashlib.sha256(raw_bytes).hexdigest()
+    entry = cache.get(PARSER_VERSION, content_hash)
+    if entry is None:
+        return guessed
+    return _password_for_entry(_candidate_passwords(path), content_hash, entry) or guessed
+
+
+def _decode(decoder: str, raw_bytes: bytes, password: str) -> dict[str, str | datetime | None]:
+    if decoder == DECODER_CRYPTOGRAPHY:
+        return load_pkcs12_metadata(raw_bytes, password)
+    if decoder == DECODER_LEGACY:
+        return load_pkcs12_legacy_metadata(raw_bytes, password)
+    raw_output = _run_openssl_extract(
+        raw_bytes, password, legacy=decoder == DECODER_OPENSSL_LEGACY
+    )
+    return _parse_metadata_output(raw_output)
+
+
+def _decode_attempts(
+    path: Path, candidates: Iterable[str], content_hash: str | None
+) -> list[DecodeAttempt]:
+    guessed = _guess_password(path)
+    attempts = [
+        DecodeAttempt(decoder, password_kind(password, guessed), password)
+        for decoder in DECODER_TIERS
+        for password in dict.fromkeys(candidates)
+    ]
+    return STRATEGIES.order(attempts, tiers=DECODER_TIERS, hint=STRATEGIES.hint(content_hash))
+
+
+def _extract_metadata_from_bytes(
+    path: Path,
+    raw_bytes: bytes,
+    candidates: Iterable[str],
+    *,
+    content_hash: str | None = None,
+) -> tuple[ParsedCertificate, bool]:
+    """Run decode attempts against one in-memory buffer, most likely first.
+
+    All attempts share one INGEST_FILE_TIMEOUT_SECONDS budget, enforced inside
+    the pure-Python decoder and as the openssl subprocess timeout; a file that
+    runs out of budget comes back failed with ``timed_out`` set. The
+    cryptography backend runs in C and cannot be interrupted, so bundles whose
+    KDF iteration count exceeds INGEST_MAX_KDF_ITERATIONS are refused up front.
+    """
+    max_iterations = settings.ingest_max_kdf_iterations
+    if max_iterations > 0 and (iterations := kdf_iterations(raw_bytes)) > max_iterations:
+        DECODER_STATS["failed"] += 1
+        return (
+            _failed_certificate(
+                path, f"KDF iteration count {iterations} exceeds {max_iterations}; not parsed"
+            ),
+            False,
+        )
+    budget = settings.ingest_file_timeout_seconds
+    deadline = time.monotonic() + budget if budget > 0 else None
     last_error: str | None = None
-    for password in dict.fromkeys(candidates):
+    for attempt in _decode_attempts(path, candidates, content_hash):
+        if deadline is not None and time.monotonic() >= deadline:
+            return _timed_out_certificate(path, budget), False
         try:
-            parsed = parse_pkcs12(path, password)
-            return (
-                ParsedCertificate(
-                    path=path,
-                    name=path.stem,
-                    password_used=password or None,
-                    parse_error=None,
-                    **parsed,
-                ),
-                True,
-            )
+            with decode_deadline(deadline):
+                parsed = _decode(attempt.decoder, raw_bytes, attempt.password)
+        except DecodeDeadlineExceeded:
+            return _timed_out_certificate(path, budget), False
         except Exception as exc:
             last_error = str(exc)
             continue
-    for password in dict.fromkeys(candidates):
-        try:
-            raw_output = _run_openssl_extract(path, password)
-        except CertificateParserError as exc:
-            last_error = str(exc)
-            try:
-                raw_output = _run_openssl_extract(path, password, legacy=True)
-            except CertificateParserError as legacy_exc:
-                last_error = str(legacy_exc)
-                continue
-        parsed = _parse_metadata_output(raw_output)
+        DECODER_STATS[attempt.decoder] += 1
+        STRATEGIES.record(content_hash, attempt.strategy)
         return (
             ParsedCertificate(
                 path=path,
                 name=path.stem,
-                password_used=password or None,
+                password_used=attempt.password or None,
                 parse_error=None,
+                decoder=attempt.decoder,
+                strategy=attempt.strategy,
                 **parsed,
             ),
             True,
         )
-    return (
-        ParsedCertificate(
-            path=path,
-            name=path.stem,
-            subject=None,
-            issuer=None,
-            serial_number=None,
-            not_before=None,
-            not_after=None,
-            sha1_fingerprint=None,
-            password_used=None,
-            parse_error=last_error or "failed to parse certificate",
-        ),
-        False,
-    )
+    DECODER_STATS["failed"] += 1
+    return _failed_certificate(path, last_error), False
+
+
+def _timed_out_certificate(path: Path, budget: float) -> ParsedCertificate:
+    DECODER_STATS["timeout"] += 1
+    parsed = _failed_certificate(path, f"parse exceeded {budget:g}s budget; quarantined")
+    parsed.timed_out = True
+    return parsed
 
 
 def _parse_metadata_output(raw_output: str) -> dict[str, str | datetime | None]:
@@ -225,18 +513,7 @@ def _certificate_datetime(cert_value: datetime) -> datetime:
     )
 
 
-def parse_pkcs12(path: Path, password: str) -> dict[str, str | datetime | None]:
-    raw_bytes = path.read_bytes()
-    password_bytes = password.encode() if password else b""
-    try:
-        _key, cert, _additional = load_key_and_certificates(raw_bytes, password_bytes)
-    except Exception as exc:
-        if password == "":
-            _key, cert, _additional = load_key_and_certificates(raw_bytes, None)
-        else:
-            raise exc
-    if cert is None:
-        raise CertificateParserError("certificate not found in PKCS12 bundle")
+def _certificate_metadata(cert: x509.Certificate) -> dict[str, str | datetime | None]:
     subject = cert.subject.rfc4514_string()
     issuer = cert.issuer.rfc4514_string()
     serial_number = dotnet_serial_from_int(cert.serial_number)
@@ -257,58 +534,247 @@ def parse_pkcs12(path: Path, password: str) -> dict[str, str | datetime | None]:
     }
 
 
-def ingest_certificates_from_fs(
-    db: Session,
-    *,
-    org_id: int,
-    dry_run: bool = False,
-    limit: int = 0,
-    prune_missing: bool = False,
-    dedupe: bool = False,
-) -> dict[str, int | list[dict[str, str | None]]]:
-    root_path = settings.certs_root_path.expanduser()
-    if not root_path.exists() or not root_path.is_dir():
-        raise FileNotFoundError(f"CERTS_ROOT_PATH not found: {root_path}")
+def load_pkcs12_metadata(raw_bytes: bytes, password: str) -> dict[str, str | datetime | None]:
+    password_bytes = password.encode() if password else b""
+    try:
+        _key, cert, _additional = load_key_and_certificates(raw_bytes, password_bytes)
+    except Exception as exc:
+        if password == "":
+            _key, cert, _additional = load_key_and_certificates(raw_bytes, None)
+        else:
+            raise exc
+    if cert is None:
+        raise CertificateParserError("certificate not found in PKCS12 bundle")
+    return _certificate_metadata(cert)
 
-    files = [
-        path
-        for path in sorted(root_path.iterdir())
-        if path.is_file() and path.suffix.lower() in CERT_EXTENSIONS
-    ]
-    if limit and limit > 0:
-        files = files[:limit]
 
-    results: list[dict[str, str | uuid.UUID | None]] = []
+def load_pkcs12_legacy_metadata(raw_bytes: bytes, password: str) -> dict[str, str | datetime | None]:
+    return _certificate_metadata(load_pkcs12_certificate(raw_bytes, password))
 
-    for path in files:
-        parsed, success = _extract_metadata(path, _candidate_passwords(path))
-        existing = _find_existing_certificate(
-            db, org_id=org_id, sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
-        )
 
-        if dry_run:
+def parse_pkcs12(path: Path, password: str) -> dict[str, str | datetime | None]:
+    return load_pkcs12_metadata(path.read_bytes(), password)
+
+
+def _parse_certificate_file(
+    path: Path, org_id: int | None = None
+) -> tuple[ParsedCertificate, bool]:
+    return _extract_metadata(path, _candidate_passwords(path), org_id=org_id)
+
+
+def _parse_certificate_chunk(
+    paths: list[Path], org_id: int | None = None
+) -> list[tuple[ParsedCertificate, bool]]:
+    return [_parse_certificate_file(path, org_id) for path in paths]
+
+
+def _iter_parsed_certificates(
+    files: list[Path], *, workers: int, org_id: int | None = None
+) -> Iterator[tuple[ParsedCertificate, bool]]:
+    """Parse files in order, fanning out to a process pool when workers > 1.
+
+    Only ``workers * PARSE_WINDOW_PER_WORKER`` chunks are submitted ahead of
+    the consumer, and closing the generator cancels whatever is still queued
+    instead of waiting for the whole listing to parse.
+    """
+    if workers <= 1 or len(files) <= 1:
+        for path in files:
+            yield _parse_certificate_file(path, org_id)
+        return
+    chunksize = min(PARSE_CHUNK_MAX, max(1, len(files) // (workers * 4)))
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_parse_worker,
+        initargs=(
+            *STRATEGIES.snapshot(),
+            org_id,
+            dict(KNOWN_FAILURES.get(org_id, {})),
+            dict(QUARANTINED.get(org_id, {})),
+        ),
+    )
+    chunks = _batched(files, chunksize)
+    window: deque[Future[list[tuple[ParsedCertificate, bool]]]] = deque()
+    try:
+        while True:
+            while len(window) < workers * PARSE_WINDOW_PER_WORKER and (
+                chunk := next(chunks, None)
+            ):
+                window.append(executor.submit(_parse_certificate_chunk, chunk, org_id))
+            if not window:
+                break
+            for parsed, success in window.popleft().result():
+                STRATEGIES.record(parsed.content_hash, parsed.strategy)
+                yield parsed, success
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_parse_worker(
+    hints: dict[str, str],
+    successes: dict[str, int],
+    org_id: int | None,
+    known_failures: dict[tuple[str, str], str | None],
+    quarantined: dict[str, str | None],
+) -> None:
+    STRATEGIES.seed(hints, successes)
+    KNOWN_FAILURES[org_id] = known_failures
+    QUARANTINED[org_id] = quarantined
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, max(1, size))):
+        yield batch
+
+
+class CertificateMatchIndex:
+    """In-memory sha1/serial/name lookup over an org's certificates.
+
+    Mirrors the precedence of ``_find_existing_certificate`` but is loaded with
+    a single query and kept current as the batch inserts or updates rows.
+    """
+
+    def __init__(self, org_id: int) -> None:
+        self.org_id = org_id
+        self._by_sha1: dict[str, uuid.UUID] = {}
+        self._by_serial: dict[str, uuid.UUID] = {}
+        self._by_name: dict[str, uuid.UUID] = {}
+        self._keys: dict[uuid.UUID, tuple[str | None, str | None, str]] = {}
+
+    @classmethod
+    def load(cls, db: Session, *, org_id: int) -> CertificateMatchIndex:
+        index = cls(org_id)
+        rows = db.execute(
+            select(
+                Certificate.id,
+                Certificate.sha1_fingerprint,
+                Certificate.serial_number,
+                Certificate.name,
+            )
+            .where(Certificate.org_id == org_id)
+            .order_by(Certificate.created_at)
+        ).all()
+        for cert_id, sha1, serial, name in rows:
+            index._keys[cert_id] = (sha1, serial, name)
+            if sha1:
+                index._by_sha1.setdefault(sha1, cert_id)
+            if serial:
+                index._by_serial.setdefault(serial, cert_id)
+            index._by_name.setdefault(name, cert_id)
+        return index
+
+    def __contains__(self, cert_id: object) -> bool:
+        return cert_id in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def resolve(self, *, sha1: str | None, serial: str | None, name: str) -> uuid.UUID | None:
+        if sha1 and sha1 in self._by_sha1:
+            return self._by_sha1[sha1]
+        if serial and serial in self._by_serial:
+            return self._by_serial[serial]
+        return self._by_name.get(name)
+
+    def add(
+        self, cert_id: uuid.UUID, *, sha1: str | None, serial: str | None, name: str
+    ) -> None:
+        self.discard(cert_id)
+        self._keys[cert_id] = (sha1, serial, name)
+        if sha1:
+            self._by_sha1[sha1] = cert_id
+        if serial:
+            self._by_serial[serial] = cert_id
+        self._by_name[name] = cert_id
+
+    def discard(self, cert_id: uuid.UUID) -> None:
+        keys = self._keys.pop(cert_id, None)
+        if keys is None:
+            return
+        sha1, serial, name = keys
+        for mapping, key in ((self._by_sha1, sha1), (self._by_serial, serial), (self._by_name, name)):
+            if key and mapping.get(key) == cert_id:
+                del mapping[key]
+
+
+def _duplicate_names(paths: Iterable[Path]) -> dict[Path, Path]:
+    """Map every path whose stem an earlier path already has to that earlier path."""
+    first: dict[str, Path] = {}
+    duplicates: dict[Path, Path] = {}
+    for path in paths:
+        owner = first.setdefault(path.stem, path)
+        if owner != path:
+            duplicates[path] = owner
+    return duplicates
+
+
+def _apply_ingest_batch(
+    db: Session,
+    *,
+    org_id: int,
+    batch: list[tuple[ParsedCertificate, bool]],
+    index: CertificateMatchIndex,
+    dry_run: bool,
+) -> list[dict[str, str | uuid.UUID | None]]:
+    results: list[dict[str, str | uuid.UUID | None]] = []
+    if dry_run:
+        for parsed, success in batch:
+            existing_id = index.resolve(
+                sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
+            )
             results.append(
                 {
-                    "action": "updated" if existing else "inserted",
-                    "cert_id": existing.id if existing else None,
-                    "file": path.name,
+                    "action": ("updated" if existing_id else "inserted") if success else "failed",
+                    "cert_id": existing_id,
+                    "file": parsed.path.name,
                     "error": parsed.parse_error if not success else None,
                 }
             )
-            if not success:
-                results[-1]["action"] = "failed"
-            continue
+        return results
+
+    matched_ids = {
+        cert_id
+        for parsed, _ in batch
+        if (
+            cert_id := index.resolve(
+                sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
+            )
+        )
+    }
+    loaded: dict[uuid.UUID, Certificate] = {}
+    if matched_ids:
+        loaded = {
+            cert.id: cert
+            for cert in db.execute(
+                select(Certificate).where(Certificate.id.in_(matched_ids))
+            ).scalars()
+        }
+
+    for parsed, success in batch:
+        # Resolve again per file: earlier files in this batch may have inserted
+        # or re-keyed a matching row.
+        existing_id = index.resolve(
+            sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
+        )
+        existing = loaded.get(existing_id) if existing_id else None
 
         if success:
             if existing:
                 _update_certificate(existing, parsed)
                 action = "updated"
-                cert_id = existing.id
             else:
-                certificate = _build_certificate(org_id, parsed)
-                db.add(certificate)
+                existing = _build_certificate(org_id, parsed)
+                db.add(existing)
+                loaded[existing.id] = existing
                 action = "inserted"
-                cert_id = certificate.id
+            cert_id = existing.id
+            index.add(
+                cert_id,
+                sha1=existing.sha1_fingerprint,
+                serial=existing.serial_number,
+                name=existing.name,
+            )
         else:
             action = "failed"
             cert_id = existing.id if existing else None
@@ -319,42 +785,396 @@ def ingest_certificates_from_fs(
             {
                 "action": action,
                 "cert_id": cert_id,
-                "file": path.name,
+                "file": parsed.path.name,
+                "error": parsed.parse_error if not success else None,
+            }
+        )
+    db.flush()
+    return results
+
+
+def _certificate_values(parsed: ParsedCertificate, now: datetime) -> dict[str, object]:
+    return {
+        "subject": parsed.subject,
+        "issuer": parsed.issuer,
+        "serial_number": parsed.serial_number,
+        "not_before": parsed.not_before,
+        "not_after": parsed.not_after,
+        "sha1_fingerprint": parsed.sha1_fingerprint,
+        "parse_ok": True,
+        "parse_error": None,
+        "source_path": str(parsed.path),
+        "last_ingested_at": now,
+        "last_error_at": None,
+    }
+
+
+def _apply_ingest_batch_bulk(
+    db: Session,
+    *,
+    org_id: int,
+    batch: list[tuple[ParsedCertificate, bool]],
+    index: CertificateMatchIndex,
+) -> list[dict[str, str | uuid.UUID | None]]:
+    """Set-based variant of ``_apply_ingest_batch`` that bypasses the ORM unit of work."""
+    insert_factory = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert_factory is None:
+        return _apply_ingest_batch(db, org_id=org_id, batch=batch, index=index, dry_run=False)
+
+    now = datetime.now(timezone.utc)
+    inserts: list[dict[str, object]] = []
+    updates: list[dict[str, object]] = []
+    failures: list[dict[str, object]] = []
+    results: list[dict[str, str | uuid.UUID | None]] = []
+    for parsed, success in batch:
+        existing_id = index.resolve(
+            sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
+        )
+        if success:
+            values = _certificate_values(parsed, now)
+            if existing_id:
+                cert_id = existing_id
+                updates.append({"b_id": cert_id, **{f"b_{key}": value for key, value in values.items()}})
+                action = "updated"
+            else:
+                cert_id = uuid.uuid4()
+                inserts.append({"id": cert_id, "org_id": org_id, "name": parsed.name, **values})
+                action = "inserted"
+            index.add(
+                cert_id, sha1=parsed.sha1_fingerprint, serial=parsed.serial_number, name=parsed.name
+            )
+        else:
+            cert_id = existing_id
+            action = "failed"
+            if existing_id:
+                failures.append(
+                    {
+                        "b_id": existing_id,
+                        "b_parse_error": parsed.parse_error,
+                        "b_source_path": str(parsed.path),
+                        "b_now": now,
+                    }
+                )
+        results.append(
+            {
+                "action": action,
+                "cert_id": cert_id,
+                "file": parsed.path.name,
                 "error": parsed.parse_error if not success else None,
             }
         )
 
+    table = Certificate.__table__
+    if inserts:
+        statement = insert_factory(table).values(inserts)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.org_id, table.c.name],
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS},
+        ).returning(table.c.id, table.c.name)
+        planned = {row["name"]: row["id"] for row in inserts}
+        # A concurrent writer may own the name already; keep the id the DB returned.
+        remapped = {
+            planned[name]: cert_id
+            for cert_id, name in db.execute(statement).all()
+            if planned[name] != cert_id
+        }
+        if remapped:
+            for item in results:
+                item["cert_id"] = remapped.get(item["cert_id"], item["cert_id"])
+            for params in (*updates, *failures):
+                params["b_id"] = remapped.get(params["b_id"], params["b_id"])
+            for row in inserts:
+                if row["id"] in remapped:
+                    index.discard(row["id"])
+                    index.add(
+                        remapped[row["id"]],
+                        sha1=row["sha1_fingerprint"],
+                        serial=row["serial_number"],
+                        name=row["name"],
+                    )
+    if updates:
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({column: bindparam(f"b_{column}") for column in UPSERT_COLUMNS}),
+            updates,
+        )
+    if failures:
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                parse_ok=False,
+                parse_error=bindparam("b_parse_error"),
+                last_ingested_at=bindparam("b_now"),
+                last_error_at=bindparam("b_now"),
+                source_path=func.coalesce(table.c.source_path, bindparam("b_source_path")),
+            ),
+            failures,
+        )
+    return results
+
+
+def iter_certificate_ingest(
+    db: Session,
+    *,
+    org_id: int,
+    dry_run: bool = False,
+    limit: int = 0,
+    prune_missing: bool = False,
+    dedupe: bool = False,
+    workers: int | None = None,
+    full_rescan: bool = False,
+    bulk_write: bool | None = None,
+    resume: bool = False,
+    recursive: bool | None = None,
+    include: Iterable[str] | None = None,
+    exclude: Iterable[str] | None = None,
+) -> Iterator[dict[str, object]]:
+    """Ingest every PFX under CERTS_ROOT_PATH, yielding events as work completes.
+
+    Events are dicts tagged by ``type``: ``progress`` (once the work is known,
+    then after each batch), ``file`` (one per file, including unchanged ones)
+    and a final ``summary`` shaped like the ``ingest_certificates_from_fs``
+    result. Only counters and the first MAX_ERRORS errors are kept, so memory
+    does not grow with the directory size.
+
+    Unless ``dry_run`` is set, each batch of INGEST_BATCH_SIZE files is
+    committed together with a CertIngestRun checkpoint; ``resume`` continues
+    the org's last interrupted run after its checkpoint.
+
+    ``recursive``/``include``/``exclude`` default to INGEST_RECURSIVE and the
+    INGEST_INCLUDE_GLOBS/INGEST_EXCLUDE_GLOBS settings. When part of the tree
+    cannot be read, the unreadable paths are reported as errors and neither
+    the manifest nor (with ``prune_missing``) the certificates are pruned,
+    since the listing no longer proves a file is gone.
+
+    Certificates are named after the file stem, so when several files share
+    one (``a/cert.pfx`` and ``b/cert.pfx``) only the first in path order is
+    ingested; the others are reported as failed instead of overwriting it.
+    """
+    root_path = settings.certs_root_path.expanduser()
+    if not root_path.exists() or not root_path.is_dir():
+        raise FileNotFoundError(f"CERTS_ROOT_PATH not found: {root_path}")
+
+    walk_options = {
+        "recursive": settings.ingest_recursive if recursive is None else recursive,
+        "include": parse_globs(settings.ingest_include_globs if include is None else include),
+        "exclude": parse_globs(settings.ingest_exclude_globs if exclude is None else exclude),
+    }
+    # Sorted by path string, which is also how checkpoints compare paths.
+    unreadable: list[Path] = []
+    files = list_certificate_files(root_path, **walk_options, unreadable=unreadable)
+    # The full listing doubles as the on-disk snapshot for pruning.
+    present = {str(path) for path, _ in files}
+    duplicates = _duplicate_names(path for path, _ in files)
+    if limit and limit > 0:
+        files = files[:limit]
+
+    run = None
+    if not dry_run:
+        run = _start_ingest_run(db, org_id=org_id, full_rescan=full_rescan, resume=resume)
+        full_rescan = run.full_rescan
+    done_through = run.last_path if run is not None else None
+
+    manifest = _load_manifest(db, org_id=org_id)
+    _seed_strategies(manifest.values())
+    failures = _load_parse_failures(db, org_id=org_id)
+    index = CertificateMatchIndex.load(db, org_id=org_id)
+    signatures: dict[Path, os.stat_result] = {}
+    skipped: list[Path] = []
+    duplicated: list[Path] = []
+    for path, file_stat in files:
+        if done_through is not None and str(path) <= done_through:
+            continue
+        if path in duplicates:
+            duplicated.append(path)
+            continue
+        if not full_rescan and _manifest_unchanged(
+            manifest.get(str(path)), file_stat, index, failures
+        ):
+            skipped.append(path)
+            continue
+        signatures[path] = file_stat
+
+    # Counters restored from the checkpoint cover files up to done_through.
+    restored: Counter[str] = Counter()
+    if run is not None:
+        restored.update(
+            inserted=run.inserted, updated=run.updated, failed=run.failed, unchanged=run.unchanged
+        )
+    actions: Counter[str] = restored + Counter(
+        unchanged=len(skipped), failed=len(duplicated)
+    )
+    decoders: Counter[str] = Counter()
+    errors: list[dict[str, str | None]] = [
+        {"filename": str(path), "reason": UNREADABLE_PATH_ERROR, "exception": None}
+        for path in unreadable[:MAX_ERRORS]
+    ]
+    for path in duplicated:
+        error = DUPLICATE_NAME_ERROR.format(name=path.stem, other=duplicates[path])
+        if len(errors) < MAX_ERRORS:
+            errors.append({"filename": path.name, "reason": error, "exception": None})
+    negative_cache_hits = 0
+    quarantine: Counter[str] = Counter()
+
+    parsed_count = 0
+
+    def progress() -> dict[str, object]:
+        # parsed/to_parse cover only files this run decodes, which is what an
+        # ETA should be based on; unchanged files are skipped almost for free.
+        return {
+            "type": "progress",
+            "processed": sum(actions.values()),
+            "total": len(files),
+            "parsed": parsed_count,
+            "to_parse": len(signatures),
+            "inserted": actions["inserted"],
+            "updated": actions["updated"],
+            "failed": actions["failed"],
+            "unchanged": actions["unchanged"],
+        }
+
+    yield progress()
+    for path in skipped:
+        yield {"type": "file", "file": path.name, "action": "unchanged", "cert_id": None, "error": None}
+    for path in duplicated:
+        error = DUPLICATE_NAME_ERROR.format(name=path.stem, other=duplicates[path])
+        yield {"type": "file", "file": path.name, "action": "failed", "cert_id": None, "error": error}
+
+    # Parsing is CPU-bound and runs in worker processes; DB writes stay in this
+    # thread, applied one batch at a time in file order.
+    parsed_stream = _iter_parsed_certificates(
+        list(signatures),
+        workers=workers if workers is not None else settings.ingest_workers,
+        org_id=org_id,
+    )
+    use_bulk = not dry_run and (
+        settings.ingest_bulk_write if bulk_write is None else bulk_write
+    )
+    for batch in _batched(parsed_stream, settings.ingest_batch_size):
+        parsed_count += len(batch)
+        decoders.update(parsed.decoder for parsed, _ in batch if parsed.decoder)
+        if use_bulk:
+            batch_results = _apply_ingest_batch_bulk(db, org_id=org_id, batch=batch, index=index)
+        else:
+            batch_results = _apply_ingest_batch(
+                db, org_id=org_id, batch=batch, index=index, dry_run=dry_run
+            )
+        if not dry_run:
+            entries = _load_manifest_entries(
+                db, org_id=org_id, paths=[parsed.path for parsed, _ in batch]
+            )
+            for (parsed, success), item in zip(batch, batch_results):
+                _record_manifest(
+                    db,
+                    entries,
+                    org_id=org_id,
+                    parsed=parsed,
+                    file_stat=signatures[parsed.path],
+                    cert_id=item["cert_id"],
+                    success=success,
+                )
+                if not success:
+                    _record_parse_failure(db, failures, org_id=org_id, parsed=parsed)
+        for parsed, _ in batch:
+            if parsed.timed_out:
+                quarantine["skipped" if parsed.cached_failure else "added"] += 1
+            elif parsed.cached_failure:
+                negative_cache_hits += 1
+        for (parsed, _), item in zip(batch, batch_results):
+            actions[item["action"]] += 1
+            if item["action"] == "failed" and item.get("error") and len(errors) < MAX_ERRORS:
+                errors.append({"filename": item["file"], "reason": item["error"], "exception": None})
+            yield {"type": "file", **item, "decoder": parsed.decoder}
+        if run is not None:
+            last_path = str(batch[-1][0].path)
+            # Like unchanged files, duplicates past the checkpoint are counted
+            # again when the run resumes.
+            pending = len(duplicated) - bisect.bisect_right(duplicated, last_path, key=str)
+            _checkpoint_ingest_run(
+                run,
+                last_path=last_path,
+                actions=actions - Counter(failed=pending),
+                unchanged=restored["unchanged"] + bisect.bisect_right(skipped, last_path, key=str),
+            )
+            db.flush()
+            # Committed rows are not needed again in this run; drop them from
+            # the identity map so the session only ever holds one batch.
+            for entry in entries.values():
+                db.expunge(entry)
+            for item in batch_results:
+                certificate = item["cert_id"] and db.identity_map.get(
+                    db.identity_key(Certificate, item["cert_id"])
+                )
+                if certificate is not None:
+                    db.expunge(certificate)
+            db.commit()
+        yield progress()
+
+    if not dry_run and not unreadable:
+        # Forget duplicates too, so each is parsed once its name is unique again.
+        _prune_manifest(
+            db, manifest, org_id=org_id, present=present - {str(path) for path in duplicates}
+        )
+    if run is not None:
+        _checkpoint_ingest_run(
+            run, last_path=run.last_path, actions=actions, unchanged=actions["unchanged"]
+        )
+        run.status = INGEST_RUN_STATUS_DONE
+        run.finished_at = run.updated_at
+
     pruned = 0
     deduped = 0
 
     if not dry_run:
-        if prune_missing:
-            pruned = _prune_missing_certificates(db, org_id=org_id)
+        if prune_missing and not unreadable:
+            pruned = _prune_missing_certificates(
+                db, org_id=org_id, root_path=root_path, present=present, **walk_options
+            )
         if dedupe:
             deduped = _dedupe_certificates(db, org_id=org_id)
         db.commit()
 
-    total = len(files)
-    inserted = sum(1 for item in results if item["action"] == "inserted")
-    updated = sum(1 for item in results if item["action"] == "updated")
-    failed = sum(1 for item in results if item["action"] == "failed")
-    errors = [
-        {"filename": item["file"], "reason": item["error"], "exception": None}
-        for item in results
-        if item["action"] == "failed" and item.get("error")
-    ][:MAX_ERRORS]
-
-    return {
-        "inserted": inserted,
-        "updated": updated,
-        "failed": failed,
-        "total": total,
+    yield {
+        "type": "summary",
+        "inserted": actions["inserted"],
+        "updated": actions["updated"],
+        "failed": actions["failed"],
+        "unchanged": actions["unchanged"],
+        "negative_cache_hits": negative_cache_hits,
+        "quarantined": quarantine["added"],
+        "quarantine_skipped": quarantine["skipped"],
+        "total": len(files),
         "pruned": pruned,
         "deduped": deduped,
+        "decoders": dict(decoders),
         "errors": errors,
     }
 
 
+def ingest_certificates_from_fs(
+    db: Session,
+    *,
+    org_id: int,
+    progress: Callable[[dict[str, int]], None] | None = None,
+    **options,
+) -> dict[str, int | list[dict[str, str | None]]]:
+    """Run ``iter_certificate_ingest`` to completion and return its summary.
+
+    ``progress`` is called with each progress event (running ``processed``/
+    ``total`` and per-action counters).
+    """
+    summary: dict[str, object] = {}
+    for event in iter_certificate_ingest(db, org_id=org_id, **options):
+        kind = event.pop("type")
+        if kind == "progress" and progress is not None:
+            progress(event)
+        elif kind == "summary":
+            summary = event
+    return summary
+
+
 def ingest_certificate_from_path(
     db: Session, *, org_id: int, path: Path
 ) -> dict[str, str | uuid.UUID | None]:
@@ -364,7 +1184,12 @@ def ingest_certificate_from_path(
     if normalized_path.suffix.lower() not in CERT_EXTENSIONS:
         raise ValueError(f"Unsupported certificate extension: {normalized_path.suffix}")
 
-    parsed, success = _extract_metadata(normalized_path, _candidate_passwords(normalized_path))
+    file_stat = normalized_path.stat()
+    manifest_entry = db.get(CertIngestManifest, (org_id, str(normalized_path)))
+    if manifest_entry is not None:
+        _seed_strategies([manifest_entry])
+    failures = _load_parse_failures(db, org_id=org_id)
+    parsed, success = _parse_certificate_file(normalized_path, org_id)
     existing = _find_existing_certificate(
         db,
         org_id=org_id,
@@ -389,6 +1214,17 @@ def ingest_certificate_from_path(
         if existing:
             _mark_parse_failure(existing, parsed)
 
+    _record_manifest(
+        db,
+        {str(normalized_path): manifest_entry} if manifest_entry else {},
+        org_id=org_id,
+        parsed=parsed,
+        file_stat=file_stat,
+        cert_id=cert_id,
+        success=success,
+    )
+    if not success:
+        _record_parse_failure(db, failures, org_id=org_id, parsed=parsed)
     db.commit()
     return {
         "action": action,
@@ -398,6 +1234,162 @@ def ingest_certificate_from_path(
     }
 
 
+def ingest_certificate_paths(
+    db: Session, *, org_id: int, paths: Iterable[str | Path]
+) -> list[dict[str, str | uuid.UUID | None]]:
+    """Ingest a list of files, committing once per INGEST_BATCH_SIZE chunk.
+
+    The batch counterpart of ``ingest_certificate_from_path``: the match index
+    and the negative cache are loaded once for the whole list and manifest
+    entries once per chunk. Returns one result per distinct path, in order,
+    with the normalized ``path``; files that are gone or have an unsupported
+    extension are reported as ``missing`` instead of raising.
+    """
+    results: dict[str, dict[str, str | uuid.UUID | None]] = {}
+    signatures: dict[Path, os.stat_result] = {}
+    for raw_path in paths:
+        path = Path(raw_path).expanduser().resolve(strict=False)
+        if str(path) in results:
+            continue
+        error = None
+        if not path.exists() or not path.is_file():
+            error = f"Certificate file not found: {path}"
+        elif path.suffix.lower() not in CERT_EXTENSIONS:
+            error = f"Unsupported certificate extension: {path.suffix}"
+        results[str(path)] = {
+            "path": str(path),
+            "action": "missing" if error else None,
+            "cert_id": None,
+            "file": path.name,
+            "error": error,
+        }
+        if error is None:
+            signatures[path] = path.stat()
+    if not signatures:
+        return list(results.values())
+
+    index = CertificateMatchIndex.load(db, org_id=org_id)
+    failures = _load_parse_failures(db, org_id=org_id)
+    for chunk in _batched(signatures, settings.ingest_batch_size):
+        manifest = _load_manifest_entries(db, org_id=org_id, paths=chunk)
+        _seed_strategies(manifest.values())
+        batch = [_parse_certificate_file(path, org_id) for path in chunk]
+        batch_results = _apply_ingest_batch(
+            db, org_id=org_id, batch=batch, index=index, dry_run=False
+        )
+        for (parsed, success), item in zip(batch, batch_results):
+            _record_manifest(
+                db,
+                manifest,
+                org_id=org_id,
+                parsed=parsed,
+                file_stat=signatures[parsed.path],
+                cert_id=item["cert_id"],
+                success=success,
+            )
+            if not success:
+                _record_parse_failure(db, failures, org_id=org_id, parsed=parsed)
+            results[str(parsed.path)].update(item)
+        db.commit()
+    return list(results.values())
+
+
+def reconcile_certificate_directories(
+    db: Session,
+    *,
+    org_id: int,
+    root: Path,
+    directories: Iterable[str],
+    recursive: bool = False,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> dict[str, int]:
+    """Bring the certificates of a few directories under ``root`` in line with disk.
+
+    Each directory is listed on its own (subfolders are not descended into) and
+    filtered by the root's walk options. Files whose manifest entry is stale
+    are ingested in batches through ``ingest_certificate_paths``; certificates
+    whose covered source file is gone are deleted.
+    Meant for targeted repair when individual watcher events were lost.
+    """
+    walk_options = {
+        "recursive": recursive,
+        "include": parse_globs(include),
+        "exclude": parse_globs(exclude),
+    }
+    unique_directories = {path_key(directory): directory for directory in directories}
+    directory_keys = set(unique_directories)
+    on_disk: dict[str, os.stat_result] = {}
+    unreadable: list[Path] = []
+    for directory in sorted(unique_directories.values()):
+        try:
+            for path, file_stat in iter_certificate_files(Path(directory), unreadable=unreadable):
+                if covers_path(path, root, **walk_options):
+                    on_disk[str(path)] = file_stat
+        except (FileNotFoundError, NotADirectoryError):
+            # The directory itself is gone; its certificates are pruned below.
+            continue
+        except OSError as exc:
+            # Exists but cannot be listed (permissions, share hiccup): no deletes there.
+            logger.warning(
+                "reconcile_directory_unreadable org_id=%s directory=%s error=%s",
+                org_id,
+                directory,
+                exc,
+            )
+            unreadable.append(Path(directory))
+
+    manifest: dict[str, Row] = {}
+    for chunk in _batched(on_disk, DELETE_CHUNK_SIZE):
+        manifest.update(
+            (row.path, row)
+            for row in db.execute(
+                select(*MANIFEST_COLUMNS).where(
+                    CertIngestManifest.org_id == org_id, CertIngestManifest.path.in_(chunk)
+                )
+            )
+        )
+    index = CertificateMatchIndex.load(db, org_id=org_id)
+    failures = _load_parse_failures(db, org_id=org_id)
+    actions: Counter[str] = Counter()
+    changed: list[str] = []
+    for path, file_stat in on_disk.items():
+        if _manifest_unchanged(manifest.get(path), file_stat, index, failures):
+            actions["unchanged"] += 1
+        else:
+            changed.append(path)
+    if changed:
+        for result in ingest_certificate_paths(db, org_id=org_id, paths=changed):
+            actions[str(result["action"])] += 1
+
+    present_keys = {path_key(path) for path in on_disk}
+    rows = db.execute(
+        select(Certificate.id, Certificate.source_path).where(
+            Certificate.org_id == org_id, Certificate.source_path.is_not(None)
+        )
+    )
+    missing_ids = [
+        cert_id
+        for cert_id, source_path in rows
+        if source_path
+        and path_key(os.path.dirname(source_path)) in directory_keys
+        and path_key(source_path) not in present_keys
+        and not is_under(source_path, unreadable)
+        and covers_path(source_path, root, **walk_options)
+    ]
+    for chunk in _batched(missing_ids, DELETE_CHUNK_SIZE):
+        db.execute(delete(Certificate).where(Certificate.id.in_(chunk)))
+    db.commit()
+    return {
+        "scanned": len(on_disk),
+        "inserted": actions["inserted"],
+        "updated": actions["updated"],
+        "failed": actions["failed"],
+        "unchanged": actions["unchanged"],
+        "deleted": len(missing_ids),
+    }
+
+
 def _find_existing_certificate(
     db: Session, *, org_id: int, sha1: str | None, serial: str | None, name: str
 ) -> Certificate | None:
@@ -438,6 +1430,7 @@ def _update_certificate(target: Certificate, parsed: ParsedCertificate) -> None:
 
 def _build_certificate(org_id: int, parsed: ParsedCertificate) -> Certificate:
     return Certificate(
+        id=uuid.uuid4(),
         org_id=org_id,
         name=parsed.name,
         subject=parsed.subject,
@@ -464,50 +1457,284 @@ def _mark_parse_failure(target: Certificate, parsed: ParsedCertificate) -> None:
         target.source_path = str(parsed.path)
 
 
-def _prune_missing_certificates(db: Session, *, org_id: int) -> int:
-    certificates = db.execute(
-        select(Certificate).where(
-            Certificate.org_id == org_id, Certificate.source_path.is_not(None)
+def _start_ingest_run(
+    db: Session, *, org_id: int, full_rescan: bool, resume: bool
+) -> CertIngestRun:
+    if resume:
+        run = db.execute(
+            select(CertIngestRun)
+            .where(
+                CertIngestRun.org_id == org_id,
+                CertIngestRun.status == INGEST_RUN_STATUS_RUNNING,
+            )
+            .order_by(CertIngestRun.started_at.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if run is not None:
+            return run
+    # A fresh run supersedes any interrupted one.
+    db.execute(
+        update(CertIngestRun)
+        .where(
+            CertIngestRun.org_id == org_id,
+            CertIngestRun.status == INGEST_RUN_STATUS_RUNNING,
+        )
+        .values(status=INGEST_RUN_STATUS_ABANDONED)
+    )
+    run = CertIngestRun(
+        org_id=org_id,
+        status=INGEST_RUN_STATUS_RUNNING,
+        full_rescan=full_rescan,
+        inserted=0,
+        updated=0,
+        failed=0,
+        unchanged=0,
+    )
+    db.add(run)
+    return run
+
+
+def _checkpoint_ingest_run(
+    run: CertIngestRun, *, last_path: str | None, actions: Counter[str], unchanged: int
+) -> None:
+    run.last_path = last_path
+    run.inserted = actions["inserted"]
+    run.updated = actions["updated"]
+    run.failed = actions["failed"]
+    run.unchanged = unchanged
+    run.updated_at = datetime.now(timezone.utc)
+
+
+def _load_manifest(db: Session, *, org_id: int) -> dict[str, Row]:
+    """Load the org's manifest as MANIFEST_COLUMNS rows, not ORM objects.
+
+    The dict still has one entry per file, but plain rows are a fraction of
+    the size of tracked instances; ``_load_manifest_entries`` fetches the ORM
+    entries a batch actually writes.
+    """
+    rows = db.execute(select(*MANIFEST_COLUMNS).where(CertIngestManifest.org_id == org_id))
+    return {row.path: row for row in rows}
+
+
+def _load_manifest_entries(
+    db: Session, *, org_id: int, paths: Iterable[Path]
+) -> dict[str, CertIngestManifest]:
+    entries = db.execute(
+        select(CertIngestManifest).where(
+            CertIngestManifest.org_id == org_id,
+            CertIngestManifest.path.in_([str(path) for path in paths]),
         )
     ).scalars()
-    removed = 0
-    for certificate in certificates:
-        if certificate.source_path and not Path(certificate.source_path).exists():
-            db.delete(certificate)
-            removed += 1
-    return removed
+    return {entry.path: entry for entry in entries}
 
 
-def _dedupe_certificates(db: Session, *, org_id: int) -> int:
-    certificates = db.execute(
-        select(Certificate).where(Certificate.org_id == org_id)
+def _load_parse_failures(db: Session, *, org_id: int) -> dict[str, CertParseFailure]:
+    """Load the org's negative cache into its KNOWN_FAILURES and QUARANTINED entries."""
+    entries = db.execute(
+        select(CertParseFailure).where(
+            CertParseFailure.org_id == org_id,
+            CertParseFailure.parser_version == PARSER_VERSION,
+        )
     ).scalars()
-    by_sha1: dict[str, list[Certificate]] = {}
-    by_serial: dict[str, list[Certificate]] = {}
-    for certificate in certificates:
-        if certificate.sha1_fingerprint:
-            by_sha1.setdefault(certificate.sha1_fingerprint, []).append(certificate)
-        elif certificate.serial_number:
-            by_serial.setdefault(certificate.serial_number, []).append(certificate)
-
-    removed_ids: set[uuid.UUID] = set()
-
-    def remove_duplicates(groups: dict[str, list[Certificate]]) -> None:
-        for group in groups.values():
-            if len(group) <= 1:
-                continue
-            group_sorted = sorted(
-                group,
-                key=lambda cert: cert.last_ingested_at
-                or datetime.min.replace(tzinfo=timezone.utc),
-                reverse=True,
+    failures = {entry.content_hash: entry for entry in entries}
+    # Swap in fresh dicts: other orgs' entries are untouched and a concurrent
+    # reader of this org sees either the old or the new cache, never a cleared one.
+    KNOWN_FAILURES[org_id] = {
+        (entry.content_hash, entry.candidates_digest): entry.parse_error
+        for entry in failures.values()
+    }
+    QUARANTINED[org_id] = {
+        entry.content_hash: entry.parse_error for entry in failures.values() if entry.quarantined
+    }
+    return failures
+
+
+def _record_parse_failure(
+    db: Session,
+    failures: dict[str, CertParseFailure],
+    *,
+    org_id: int,
+    parsed: ParsedCertificate,
+) -> None:
+    if parsed.content_hash is None or parsed.candidates_digest is None:
+        return
+    now = datetime.now(timezone.utc)
+    entry = failures.get(parsed.content_hash)
+    if entry is None:
+        entry = CertParseFailure(
+            org_id=org_id,
+            content_hash=parsed.content_hash,
+            parser_version=PARSER_VERSION,
+            hits=0,
+            quarantined=False,
+            failed_at=now,
+        )
+        db.add(entry)
+        failures[parsed.content_hash] = entry
+    if parsed.cached_failure:
+        entry.hits = (entry.hits or 0) + 1
+    else:
+        entry.candidates_digest = parsed.candidates_digest
+        entry.parse_error = parsed.parse_error
+        entry.quarantined = parsed.timed_out
+        entry.failed_at = now
+    entry.last_seen_at = now
+    KNOWN_FAILURES.setdefault(org_id, {})[
+        (parsed.content_hash, parsed.candidates_digest)
+    ] = parsed.parse_error
+    if parsed.timed_out:
+        QUARANTINED.setdefault(org_id, {})[parsed.content_hash] = parsed.parse_error
+
+
+def clear_parse_failures(db: Session, *, org_id: int) -> int:
+    result = db.execute(delete(CertParseFailure).where(CertParseFailure.org_id == org_id))
+    KNOWN_FAILURES.pop(org_id, None)
+    QUARANTINED.pop(org_id, None)
+    return result.rowcount or 0
+
+
+def _seed_strategies(entries: Iterable[CertIngestManifest | Row]) -> None:
+    hints: dict[str, str] = {}
+    successes: Counter[str] = Counter()
+    for entry in entries:
+        if entry.strategy:
+            successes[entry.strategy] += 1
+            if entry.content_hash:
+                hints[entry.content_hash] = entry.strategy
+    STRATEGIES.seed(hints, successes)
+
+
+def _manifest_unchanged(
+    entry: CertIngestManifest | Row | None,
+    file_stat: os.stat_result,
+    index: CertificateMatchIndex,
+    failures: dict[str, CertParseFailure],
+) -> bool:
+    if entry is None:
+        return False
+    if entry.size != file_stat.st_size or entry.mtime_ns != file_stat.st_mtime_ns:
+        return False
+    if entry.cert_id is not None and entry.cert_id not in index:
+        return False
+    # A failure stays skipped only while the negative cache still holds it for
+    # PARSER_VERSION; clearing the cache or bumping the version retries it.
+    if not entry.parse_ok and entry.content_hash not in failures:
+        return False
+    # A successful parse whose certificate row is gone must be re-ingested.
+    return not (entry.parse_ok and entry.cert_id is None)
+
+
+def _record_manifest(
+    db: Session,
+    manifest: dict[str, CertIngestManifest],
+    *,
+    org_id: int,
+    parsed: ParsedCertificate,
+    file_stat: os.stat_result,
+    cert_id: uuid.UUID | None,
+    success: bool,
+) -> None:
+    key = str(parsed.path)
+    entry = manifest.get(key)
+    if entry is None:
+        entry = CertIngestManifest(org_id=org_id, path=key)
+        db.add(entry)
+        manifest[key] = entry
+    entry.size = file_stat.st_size
+    entry.mtime_ns = file_stat.st_mtime_ns
+    entry.content_hash = parsed.content_hash
+    entry.strategy = parsed.strategy
+    entry.cert_id = cert_id
+    entry.parse_ok = success
+    entry.parse_error = parsed.parse_error if not success else None
+    entry.updated_at = datetime.now(timezone.utc)
+
+
+def _prune_manifest(
+    db: Session, manifest: dict[str, Row], *, org_id: int, present: set[str]
+) -> None:
+    stale = [key for key in manifest if key not in present]
+    for batch in _batched(stale, DELETE_CHUNK_SIZE):
+        db.execute(
+            delete(CertIngestManifest).where(
+                CertIngestManifest.org_id == org_id, CertIngestManifest.path.in_(batch)
             )
-            for duplicate in group_sorted[1:]:
-                if duplicate.id in removed_ids:
-                    continue
-                removed_ids.add(duplicate.id)
-                db.delete(duplicate)
-
-    remove_duplicates(by_sha1)
-    remove_duplicates(by_serial)
-    return len(removed_ids)
+        )
+    for key in stale:
+        manifest.pop(key, None)
+
+
+def _prune_missing_certificates(
+    db: Session,
+    *,
+    org_id: int,
+    root_path: Path,
+    present: set[str],
+    recursive: bool = False,
+    include: tuple[str, ...] = (),
+    exclude: tuple[str, ...] = (),
+) -> int:
+    """Delete certificates whose source file is gone.
+
+    Paths the walk covers are checked against the ``present`` snapshot; only
+    paths outside it (other roots, excluded folders) are stat'ed.
+    """
+    present_keys = {path_key(path) for path in present}
+    rows = db.execute(
+        select(Certificate.id, Certificate.source_path).where(
+            Certificate.org_id == org_id, Certificate.source_path.is_not(None)
+        )
+    )
+    missing_ids = [
+        cert_id
+        for cert_id, source_path in rows
+        if source_path
+        and (
+            path_key(source_path) not in present_keys
+            if covers_path(
+                source_path, root_path, recursive=recursive, include=include, exclude=exclude
+            )
+            else not Path(source_path).exists()
+        )
+    ]
+    for chunk in _batched(missing_ids, DELETE_CHUNK_SIZE):
+        db.execute(delete(Certificate).where(Certificate.id.in_(chunk)))
+    return len(missing_ids)
+
+
+def _dedupe_certificates(db: Session, *, org_id: int) -> int:
+    """Keep the most recently ingested certificate per sha1 (or serial when sha1 is unknown).
+
+    Ranking and deletion happen in one statement, so memory does not depend on
+    the org size.
+    """
+    order_by = (
+        Certificate.last_ingested_at.desc().nulls_last(),
+        Certificate.created_at,
+        Certificate.id,
+    )
+    has_sha1 = and_(Certificate.sha1_fingerprint.is_not(None), Certificate.sha1_fingerprint != "")
+    by_sha1 = select(
+        Certificate.id,
+        func.row_number()
+        .over(partition_by=(Certificate.org_id, Certificate.sha1_fingerprint), order_by=order_by)
+        .label("rank"),
+    ).where(Certificate.org_id == org_id, has_sha1)
+    by_serial = select(
+        Certificate.id,
+        func.row_number()
+        .over(partition_by=(Certificate.org_id, Certificate.serial_number), order_by=order_by)
+        .label("rank"),
+    ).where(
+        Certificate.org_id == org_id,
+        not_(has_sha1),
+        Certificate.serial_number.is_not(None),
+        Certificate.serial_number != "",
+    )
+    ranked = union_all(by_sha1, by_serial).subquery("ranked")
+    result = db.execute(
+        delete(Certificate)
+        .where(Certificate.id.in_(select(ranked.c.id).where(ranked.c.rank > 1)))
+        .execution_options(synchronize_session="fetch")
+    )
+    return result.rowcount or 0
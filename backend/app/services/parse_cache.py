@@ -0,0 +1,105 @@
+"""Shared parsed-metadata cache for PFX files, stored in Redis.
+
+Entries are keyed by parser version and the sha256 of the file bytes, so the
+RQ worker, the admin ingest and the agent payload path reuse one PKCS#12
+decryption per distinct file. Values hold certificate metadata and the
+winning decode strategy (``"<decoder>:<password kind>"``) plus an HMAC of the
+winning password keyed by the content hash, so a hit is only served to a
+caller holding that same password; passwords themselves are never written to
+Redis.
+
+Every entry expires after PARSE_CACHE_TTL_SECONDS, and a sorted set of last
+access times caps the cache at PARSE_CACHE_MAX_ENTRIES by evicting the least
+recently used keys. Redis failures are logged and treated as misses.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "certhub:pfx-meta"
+DATETIME_FIELDS = ("not_before", "not_after")
+
+_cache: ParseCache | None = None
+
+
+class ParseCache:
+    def __init__(
+        self,
+        client: redis.Redis,
+        *,
+        ttl_seconds: int,
+        max_entries: int,
+        prefix: str = KEY_PREFIX,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.lru_key = f"{prefix}:lru"
+
+    def key(self, parser_version: str, content_hash: str) -> str:
+        return f"{self.prefix}:{parser_version}:{content_hash}"
+
+    def get(self, parser_version: str, content_hash: str) -> dict[str, Any] | None:
+        key = self.key(parser_version, content_hash)
+        try:
+            raw = self.client.get(key)
+            if raw is None:
+                # Expired by TTL; drop it from the LRU index as well.
+                self.client.zrem(self.lru_key, key)
+                return None
+            self.client.zadd(self.lru_key, {key: time.time()})
+        except redis.RedisError as exc:
+            logger.warning("parse_cache_get_failed key=%s error=%s", key, exc)
+            return None
+        value = json.loads(raw)
+        for field in DATETIME_FIELDS:
+            if value.get(field):
+                value[field] = datetime.fromisoformat(value[field])
+        return value
+
+    def put(self, parser_version: str, content_hash: str, metadata: dict[str, Any]) -> None:
+        key = self.key(parser_version, content_hash)
+        value = {
+            field: item.isoformat() if isinstance(item, datetime) else item
+            for field, item in metadata.items()
+        }
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(key, json.dumps(value), ex=self.ttl_seconds)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [member for member, _ in self.client.zpopmin(self.lru_key, overflow)]
+                if evicted:
+                    self.client.delete(*evicted)
+        except redis.RedisError as exc:
+            logger.warning("parse_cache_put_failed key=%s error=%s", key, exc)
+
+
+def get_parse_cache() -> ParseCache | None:
+    """Process-wide cache, or None when PARSE_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.parse_cache_enabled:
+        return None
+    if _cache is None:
+        from app.workers.queue import get_redis
+
+        _cache = ParseCache(
+            get_redis(),
+            ttl_seconds=settings.parse_cache_ttl_seconds,
+            max_entries=settings.parse_cache_max_entries,
+        )
+    return _cache
@@ -0,0 +1,101 @@
+"""Adaptive ordering of PFX decode strategies.
+
+A strategy is ``"<decoder>:<password kind>"`` (e.g. ``"cryptography:raw"`` or
+``"legacy:empty"``). The learner remembers which strategy opened a given
+content hash and keeps success counts, so the attempt most likely to succeed
+runs first and fewer KDF rounds are wasted on wrong guesses.
+"""
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from typing import NamedTuple
+
+PASSWORD_KIND_RAW = "raw"
+PASSWORD_KIND_STRIPPED = "stripped"
+PASSWORD_KIND_UNQUOTED = "unquoted"
+PASSWORD_KIND_EMPTY = "empty"
+
+DEFAULT_MAX_HINTS = 50_000
+
+
+def password_kind(password: str, guessed: str | None) -> str:
+    if not password:
+        return PASSWORD_KIND_EMPTY
+    if guessed is None or password == guessed:
+        return PASSWORD_KIND_RAW
+    if password == guessed.strip():
+        return PASSWORD_KIND_STRIPPED
+    return PASSWORD_KIND_UNQUOTED
+
+
+class DecodeAttempt(NamedTuple):
+    decoder: str
+    kind: str
+    password: str
+
+    @property
+    def strategy(self) -> str:
+        return f"{self.decoder}:{self.kind}"
+
+
+class StrategyLearner:
+    """Per-process strategy cache keyed by content hash plus global success counts."""
+
+    def __init__(self, max_hints: int = DEFAULT_MAX_HINTS) -> None:
+        self.max_hints = max_hints
+        self._hints: OrderedDict[str, str] = OrderedDict()
+        self.successes: Counter[str] = Counter()
+
+    def hint(self, content_hash: str | None) -> str | None:
+        if content_hash is None:
+            return None
+        strategy = self._hints.get(content_hash)
+        if strategy is not None:
+            self._hints.move_to_end(content_hash)
+        return strategy
+
+    def record(self, content_hash: str | None, strategy: str | None) -> None:
+        if strategy is None:
+            return
+        self.successes[strategy] += 1
+        if content_hash is not None:
+            self._remember(content_hash, strategy)
+
+    def seed(self, hints: Mapping[str, str], successes: Mapping[str, int] | None = None) -> None:
+        """Merge persisted knowledge (e.g. from the ingest manifest)."""
+        for content_hash, strategy in hints.items():
+            self._remember(content_hash, strategy)
+        if successes:
+            # Union keeps the larger count, so re-seeding does not double count.
+            self.successes |= Counter(successes)
+
+    def snapshot(self) -> tuple[dict[str, str], dict[str, int]]:
+        return dict(self._hints), dict(self.successes)
+
+    def order(
+        self,
+        attempts: list[DecodeAttempt],
+        *,
+        tiers: Mapping[str, int],
+        hint: str | None = None,
+    ) -> list[DecodeAttempt]:
+        """Sort attempts: cached hint first, then decoder tier, then past successes."""
+        return [
+            attempt
+            for _, attempt in sorted(
+                enumerate(attempts),
+                key=lambda item: (
+                    item[1].strategy != hint,
+                    tiers.get(item[1].decoder, 0),
+                    -self.successes[item[1].strategy],
+                    item[0],
+                ),
+            )
+        ]
+
+    def _remember(self, content_hash: str, strategy: str) -> None:
+        self._hints[content_hash] = strategy
+        self._hints.move_to_end(content_hash)
+        while len(self._hints) > self.max_hints:
+            self._hints.popitem(last=False)
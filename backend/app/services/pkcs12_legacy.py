@@ -0,0 +1,521 @@
+"""In-process PKCS#12 decoder for bundles the cryptography backend rejects.
+
+Only the certificate bags are decoded; private keys are never decrypted, so
+bundles whose key the backend cannot load (e.g. EC keys with explicit curve
+parameters) still yield their certificate. The decoder understands the PKCS#12 PBE schemes (RC2, 3DES, RC4 with SHA-1),
+PBES2/PBKDF2 and BER indefinite-length encodings emitted by older tools.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from cryptography import x509
+from cryptography.hazmat.decrepit.ciphers.algorithms import ARC4, TripleDES
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+
+class Pkcs12DecodeError(ValueError):
+    """Raised when a PKCS#12 bundle cannot be decoded in-process."""
+
+
+class DecodeDeadlineExceeded(Pkcs12DecodeError):
+    """Raised when decoding runs past the deadline set with ``decode_deadline``."""
+
+
+# time.monotonic() value after which decoding stops; None means no limit.
+_DEADLINE: ContextVar[float | None] = ContextVar("pkcs12_decode_deadline", default=None)
+DEADLINE_CHECK_INTERVAL = 1024
+
+
+@contextmanager
+def decode_deadline(deadline: float | None) -> Iterator[None]:
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining_time() -> float | None:
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DecodeDeadlineExceeded("parse deadline exceeded")
+
+
+def _oid(dotted: str) -> bytes:
+    arcs = [int(arc) for arc in dotted.split(".")]
+    encoded = bytearray([arcs[0] * 40 + arcs[1]])
+    for arc in arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        encoded.extend(reversed(chunk))
+    return bytes(encoded)
+
+
+OID_DATA = _oid("1.2.840.113549.1.7.1")
+OID_ENCRYPTED_DATA = _oid("1.2.840.113549.1.7.6")
+OID_SHROUDED_KEY_BAG = _oid("1.2.840.113549.1.12.10.1.2")
+OID_CERT_BAG = _oid("1.2.840.113549.1.12.10.1.3")
+OID_X509_CERTIFICATE = _oid("1.2.840.113549.1.9.22.1")
+OID_LOCAL_KEY_ID = _oid("1.2.840.113549.1.9.21")
+OID_PBES2 = _oid("1.2.840.113549.1.5.13")
+OID_PBKDF2 = _oid("1.2.840.113549.1.5.12")
+
+# PKCS#12 PBE: OID -> (cipher, key length, iv length, effective RC2 key bits)
+PKCS12_PBE_SCHEMES: dict[bytes, tuple[str, int, int, int]] = {
+    _oid("1.2.840.113549.1.12.1.1"): ("rc4", 16, 0, 0),
+    _oid("1.2.840.113549.1.12.1.2"): ("rc4", 5, 0, 0),
+    _oid("1.2.840.113549.1.12.1.3"): ("3des", 24, 8, 0),
+    _oid("1.2.840.113549.1.12.1.4"): ("3des", 16, 8, 0),
+    _oid("1.2.840.113549.1.12.1.5"): ("rc2", 16, 8, 128),
+    _oid("1.2.840.113549.1.12.1.6"): ("rc2", 5, 8, 40),
+}
+PBES2_CIPHERS: dict[bytes, tuple[str, int]] = {
+    _oid("2.16.840.1.101.3.4.1.2"): ("aes", 16),
+    _oid("2.16.840.1.101.3.4.1.22"): ("aes", 24),
+    _oid("2.16.840.1.101.3.4.1.42"): ("aes", 32),
+    _oid("1.2.840.113549.3.7"): ("3des", 24),
+}
+PBKDF2_PRFS: dict[bytes, str] = {
+    _oid("1.2.840.113549.2.7"): "sha1",
+    _oid("1.2.840.113549.2.8"): "sha224",
+    _oid("1.2.840.113549.2.9"): "sha256",
+    _oid("1.2.840.113549.2.10"): "sha384",
+    _oid("1.2.840.113549.2.11"): "sha512",
+}
+MAC_DIGESTS: dict[bytes, str] = {
+    _oid("1.3.14.3.2.26"): "sha1",
+    _oid("2.16.840.1.101.3.4.2.4"): "sha224",
+    _oid("2.16.840.1.101.3.4.2.1"): "sha256",
+    _oid("2.16.840.1.101.3.4.2.2"): "sha384",
+    _oid("2.16.840.1.101.3.4.2.3"): "sha512",
+}
+
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_CONTEXT_0 = 0xA0
+KDF_ID_KEY = 1
+KDF_ID_IV = 2
+KDF_ID_MAC = 3
+
+
+@dataclass
+class _Node:
+    tag: int
+    content: bytes = b""
+    children: list[_Node] = field(default_factory=list)
+
+    def child(self, index: int) -> _Node:
+        try:
+            return self.children[index]
+        except IndexError as exc:
+            raise Pkcs12DecodeError("truncated ASN.1 structure") from exc
+
+
+def _parse_node(data: bytes, pos: int) -> tuple[_Node, int]:
+    if pos + 2 > len(data):
+        raise Pkcs12DecodeError("truncated ASN.1 header")
+    tag = data[pos]
+    if tag & 0x1F == 0x1F:
+        raise Pkcs12DecodeError("high-tag-number form is not supported")
+    constructed = bool(tag & 0x20)
+    length_byte = data[pos + 1]
+    pos += 2
+    if length_byte == 0x80:
+        if not constructed:
+            raise Pkcs12DecodeError("indefinite length on primitive value")
+        node = _Node(tag)
+        while data[pos : pos + 2] != b"\x00\x00":
+            child, pos = _parse_node(data, pos)
+            node.children.append(child)
+        return node, pos + 2
+    if length_byte & 0x80:
+        size = length_byte & 0x7F
+        if size == 0 or size > 4 or pos + size > len(data):
+            raise Pkcs12DecodeError("invalid ASN.1 length")
+        length = int.from_bytes(data[pos : pos + size], "big")
+        pos += size
+    else:
+        length = length_byte
+    end = pos + length
+    if end > len(data):
+        raise Pkcs12DecodeError("ASN.1 value exceeds buffer")
+    if not constructed:
+        return _Node(tag, data[pos:end]), end
+    node = _Node(tag)
+    while pos < end:
+        child, pos = _parse_node(data, pos)
+        node.children.append(child)
+    if pos != end:
+        raise Pkcs12DecodeError("ASN.1 children overrun their parent")
+    return node, end
+
+
+def _parse(data: bytes) -> _Node:
+    node, _end = _parse_node(data, 0)
+    return node
+
+
+def _octets(node: _Node) -> bytes:
+    if not node.children:
+        return node.content
+    return b"".join(_octets(child) for child in node.children)
+
+
+def _integer(node: _Node) -> int:
+    if node.tag != TAG_INTEGER:
+        raise Pkcs12DecodeError("expected INTEGER")
+    return int.from_bytes(node.content, "big", signed=True)
+
+
+def _explicit(node: _Node) -> _Node:
+    if node.tag != TAG_CONTEXT_0:
+        raise Pkcs12DecodeError("expected [0] EXPLICIT")
+    return node.child(0)
+
+
+def _pkcs12_kdf(
+    digest_name: str, password: bytes, salt: bytes, iterations: int, key_id: int, size: int
+) -> bytes:
+    """RFC 7292 appendix B.2 key derivation."""
+    block = hashlib.new(digest_name).block_size
+    diversifier = bytes([key_id]) * block
+
+    def fill(value: bytes) -> bytes:
+        if not value:
+            return b""
+        count = block * ((len(value) + block - 1) // block)
+        return (value * (count // len(value) + 1))[:count]
+
+    buffer = bytearray(fill(salt) + fill(password))
+    derived = b""
+    while True:
+        digest = hashlib.new(digest_name, diversifier + bytes(buffer)).digest()
+        for round_index in range(iterations - 1):
+            if not round_index % DEADLINE_CHECK_INTERVAL:
+                check_deadline()
+            digest = hashlib.new(digest_name, digest).digest()
+        derived += digest
+        if len(derived) >= size:
+            return derived[:size]
+        increment = int.from_bytes((digest * (block // len(digest) + 1))[:block], "big") + 1
+        for offset in range(0, len(buffer), block):
+            value = int.from_bytes(buffer[offset : offset + block], "big") + increment
+            buffer[offset : offset + block] = (value % (1 << (block * 8))).to_bytes(block, "big")
+
+
+RC2_PITABLE = bytes.fromhex(
+    "d978f9c419ddb5ed28e9fd794aa0d89dc67e37832b76538e624c6488448bfba2"
+    "179a59f587b34f1361456d8d09817d32bd8f40eb86b77b0bf09521225c6b4e82"
+    "54d66593ce60b21c7356c014a78cf1dc1275ca1f3bbee4d1423dd430a33cb626"
+    "6fbf0eda4669075727f21d9bbc944303f811c7f690ef3ee706c3d52fc8661ed7"
+    "08e8eade8052eef784aa72ac354d6a2a961ad2715a1549744b9fd05e0418a4ec"
+    "c2e0416e0f51cbcc2491af50a1f47039997c3a8523b8b47afc02365b25559731"
+    "2d5dfa98e38a92ae05df2910676cbac9d300e6cfe19ea82c6316013f58e289a9"
+    "0d38341bab33ffb0bb480c5fb9b1cd2ec5f3db47e5a59c770aa62068fe7fc1ad"
+)
+
+
+class RC2:
+    """RC2 block cipher (RFC 2268) with an explicit effective key length."""
+
+    block_size = 8
+
+    def __init__(self, key: bytes, effective_bits: int) -> None:
+        expanded = bytearray(128)
+        expanded[: len(key)] = key
+        for i in range(len(key), 128):
+            expanded[i] = RC2_PITABLE[(expanded[i - 1] + expanded[i - len(key)]) & 0xFF]
+        t8 = (effective_bits + 7) // 8
+        mask = 0xFF >> (8 * t8 - effective_bits)
+        expanded[128 - t8] = RC2_PITABLE[expanded[128 - t8] & mask]
+        for i in range(127 - t8, -1, -1):
+            expanded[i] = RC2_PITABLE[expanded[i + 1] ^ expanded[i + t8]]
+        self._keys = [expanded[2 * i] | (expanded[2 * i + 1] << 8) for i in range(64)]
+
+    def encrypt_block(self, block: bytes) -> bytes:
+        r = [block[2 * i] | (block[2 * i + 1] << 8) for i in range(4)]
+        keys = self._keys
+        j = 0
+        for round_index in range(16):
+            for i, shift in enumerate((1, 2, 3, 5)):
+                value = (
+                    r[i] + keys[j] + (r[i - 1] & r[i - 2]) + (~r[i - 1] & r[i - 3])
+                ) & 0xFFFF
+                r[i] = ((value << shift) | (value >> (16 - shift))) & 0xFFFF
+                j += 1
+            if round_index in (4, 10):
+                for i in range(4):
+                    r[i] = (r[i] + keys[r[i - 1] & 63]) & 0xFFFF
+        return b"".join(value.to_bytes(2, "little") for value in r)
+
+    def decrypt_block(self, block: bytes) -> bytes:
+        r = [block[2 * i] | (block[2 * i + 1] << 8) for i in range(4)]
+        keys = self._keys
+        j = 63
+        for round_index in range(15, -1, -1):
+            for i, shift in ((3, 5), (2, 3), (1, 2), (0, 1)):
+                value = ((r[i] >> shift) | (r[i] << (16 - shift))) & 0xFFFF
+                r[i] = (
+                    value - keys[j] - (r[i - 1] & r[i - 2]) - (~r[i - 1] & r[i - 3])
+                ) & 0xFFFF
+                j -= 1
+            if round_index in (5, 11):
+                for i in range(3, -1, -1):
+                    r[i] = (r[i] - keys[r[i - 1] & 63]) & 0xFFFF
+        return b"".join(value.to_bytes(2, "little") for value in r)
+
+    def decrypt_cbc(self, iv: bytes, data: bytes) -> bytes:
+        if len(data) % self.block_size:
+            raise Pkcs12DecodeError("RC2 ciphertext is not block aligned")
+        plain = bytearray()
+        previous = iv
+        for offset in range(0, len(data), self.block_size):
+            if not offset % (DEADLINE_CHECK_INTERVAL * self.block_size):
+                check_deadline()
+            block = data[offset : offset + self.block_size]
+            decrypted = self.decrypt_block(block)
+            plain.extend(a ^ b for a, b in zip(decrypted, previous))
+            previous = block
+        return bytes(plain)
+
+    def encrypt_cbc(self, iv: bytes, data: bytes) -> bytes:
+        cipher = bytearray()
+        previous = iv
+        for offset in range(0, len(data), self.block_size):
+            block = bytes(a ^ b for a, b in zip(data[offset : offset + self.block_size], previous))
+            previous = self.encrypt_block(block)
+            cipher.extend(previous)
+        return bytes(cipher)
+
+
+def _unpad(data: bytes, block_size: int) -> bytes:
+    if not data or len(data) % block_size:
+        raise Pkcs12DecodeError("invalid padding")
+    pad = data[-1]
+    if pad < 1 or pad > block_size or data[-pad:] != bytes([pad]) * pad:
+        raise Pkcs12DecodeError("invalid padding")
+    return data[:-pad]
+
+
+def _cbc_decrypt(algorithm, iv: bytes, data: bytes) -> bytes:
+    if len(data) % (algorithm.block_size // 8):
+        raise Pkcs12DecodeError("ciphertext is not block aligned")
+    decryptor = Cipher(algorithm, modes.CBC(iv)).decryptor()
+    return decryptor.update(data) + decryptor.finalize()
+
+
+def _bmp_password(password: str) -> list[bytes]:
+    if password:
+        return [password.encode("utf-16-be") + b"\x00\x00"]
+    # OpenSSL encodes an empty password as two NUL bytes and "no password" as
+    # an empty string; files in the wild use both.
+    return [b"\x00\x00", b""]
+
+
+def _decrypt_pkcs12_pbe(
+    scheme: tuple[str, int, int, int], params: _Node, password: bytes, data: bytes
+) -> bytes:
+    cipher_name, key_length, iv_length, effective_bits = scheme
+    salt = _octets(params.child(0))
+    iterations = _integer(params.child(1)) if len(params.children) > 1 else 1
+    key = _pkcs12_kdf("sha1", password, salt, iterations, KDF_ID_KEY, key_length)
+    if cipher_name == "rc4":
+        decryptor = Cipher(ARC4(key), mode=None).decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+    iv = _pkcs12_kdf("sha1", password, salt, iterations, KDF_ID_IV, iv_length)
+    if cipher_name == "rc2":
+        return _unpad(RC2(key, effective_bits).decrypt_cbc(iv, data), RC2.block_size)
+    return _unpad(_cbc_decrypt(TripleDES(key), iv, data), 8)
+
+
+def _decrypt_pbes2(params: _Node, password: str, data: bytes) -> bytes:
+    kdf, scheme = params.child(0), params.child(1)
+    if kdf.child(0).content != OID_PBKDF2:
+        raise Pkcs12DecodeError("unsupported PBES2 key derivation function")
+    kdf_params = kdf.child(1)
+    salt = _octets(kdf_params.child(0))
+    iterations = _integer(kdf_params.child(1))
+    prf = "sha1"
+    for extra in kdf_params.children[2:]:
+        if extra.tag == TAG_SEQUENCE:
+            prf = PBKDF2_PRFS.get(extra.child(0).content, "")
+            if not prf:
+                raise Pkcs12DecodeError("unsupported PBKDF2 PRF")
+    cipher = PBES2_CIPHERS.get(scheme.child(0).content)
+    if cipher is None:
+        raise Pkcs12DecodeError("unsupported PBES2 encryption scheme")
+    cipher_name, key_length = cipher
+    iv = _octets(scheme.child(1))
+    key = hashlib.pbkdf2_hmac(prf, password.encode("utf-8"), salt, iterations, key_length)
+    if cipher_name == "aes":
+        return _unpad(_cbc_decrypt(algorithms.AES(key), iv, data), 16)
+    return _unpad(_cbc_decrypt(TripleDES(key), iv, data), 8)
+
+
+def _decrypt(algorithm: _Node, password: str, bmp_password: bytes, data: bytes) -> bytes:
+    oid = algorithm.child(0).content
+    if oid in PKCS12_PBE_SCHEMES:
+        return _decrypt_pkcs12_pbe(PKCS12_PBE_SCHEMES[oid], algorithm.child(1), bmp_password, data)
+    if oid == OID_PBES2:
+        return _decrypt_pbes2(algorithm.child(1), password, data)
+    raise Pkcs12DecodeError("unsupported encryption algorithm")
+
+
+def _verify_mac(mac_data: _Node, bmp_password: bytes, auth_safe: bytes) -> bool:
+    digest_info = mac_data.child(0)
+    digest_name = MAC_DIGESTS.get(digest_info.child(0).child(0).content)
+    if digest_name is None:
+        raise Pkcs12DecodeError("unsupported MAC digest")
+    expected = _octets(digest_info.child(1))
+    salt = _octets(mac_data.child(1))
+    iterations = _integer(mac_data.child(2)) if len(mac_data.children) > 2 else 1
+    size = hashlib.new(digest_name).digest_size
+    key = _pkcs12_kdf(digest_name, bmp_password, salt, iterations, KDF_ID_MAC, size)
+    return hmac.compare_digest(hmac.new(key, auth_safe, digest_name).digest(), expected)
+
+
+def _content_info(node: _Node) -> tuple[bytes, _Node | None]:
+    content_type = node.child(0)
+    if content_type.tag != TAG_OID:
+        raise Pkcs12DecodeError("expected ContentInfo")
+    return content_type.content, node.children[1] if len(node.children) > 1 else None
+
+
+def _certificate_bags(safe_contents: bytes) -> list[tuple[bool, bytes]]:
+    bags: list[tuple[bool, bytes]] = []
+    for bag in _parse(safe_contents).children:
+        if bag.child(0).content != OID_CERT_BAG:
+            continue
+        cert_bag = _explicit(bag.child(1))
+        if cert_bag.child(0).content != OID_X509_CERTIFICATE:
+            continue
+        der = _octets(_explicit(cert_bag.child(1)))
+        attributes = bag.children[2].children if len(bag.children) > 2 else []
+        has_key_id = any(attribute.child(0).content == OID_LOCAL_KEY_ID for attribute in attributes)
+        bags.append((has_key_id, der))
+    return bags
+
+
+def _decode_with(
+    auth_safe: bytes, password: str, bmp_password: bytes
+) -> list[tuple[bool, bytes]]:
+    bags: list[tuple[bool, bytes]] = []
+    for info in _parse(auth_safe).children:
+        content_type, content = _content_info(info)
+        if content is None:
+            continue
+        if content_type == OID_DATA:
+            bags.extend(_certificate_bags(_octets(_explicit(content))))
+        elif content_type == OID_ENCRYPTED_DATA:
+            encrypted_content_info = _explicit(content).child(1)
+            if len(encrypted_content_info.children) < 3:
+                continue
+            plain = _decrypt(
+                encrypted_content_info.child(1),
+                password,
+                bmp_password,
+                _octets(encrypted_content_info.child(2)),
+            )
+            bags.extend(_certificate_bags(plain))
+    return bags
+
+
+def _algorithm_iterations(algorithm: _Node) -> int:
+    params = algorithm.child(1)
+    if algorithm.child(0).content == OID_PBES2:
+        params = params.child(0).child(1)
+    # PKCS#12 PBE, PBES1 and PBKDF2 parameters all start with (salt, iterations).
+    if len(params.children) > 1 and params.child(1).tag == TAG_INTEGER:
+        return _integer(params.child(1))
+    return 1
+
+
+def kdf_iterations(data: bytes) -> int:
+    """Largest key-derivation iteration count a backend must run to open ``data``.
+
+    Covers the MAC, encrypted content infos and shrouded key bags that are
+    readable without the password; bags nested inside encrypted content cannot
+    be seen. Returns 0 when ``data`` is not a PKCS#12 bundle this module parses.
+    """
+    counts = [0]
+    try:
+        pfx = _parse(data)
+        content_type, content = _content_info(pfx.child(1))
+        if len(pfx.children) > 2 and len(pfx.child(2).children) > 2:
+            counts.append(_integer(pfx.child(2).child(2)))
+        if content_type != OID_DATA or content is None:
+            return max(counts)
+        for info in _parse(_octets(_explicit(content))).children:
+            content_type, content = _content_info(info)
+            if content is None:
+                continue
+            if content_type == OID_ENCRYPTED_DATA:
+                counts.append(_algorithm_iterations(_explicit(content).child(1).child(1)))
+            elif content_type == OID_DATA:
+                for bag in _parse(_octets(_explicit(content))).children:
+                    if bag.child(0).content == OID_SHROUDED_KEY_BAG:
+                        counts.append(_algorithm_iterations(_explicit(bag.child(1)).child(0)))
+    except (Pkcs12DecodeError, ValueError, IndexError):
+        pass
+    return max(counts)
+
+
+def load_pkcs12_certificate(data: bytes, password: str) -> x509.Certificate:
+    """Return the end-entity certificate of a PKCS#12 bundle.
+
+    The certificate carrying a ``localKeyId`` attribute is preferred, matching
+    ``openssl pkcs12 -clcerts``; otherwise the first certificate is returned.
+    """
+    try:
+        pfx = _parse(data)
+        if pfx.tag != TAG_SEQUENCE or _integer(pfx.child(0)) != 3:
+            raise Pkcs12DecodeError("not a PKCS#12 v3 bundle")
+        content_type, content = _content_info(pfx.child(1))
+        if content_type != OID_DATA or content is None:
+            raise Pkcs12DecodeError("public-key integrity mode is not supported")
+        auth_safe = _octets(_explicit(content))
+        mac_data = pfx.children[2] if len(pfx.children) > 2 else None
+
+        bmp_candidates = _bmp_password(password)
+        if mac_data is not None:
+            bmp_candidates = [
+                candidate
+                for candidate in bmp_candidates
+                if _verify_mac(mac_data, candidate, auth_safe)
+            ]
+            if not bmp_candidates:
+                raise Pkcs12DecodeError("mac verify failure")
+
+        last_error: Pkcs12DecodeError | None = None
+        for bmp_password in bmp_candidates:
+            try:
+                bags = _decode_with(auth_safe, password, bmp_password)
+            except Pkcs12DecodeError as exc:
+                last_error = exc
+                continue
+            if not bags:
+                raise Pkcs12DecodeError("certificate not found in PKCS12 bundle")
+            bags.sort(key=lambda bag: not bag[0])
+            return x509.load_der_x509_certificate(bags[0][1])
+        raise last_error or Pkcs12DecodeError("unable to decrypt PKCS12 bundle")
+    except Pkcs12DecodeError:
+        raise
+    except (ValueError, IndexError) as exc:
+        raise Pkcs12DecodeError(str(exc) or "malformed PKCS12 bundle") from exc
@@ -1,24 +1,44 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
 import os
+import threading
 import time
 from collections import deque
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
+from rq import Queue
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from watchdog.events import FileSystemEventHandler, FileSystemEvent, FileMovedEvent
 from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
 
 from app.core.config import settings
-from app.workers.jobs_certificates import delete_certificate_by_path, ingest_pfx_file
-from app.workers.queue import enqueue_unique, get_queue, get_redis, normalize_path
+from app.db.session import SessionLocal
+from app.models import CertIngestManifest, Certificate
+from app.services.certificate_fs import (
+    covers_path,
+    is_under,
+    iter_certificate_files,
+    parse_globs,
+    path_key,
+)
+from app.watchers.scandir_polling import ScandirPollingObserver
+from app.workers.jobs_certificates import (
+    delete_certificate_by_path,
+    ingest_pfx_file,
+    process_pfx_events,
+    reconcile_pfx_directories,
+)
+from app.workers.queue import enqueue_unique_atomic, get_queue, get_redis, normalize_path
 
 logger = logging.getLogger(__name__)
 
-PFX_EXTENSION = ".pfx"
-
 
 @dataclass
 class WatcherConfig:
@@ -26,14 +46,254 @@ class WatcherConfig:
     root_path: Path
     debounce_seconds: float
     max_events_per_minute: int
+    recursive: bool = False
+    include: tuple[str, ...] = field(default_factory=tuple)
+    exclude: tuple[str, ...] = field(default_factory=tuple)
+    # 0 keeps one RQ job per event; otherwise events are coalesced per window.
+    batch_window_seconds: float = 0.0
+    batch_max_paths: int = 500
+    stability_max_wait_seconds: float = 300.0
+    max_pending_paths: int = 10_000
+    deferred_max_paths: int = 5_000
+    # 0 disables the periodic snapshot/DB reconciliation.
+    reconcile_interval_seconds: float = 300.0
+    # "native" (inotify/ReadDirectoryChangesW) or "polling" for SMB/CIFS shares.
+    observer_mode: str = "native"
+    poll_min_seconds: float = 2.0
+    poll_max_seconds: float = 60.0
+
+
+class EventBatcher:
+    """Coalesce watcher events into batches, one action per path.
+
+    The first event opens a window of ``window_seconds``; when it closes (or
+    ``max_paths`` distinct paths are pending) the batch is handed to
+    ``on_flush`` as ``(action, path)`` pairs. A later event for a pending path
+    replaces the earlier one, so the last action wins.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        max_paths: int,
+        on_flush: Callable[[list[tuple[str, str]]], None],
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.max_paths = max_paths
+        self.on_flush = on_flush
+        self._pending: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def add(self, action: str, path: str) -> None:
+        batch = None
+        with self._lock:
+            self._pending.pop(path, None)
+            self._pending[path] = action
+            if self.max_paths > 0 and len(self._pending) >= self.max_paths:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self.on_flush(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self.on_flush(batch)
+
+    def _take(self) -> list[tuple[str, str]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [(action, path) for path, action in self._pending.items()]
+        self._pending = {}
+        return batch
+
+
+@dataclass
+class _PendingPath:
+    action: str
+    first_seen: float
+    last_change: float
+    signature: tuple[int, int] | None
+
+
+def _file_signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class TrailingDebouncer:
+    """Release each path's last event once the path has settled.
+
+    A path is held until ``quiet_seconds`` pass without a new event and, for
+    ingests, without its (size, mtime) changing between two checks, so a file
+    still being copied is not parsed half-written. State is bounded: a path
+    pending for ``max_wait_seconds`` is released anyway, and past
+    ``max_pending`` paths the oldest one is released early.
+    """
+
+    def __init__(
+        self,
+        quiet_seconds: float,
+        on_ready: Callable[[str, str], None],
+        *,
+        max_wait_seconds: float = 300.0,
+        max_pending: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.quiet_seconds = quiet_seconds
+        self.on_ready = on_ready
+        self.max_wait_seconds = max_wait_seconds
+        self.max_pending = max_pending
+        self.clock = clock
+        self._pending: dict[str, _PendingPath] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, action: str, path: str) -> None:
+        now = self.clock()
+        signature = _file_signature(path) if action == "ingest" else None
+        overflow: list[tuple[str, str]] = []
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                self._pending[path] = _PendingPath(action, now, now, signature)
+                while len(self._pending) > self.max_pending:
+                    oldest = next(iter(self._pending))
+                    overflow.append((self._pending.pop(oldest).action, oldest))
+            else:
+                entry.action = action
+                entry.last_change = now
+                entry.signature = signature
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pfx-debouncer", daemon=True
+                )
+                self._thread.start()
+        for ready_action, ready_path in overflow:
+            logger.warning("watcher_pending_overflow path=%s", ready_path)
+            self.on_ready(ready_action, ready_path)
+
+    def poll(self) -> None:
+        now = self.clock()
+        with self._lock:
+            due = [
+                (path, entry.action, entry.last_change)
+                for path, entry in self._pending.items()
+                if now - entry.last_change >= self.quiet_seconds
+            ]
+        ready: list[tuple[str, str]] = []
+        for path, action, seen_change in due:
+            signature = _file_signature(path) if action == "ingest" else None
+            with self._lock:
+                entry = self._pending.get(path)
+                if entry is None or entry.last_change != seen_change:
+                    continue
+                if action == "ingest" and signature is None:
+                    # Gone before it settled; the delete/move event covers it.
+                    del self._pending[path]
+                    continue
+                timed_out = now - entry.first_seen >= self.max_wait_seconds
+                if signature == entry.signature or timed_out:
+                    del self._pending[path]
+                    ready.append((action, path))
+                    if timed_out and signature != entry.signature:
+                        logger.warning("watcher_unsettled_release path=%s", path)
+                else:
+                    entry.signature = signature
+                    entry.last_change = now
+        for action, path in ready:
+            self.on_ready(action, path)
+
+    def flush(self) -> None:
+        with self._lock:
+            ready = [(entry.action, path) for path, entry in self._pending.items()]
+            self._pending.clear()
+        for action, path in ready:
+            self.on_ready(action, path)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        interval = min(1.0, max(0.05, self.quiet_seconds / 2))
+        while not self._stopped.wait(interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("watcher_debouncer_poll_failed")
+
+
+class DeferredQueue:
+    """Bounded FIFO of events held back by the rate limit, one per path.
+
+    A new event for a queued path replaces its action in place. ``add``
+    returns False when the queue is full and the path is not already queued.
+    """
+
+    def __init__(self, max_paths: int) -> None:
+        self.max_paths = max_paths
+        self._pending: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, action: str, path: str) -> bool:
+        with self._lock:
+            if path not in self._pending and len(self._pending) >= self.max_paths:
+                return False
+            self._pending[path] = action
+            return True
+
+    def pop(self) -> tuple[str, str] | None:
+        with self._lock:
+            if not self._pending:
+                return None
+            path = next(iter(self._pending))
+            return self._pending.pop(path), path
 
 
 class PfxDirectoryHandler(FileSystemEventHandler):
-    def __init__(self, config: WatcherConfig):
+    def __init__(self, config: WatcherConfig, queue: Queue | None = None):
         self.config = config
-        self.queue = get_queue(get_redis())
-        self._last_event_at: dict[str, float] = {}
+        # Handlers in one process share the queue and so its Redis connection pool.
+        self.queue = queue if queue is not None else get_queue(get_redis())
         self._event_times: deque[float] = deque()
+        # Taken by the observer thread (_admit) and the drainer thread (drain).
+        self._rate_lock = threading.Lock()
+        self._deferred = DeferredQueue(config.deferred_max_paths)
+        self._reconcile_dirs: set[str] = set()
+        self._drain_lock = threading.Lock()
+        self._drain_stopped = threading.Event()
+        self._drainer: threading.Thread | None = None
+        self._batcher = (
+            EventBatcher(config.batch_window_seconds, config.batch_max_paths, self._enqueue_batch)
+            if config.batch_window_seconds > 0
+            else None
+        )
+        self._debouncer = (
+            TrailingDebouncer(
+                config.debounce_seconds,
+                self._dispatch,
+                max_wait_seconds=config.stability_max_wait_seconds,
+                max_pending=config.max_pending_paths,
+            )
+            if config.debounce_seconds > 0
+            else None
+        )
 
     def on_created(self, event: FileSystemEvent) -> None:
         self._handle_file_event("created", event)
@@ -49,16 +309,14 @@ class PfxDirectoryHandler(FileSystemEventHandler):
             return
         src_path = normalize_path(event.src_path)
         dest_path = normalize_path(event.dest_path)
-        src_in_root = self._is_in_root(src_path)
-        dest_in_root = self._is_in_root(dest_path)
-        src_is_pfx = src_path.lower().endswith(PFX_EXTENSION)
-        dest_is_pfx = dest_path.lower().endswith(PFX_EXTENSION)
+        src_watched = self._is_watched(src_path)
+        dest_watched = self._is_watched(dest_path)
 
-        if src_in_root and src_is_pfx and (not dest_in_root or not dest_is_pfx):
+        if src_watched and not dest_watched:
             self._enqueue_delete(src_path, "moved")
-        elif dest_in_root and dest_is_pfx and (not src_in_root or not src_is_pfx):
+        elif dest_watched and not src_watched:
             self._enqueue_ingest(dest_path, "moved")
-        elif src_in_root and dest_in_root and src_is_pfx and dest_is_pfx:
+        elif src_watched and dest_watched:
             self._enqueue_delete(src_path, "moved")
             self._enqueue_ingest(dest_path, "moved")
 
@@ -66,87 +324,171 @@ class PfxDirectoryHandler(FileSystemEventHandler):
         if event.is_directory:
             return
         raw_path = normalize_path(event.src_path)
-        if not self._is_in_root(raw_path):
-            return
-        if not raw_path.lower().endswith(PFX_EXTENSION):
+        if not self._is_watched(raw_path):
             return
         if event_name == "deleted":
             self._enqueue_delete(raw_path, event_name)
         else:
             self._enqueue_ingest(raw_path, event_name)
 
-    def _is_in_root(self, raw_path: str) -> bool:
-        path = Path(raw_path)
-        return path.parent == self.config.root_path
+    def _is_watched(self, raw_path: str) -> bool:
+        # Same rules as the ingest walk, excluded directories included.
+        return covers_path(
+            raw_path,
+            self.config.root_path,
+            recursive=self.config.recursive,
+            include=self.config.include,
+            exclude=self.config.exclude,
+        )
 
     def _rate_limited(self) -> bool:
         if self.config.max_events_per_minute <= 0:
             return False
-        now = time.monotonic()
-        window_start = now - 60.0
-        while self._event_times and self._event_times[0] < window_start:
-            self._event_times.popleft()
-        if len(self._event_times) >= self.config.max_events_per_minute:
-            return True
-        self._event_times.append(now)
-        return False
-
-    def _debounced(self, path: str) -> bool:
-        if self.config.debounce_seconds <= 0:
+        with self._rate_lock:
+            now = time.monotonic()
+            window_start = now - 60.0
+            while self._event_times and self._event_times[0] < window_start:
+                self._event_times.popleft()
+            if len(self._event_times) >= self.config.max_events_per_minute:
+                return True
+            self._event_times.append(now)
             return False
-        now = time.monotonic()
-        last = self._last_event_at.get(path)
-        if last is not None and (now - last) < self.config.debounce_seconds:
-            return True
-        self._last_event_at[path] = now
-        return False
 
     def _enqueue_ingest(self, path: str, event_name: str) -> None:
-        if self._rate_limited():
-            logger.warning("watcher_rate_limited event=%s path=%s", event_name, path)
+        self._admit("ingest", path, event_name)
+
+    def _enqueue_delete(self, path: str, event_name: str) -> None:
+        self._admit("delete", path, event_name)
+
+    def _admit(self, action: str, path: str, event_name: str) -> None:
+        # Once anything is deferred, later events queue behind it to keep order.
+        if not len(self._deferred) and not self._rate_limited():
+            self._settle(action, path)
             return
-        if self._debounced(path):
-            logger.info("watcher_debounced event=%s path=%s", event_name, path)
+        if self._deferred.add(action, path):
+            logger.info(
+                "watcher_deferred event=%s path=%s backlog=%s",
+                event_name,
+                path,
+                len(self._deferred),
+            )
+            self._start_drainer()
             return
-        job_id = self._build_job_id("ing", path)
-        _, deduped = enqueue_unique(
+        # Too far behind to track single paths: repair the folder in one scan.
+        logger.warning("watcher_deferred_overflow event=%s path=%s", event_name, path)
+        with self._drain_lock:
+            self._reconcile_dirs.add(os.path.dirname(path))
+        self._start_drainer()
+
+    def _start_drainer(self) -> None:
+        with self._drain_lock:
+            if self._drainer is not None:
+                return
+            self._drainer = threading.Thread(
+                target=self._run_drainer, name="pfx-deferred", daemon=True
+            )
+            self._drainer.start()
+
+    def _run_drainer(self) -> None:
+        rate = self.config.max_events_per_minute
+        interval = min(1.0, max(0.05, 60.0 / rate)) if rate > 0 else 0.05
+        while not self._drain_stopped.wait(interval):
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("watcher_drain_failed")
+
+    def drain(self, *, force: bool = False) -> None:
+        """Release deferred events as the rate limit allows (all of them if ``force``)."""
+        while len(self._deferred) and (force or not self._rate_limited()):
+            item = self._deferred.pop()
+            if item is None:
+                break
+            self._settle(*item)
+        if len(self._deferred):
+            return
+        with self._drain_lock:
+            directories = sorted(self._reconcile_dirs)
+            self._reconcile_dirs.clear()
+        if directories:
+            self._enqueue_reconcile(directories)
+
+    def _enqueue_reconcile(self, directories: list[str]) -> None:
+        digest = hashlib.sha1(json.dumps(directories).encode("utf-8")).hexdigest()
+        job_id = f"cert_reconcile__{self.config.org_id}__{digest}"
+        _, deduped = enqueue_unique_atomic(
             self.queue,
-            ingest_pfx_file,
+            reconcile_pfx_directories,
             self.config.org_id,
-            path,
+            str(self.config.root_path),
+            directories,
+            {
+                "recursive": self.config.recursive,
+                "include": list(self.config.include),
+                "exclude": list(self.config.exclude),
+            },
             job_id=job_id,
         )
         logger.info(
-            "watcher_enqueue event=%s action=ingest path=%s job_id=%s result=%s",
-            event_name,
-            path,
+            "watcher_enqueue action=reconcile directories=%s job_id=%s result=%s",
+            len(directories),
             job_id,
             "existing" if deduped else "new",
         )
 
-    def _enqueue_delete(self, path: str, event_name: str) -> None:
-        if self._rate_limited():
-            logger.warning("watcher_rate_limited event=%s path=%s", event_name, path)
-            return
-        if self._debounced(path):
-            logger.info("watcher_debounced event=%s path=%s", event_name, path)
+    def _settle(self, action: str, path: str) -> None:
+        if self._debouncer is not None:
+            self._debouncer.add(action, path)
+        else:
+            self._dispatch(action, path)
+
+    def _dispatch(self, action: str, path: str) -> None:
+        if self._batcher is not None:
+            self._batcher.add(action, path)
             return
-        job_id = self._build_job_id("del", path)
-        _, deduped = enqueue_unique(
+        func = ingest_pfx_file if action == "ingest" else delete_certificate_by_path
+        job_id = self._build_job_id("ing" if action == "ingest" else "del", path)
+        _, deduped = enqueue_unique_atomic(
             self.queue,
-            delete_certificate_by_path,
+            func,
             self.config.org_id,
             path,
             job_id=job_id,
         )
         logger.info(
-            "watcher_enqueue event=%s action=delete path=%s job_id=%s result=%s",
-            event_name,
+            "watcher_enqueue action=%s path=%s job_id=%s result=%s",
+            action,
             path,
             job_id,
             "existing" if deduped else "new",
         )
 
+    def _enqueue_batch(self, events: list[tuple[str, str]]) -> None:
+        digest = hashlib.sha1(json.dumps(events).encode("utf-8")).hexdigest()
+        job_id = f"cert_batch__{self.config.org_id}__{digest}"
+        _, deduped = enqueue_unique_atomic(
+            self.queue,
+            process_pfx_events,
+            self.config.org_id,
+            events,
+            job_id=job_id,
+        )
+        logger.info(
+            "watcher_enqueue action=batch events=%s job_id=%s result=%s",
+            len(events),
+            job_id,
+            "existing" if deduped else "new",
+        )
+
+    def flush(self) -> None:
+        self._drain_stopped.set()
+        self.drain(force=True)
+        if self._debouncer is not None:
+            self._debouncer.stop()
+            self._debouncer.flush()
+        if self._batcher is not None:
+            self._batcher.flush()
+
     def _build_job_id(self, action: str, path: str) -> str:
         path_key = normalize_path(path).lower()
         digest = hashlib.sha1(path_key.encode("utf-8")).hexdigest()
@@ -154,47 +496,290 @@ class PfxDirectoryHandler(FileSystemEventHandler):
         return f"{action_prefix}__{self.config.org_id}__{digest}"
 
 
+class DirectoryReconciler:
+    """Periodically diff the watched tree against its last snapshot and the DB.
+
+    Each pass lists the tree (names, sizes and mtimes only) and loads the
+    org's known paths: certificate ``source_path`` values plus the ingest
+    manifest, whose sizes/mtimes seed the first pass. Files that are unknown
+    to the DB or changed since the previous pass go through the handler as
+    ingests; certificates whose source file the walk covers but did not find
+    go through as deletes. A quiet tree costs one listing and two queries.
+    """
+
+    def __init__(
+        self,
+        handler: PfxDirectoryHandler,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.handler = handler
+        self.config = handler.config
+        self.session_factory = session_factory
+        self._previous: dict[str, tuple[int, int]] | None = None
+
+    def snapshot(
+        self, unreadable: list[Path] | None = None
+    ) -> dict[str, tuple[str, tuple[int, int]]]:
+        return {
+            path_key(path): (str(path), (file_stat.st_size, file_stat.st_mtime_ns))
+            for path, file_stat in iter_certificate_files(
+                self.config.root_path,
+                recursive=self.config.recursive,
+                include=self.config.include,
+                exclude=self.config.exclude,
+                unreadable=unreadable,
+            )
+        }
+
+    def run_once(self) -> dict[str, int]:
+        unreadable: list[Path] = []
+        current = self.snapshot(unreadable)
+        if unreadable:
+            logger.warning(
+                "watcher_reconcile_unreadable org_id=%s paths=%s",
+                self.config.org_id,
+                [str(path) for path in unreadable],
+            )
+        with self.session_factory() as db:
+            sources = {
+                path_key(source_path): source_path
+                for source_path in db.execute(
+                    select(Certificate.source_path).where(
+                        Certificate.org_id == self.config.org_id,
+                        Certificate.source_path.is_not(None),
+                    )
+                ).scalars()
+                if source_path
+            }
+            manifest = {
+                path_key(path): (size, mtime_ns)
+                for path, size, mtime_ns in db.execute(
+                    select(
+                        CertIngestManifest.path,
+                        CertIngestManifest.size,
+                        CertIngestManifest.mtime_ns,
+                    ).where(CertIngestManifest.org_id == self.config.org_id)
+                )
+            }
+        previous = manifest if self._previous is None else self._previous
+        ingests = [
+            raw_path
+            for key, (raw_path, signature) in current.items()
+            if (key not in sources and key not in manifest)
+            or (key in previous and previous[key] != signature)
+        ]
+        deletes = [
+            source_path
+            for key, source_path in sources.items()
+            if key not in current
+            and not is_under(source_path, unreadable)
+            and covers_path(
+                source_path,
+                self.config.root_path,
+                recursive=self.config.recursive,
+                include=self.config.include,
+                exclude=self.config.exclude,
+            )
+        ]
+        # Unreadable subtrees keep their last known signatures until they can be listed.
+        self._previous = {
+            key: signature
+            for key, signature in previous.items()
+            if is_under(key, unreadable)
+        }
+        self._previous.update((key, signature) for key, (_, signature) in current.items())
+        for path in deletes:
+            self.handler._enqueue_delete(path, "reconcile")
+        for path in ingests:
+            self.handler._enqueue_ingest(path, "reconcile")
+        result = {"scanned": len(current), "ingest": len(ingests), "delete": len(deletes)}
+        if ingests or deletes:
+            logger.info("watcher_reconcile %s", result)
+        return result
+
+
+def _run_reconcilers(reconcilers: list[DirectoryReconciler], stopped: threading.Event) -> None:
+    """Run every root's reconciler on its own interval from a single thread."""
+    next_due = {
+        id(reconciler): time.monotonic() + reconciler.config.reconcile_interval_seconds
+        for reconciler in reconcilers
+    }
+    while not stopped.wait(max(0.0, min(next_due.values()) - time.monotonic())):
+        for reconciler in reconcilers:
+            if time.monotonic() < next_due[id(reconciler)]:
+                continue
+            try:
+                reconciler.run_once()
+            except Exception:
+                logger.exception(
+                    "watcher_reconcile_failed org_id=%s root=%s",
+                    reconciler.config.org_id,
+                    reconciler.config.root_path,
+                )
+            next_due[id(reconciler)] = (
+                time.monotonic() + reconciler.config.reconcile_interval_seconds
+            )
+
+
+def _env_defaults() -> dict[str, object]:
+    """Per-root settings from WATCHER_* variables, shared by every root."""
+    observer_mode = os.getenv("WATCHER_OBSERVER", "native").strip().lower()
+    return {
+        "debounce_seconds": float(os.getenv("WATCHER_DEBOUNCE_SECONDS", "2")),
+        "max_events_per_minute": int(os.getenv("WATCHER_MAX_EVENTS_PER_MINUTE", "60")),
+        "recursive": os.getenv("WATCHER_RECURSIVE", str(settings.ingest_recursive)).lower()
+        in {"1", "true", "yes"},
+        "include": parse_globs(os.getenv("WATCHER_INCLUDE_GLOBS", settings.ingest_include_globs)),
+        "exclude": parse_globs(os.getenv("WATCHER_EXCLUDE_GLOBS", settings.ingest_exclude_globs)),
+        "batch_window_seconds": float(os.getenv("WATCHER_BATCH_WINDOW_SECONDS", "2")),
+        "batch_max_paths": int(os.getenv("WATCHER_BATCH_MAX_PATHS", "500")),
+        "stability_max_wait_seconds": float(
+            os.getenv("WATCHER_STABILITY_MAX_WAIT_SECONDS", "300")
+        ),
+        "max_pending_paths": int(os.getenv("WATCHER_MAX_PENDING_PATHS", "10000")),
+        "deferred_max_paths": int(os.getenv("WATCHER_DEFERRED_MAX_PATHS", "5000")),
+        "reconcile_interval_seconds": float(
+            os.getenv("WATCHER_RECONCILE_INTERVAL_SECONDS", "300")
+        ),
+        "observer_mode": observer_mode,
+        "poll_min_seconds": float(os.getenv("WATCHER_POLL_MIN_SECONDS", "2")),
+        "poll_max_seconds": float(os.getenv("WATCHER_POLL_MAX_SECONDS", "60")),
+    }
+
+
+def _build_config(values: dict[str, object]) -> WatcherConfig:
+    known = {item.name: item for item in fields(WatcherConfig)}
+    unknown = set(values) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown watcher settings: {', '.join(sorted(unknown))}")
+    converted: dict[str, object] = {}
+    for name, value in values.items():
+        if name == "root_path":
+            value = Path(str(value)).expanduser().resolve(strict=False)
+        elif name in {"include", "exclude"}:
+            value = parse_globs(value)
+        elif name == "observer_mode":
+            value = str(value).strip().lower()
+            if value not in {"native", "polling"}:
+                raise ValueError(f"observer_mode must be 'native' or 'polling', got {value!r}")
+        elif name == "recursive":
+            value = value if isinstance(value, bool) else str(value).lower() in {"1", "true", "yes"}
+        elif known[name].type == "int":
+            value = int(value)
+        else:
+            value = float(value)
+        converted[name] = value
+    return WatcherConfig(**converted)
+
+
 def _load_config() -> WatcherConfig:
-    org_id = int(os.getenv("ORG_ID", str(settings.default_org_id)))
-    root_path = Path(os.getenv("CERTIFICADOS_ROOT", str(settings.certs_root_path)))
-    root_path = root_path.expanduser().resolve(strict=False)
-    debounce_seconds = float(os.getenv("WATCHER_DEBOUNCE_SECONDS", "2"))
-    max_events = int(os.getenv("WATCHER_MAX_EVENTS_PER_MINUTE", "60"))
-    return WatcherConfig(
-        org_id=org_id,
-        root_path=root_path,
-        debounce_seconds=debounce_seconds,
-        max_events_per_minute=max_events,
+    return _build_config(
+        {
+            "org_id": os.getenv("ORG_ID", str(settings.default_org_id)),
+            "root_path": os.getenv("CERTIFICADOS_ROOT", str(settings.certs_root_path)),
+            **_env_defaults(),
+        }
     )
 
 
+def _load_configs(config_file: str | os.PathLike[str] | None = None) -> list[WatcherConfig]:
+    """Roots to watch: WATCHER_CONFIG_FILE entries, or the single ORG_ID/CERTIFICADOS_ROOT.
+
+    The file holds a JSON list of objects with ``org_id`` and ``root`` plus
+    any WatcherConfig field (``debounce_seconds``, ``max_events_per_minute``,
+    ``include``...); fields left out take their WATCHER_* value.
+    """
+    config_file = config_file or os.getenv("WATCHER_CONFIG_FILE")
+    if not config_file:
+        return [_load_config()]
+    entries = json.loads(Path(config_file).read_text(encoding="utf-8"))
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{config_file}: expected a non-empty JSON list of roots")
+    defaults = _env_defaults()
+    configs: list[WatcherConfig] = []
+    seen: set[tuple[int, str]] = set()
+    for entry in entries:
+        entry = dict(entry)
+        if "org_id" not in entry or "root" not in entry:
+            raise ValueError(f"{config_file}: every root needs 'org_id' and 'root'")
+        entry["root_path"] = entry.pop("root")
+        config = _build_config({**defaults, **entry})
+        key = (config.org_id, path_key(config.root_path))
+        if key in seen:
+            raise ValueError(f"{config_file}: duplicate root {config.root_path} for org {config.org_id}")
+        seen.add(key)
+        configs.append(config)
+    return configs
+
+
+def _build_observer(config: WatcherConfig) -> BaseObserver:
+    if config.observer_mode == "polling":
+        return ScandirPollingObserver(
+            min_interval=config.poll_min_seconds, max_interval=config.poll_max_seconds
+        )
+    return Observer()
+
+
 def main() -> None:
     logging.basicConfig(
         level=os.getenv("LOG_LEVEL", "INFO"),
         format="%(asctime)s %(levelname)s %(name)s %(message)s",
     )
-    config = _load_config()
-    if not config.root_path.exists() or not config.root_path.is_dir():
-        raise FileNotFoundError(f"CERTIFICADOS_ROOT not found: {config.root_path}")
-    logger.info(
-        "watcher_started org_id=%s root=%s debounce=%s rate_limit=%s",
-        config.org_id,
-        config.root_path,
-        config.debounce_seconds,
-        config.max_events_per_minute,
-    )
-    event_handler = PfxDirectoryHandler(config)
-    observer = Observer()
-    observer.schedule(event_handler, str(config.root_path), recursive=False)
-    observer.start()
+    configs = _load_configs()
+    for config in configs:
+        if not config.root_path.exists() or not config.root_path.is_dir():
+            raise FileNotFoundError(f"CERTIFICADOS_ROOT not found: {config.root_path}")
+    # One Redis client (one connection pool) and one observer per observer
+    # mode serve every root.
+    queue = get_queue(get_redis())
+    observers: dict[tuple[str, float, float], BaseObserver] = {}
+    handlers: list[PfxDirectoryHandler] = []
+    for config in configs:
+        logger.info(
+            "watcher_started org_id=%s root=%s observer=%s debounce=%s rate_limit=%s "
+            "recursive=%s batch_window=%s",
+            config.org_id,
+            config.root_path,
+            config.observer_mode,
+            config.debounce_seconds,
+            config.max_events_per_minute,
+            config.recursive,
+            config.batch_window_seconds,
+        )
+        handler = PfxDirectoryHandler(config, queue=queue)
+        mode = (config.observer_mode, config.poll_min_seconds, config.poll_max_seconds)
+        if config.observer_mode == "native":
+            mode = ("native", 0.0, 0.0)
+        observer = observers.get(mode)
+        if observer is None:
+            observer = observers[mode] = _build_observer(config)
+        observer.schedule(handler, str(config.root_path), recursive=config.recursive)
+        handlers.append(handler)
+    for observer in observers.values():
+        observer.start()
+    stopped = threading.Event()
+    reconcilers = [
+        DirectoryReconciler(handler)
+        for handler in handlers
+        if handler.config.reconcile_interval_seconds > 0
+    ]
+    if reconcilers:
+        threading.Thread(
+            target=_run_reconcilers, args=(reconcilers, stopped), name="pfx-reconcile", daemon=True
+        ).start()
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         logger.info("watcher_shutdown")
     finally:
-        observer.stop()
-        observer.join()
+        stopped.set()
+        for observer in observers.values():
+            observer.stop()
+        for observer in observers.values():
+            observer.join()
+        for handler in handlers:
+            handler.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+"""Polling observer tuned for large, mostly flat certificate shares.
+
+SMB/CIFS mounts deliver no inotify events, and watchdog's generic
+``PollingObserver`` stats every entry (directories and non-certificate files
+included) on each tick. This observer keeps a cached snapshot of only the
+certificate files, as ``path -> (size, mtime_ns)`` built with ``os.scandir``,
+and diffs it on each poll. The poll interval starts at ``min_interval`` and
+doubles (up to ``max_interval``) while nothing changes, snapping back to
+``min_interval`` as soon as something does.
+
+Moves are reported as a delete plus a create: inode numbers are not reliable
+on network shares, and the PFX handler treats both the same way.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+from pathlib import Path
+
+from watchdog.events import (
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileSystemEvent,
+)
+from watchdog.observers.api import (
+    DEFAULT_OBSERVER_TIMEOUT,
+    BaseObserver,
+    EventEmitter,
+    EventQueue,
+    ObservedWatch,
+)
+
+from app.services.certificate_fs import is_under, iter_certificate_files
+
+logger = logging.getLogger(__name__)
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+class ScandirPollingEmitter(EventEmitter):
+    def __init__(
+        self,
+        event_queue: EventQueue,
+        watch: ObservedWatch,
+        *,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        event_filter: list[type[FileSystemEvent]] | None = None,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+    ) -> None:
+        super().__init__(event_queue, watch, timeout=timeout, event_filter=event_filter)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self._snapshot: Snapshot = {}
+
+    def take_snapshot(self, unreadable: list[Path] | None = None) -> Snapshot:
+        return {
+            str(path): (file_stat.st_size, file_stat.st_mtime_ns)
+            for path, file_stat in iter_certificate_files(
+                Path(self.watch.path), recursive=self.watch.is_recursive, unreadable=unreadable
+            )
+        }
+
+    def on_thread_start(self) -> None:
+        try:
+            self._snapshot = self.take_snapshot()
+        except OSError as exc:
+            logger.warning("polling_snapshot_failed path=%s error=%s", self.watch.path, exc)
+
+    def queue_events(self, timeout: float) -> None:
+        # The adaptive interval replaces the observer timeout between polls.
+        if self.stopped_event.wait(self.interval):
+            return
+        self.poll()
+
+    def poll(self) -> int:
+        """Diff a fresh snapshot against the cached one; return the events queued."""
+        unreadable: list[Path] = []
+        try:
+            current = self.take_snapshot(unreadable)
+        except OSError as exc:
+            # Share unreachable: keep the old snapshot and retry at the slowest rate.
+            logger.warning("polling_snapshot_failed path=%s error=%s", self.watch.path, exc)
+            self.interval = self.max_interval
+            return 0
+        previous = self._snapshot
+        if unreadable:
+            # Files below a subtree that failed to list are not gone: keep them as they were.
+            logger.warning(
+                "polling_snapshot_incomplete path=%s unreadable=%s",
+                self.watch.path,
+                [str(path) for path in unreadable],
+            )
+            for path, signature in previous.items():
+                if path not in current and is_under(path, unreadable):
+                    current[path] = signature
+        events = 0
+        for path in previous.keys() - current.keys():
+            self.queue_event(FileDeletedEvent(path))
+            events += 1
+        for path, signature in current.items():
+            known = previous.get(path)
+            if known is None:
+                self.queue_event(FileCreatedEvent(path))
+                events += 1
+            elif known != signature:
+                self.queue_event(FileModifiedEvent(path))
+                events += 1
+        self._snapshot = current
+        if events:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return events
+
+
+class ScandirPollingObserver(BaseObserver):
+    def __init__(
+        self,
+        *,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+    ) -> None:
+        super().__init__(
+            functools.partial(
+                ScandirPollingEmitter, min_interval=min_interval, max_interval=max_interval
+            ),
+            timeout=timeout,
+        )
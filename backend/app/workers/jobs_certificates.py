@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import logging
+import time
+import uuid
+from collections import Counter
 from pathlib import Path
 
 from rq import get_current_job
 from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
 
+from app.core.audit import log_audit
 from app.db.session import SessionLocal
 from app.models import Certificate
 from app.services import certificate_ingest
 
 logger = logging.getLogger(__name__)
 
+INGEST_JOB_RESULT_TTL = 86400
+
 
 def _log_job(message: str, *, org_id: int, path: str) -> None:
     job = get_current_job()
@@ -51,82 +58,223 @@ def ingest_pfx_file(org_id: int, path: str) -> dict[str, str | None]:
     return result
 
 
-def delete_certificate_by_path(org_id: int, path: str) -> dict[str, str | None]:
-    normalized_path = str(Path(path).expanduser().resolve(strict=False))
-    _log_job("job_delete_started", org_id=org_id, path=normalized_path)
+def ingest_pfx_batch(org_id: int, paths: list[str]) -> list[dict[str, object]]:
+    """Ingest many files in one DB session, committing once per chunk.
+
+    Cheaper than one ``ingest_pfx_file`` job per path when events arrive in
+    bursts; returns one result per distinct path (see
+    ``certificate_ingest.ingest_certificate_paths``).
+    """
+    job = get_current_job()
+    job_id = job.id if job else None
+    logger.info("job_ingest_batch_started org_id=%s job_id=%s paths=%s", org_id, job_id, len(paths))
     with SessionLocal() as db:
-        result = db.execute(
-            delete(Certificate).where(
-                Certificate.org_id == org_id, Certificate.source_path == normalized_path
+        results = certificate_ingest.ingest_certificate_paths(db, org_id=org_id, paths=paths)
+    logger.info(
+        "job_ingest_batch_finished org_id=%s job_id=%s actions=%s",
+        org_id,
+        job_id,
+        dict(Counter(str(result["action"]) for result in results)),
+    )
+    return results
+
+
+def _delete_certificate_by_path(
+    db: Session, *, org_id: int, normalized_path: str
+) -> dict[str, str]:
+    result = db.execute(
+        delete(Certificate).where(
+            Certificate.org_id == org_id, Certificate.source_path == normalized_path
+        )
+    )
+    rowcount = result.rowcount or 0
+    if rowcount > 0:
+        if rowcount > 1:
+            job = get_current_job()
+            job_id = job.id if job else None
+            logger.warning(
+                "job_delete_multiple_by_path org_id=%s path=%s job_id=%s rowcount=%s",
+                org_id,
+                normalized_path,
+                job_id,
+                rowcount,
             )
+        db.commit()
+        _log_delete_result(
+            org_id=org_id,
+            path=normalized_path,
+            strategy="by_path",
+            rowcount=rowcount,
+            found_ids_count=0,
         )
-        rowcount = result.rowcount or 0
-        if rowcount > 0:
-            if rowcount > 1:
-                job = get_current_job()
-                job_id = job.id if job else None
-                logger.warning(
-                    "job_delete_multiple_by_path org_id=%s path=%s job_id=%s rowcount=%s",
-                    org_id,
-                    normalized_path,
-                    job_id,
-                    rowcount,
-                )
-            db.commit()
-            _log_delete_result(
-                org_id=org_id,
-                path=normalized_path,
-                strategy="by_path",
-                rowcount=rowcount,
-                found_ids_count=0,
+        action = "deleted"
+        strategy = "by_path"
+    else:
+        stem = Path(normalized_path).stem
+        found_ids = db.execute(
+            select(Certificate.id).where(Certificate.org_id == org_id, Certificate.name == stem)
+        ).scalars().all()
+        found_count = len(found_ids)
+        if found_count == 1:
+            delete_result = db.execute(
+                delete(Certificate).where(Certificate.id == found_ids[0])
             )
-            action = "deleted"
-            strategy = "by_path"
+            rowcount = delete_result.rowcount or 0
+            if rowcount > 0:
+                db.commit()
+            action = "deleted" if rowcount > 0 else "not_found"
+        elif found_count == 0:
+            job = get_current_job()
+            job_id = job.id if job else None
+            logger.info(
+                "job_delete_not_found org_id=%s path=%s job_id=%s stem=%s",
+                org_id,
+                normalized_path,
+                job_id,
+                stem,
+            )
+            action = "not_found"
         else:
-            stem = Path(normalized_path).stem
-            found_ids = db.execute(
-                select(Certificate.id).where(Certificate.org_id == org_id, Certificate.name == stem)
-            ).scalars().all()
-            found_count = len(found_ids)
-            if found_count == 1:
-                delete_result = db.execute(
-                    delete(Certificate).where(Certificate.id == found_ids[0])
-                )
-                rowcount = delete_result.rowcount or 0
-                if rowcount > 0:
-                    db.commit()
-                action = "deleted" if rowcount > 0 else "not_found"
-            elif found_count == 0:
-                job = get_current_job()
-                job_id = job.id if job else None
-                logger.info(
-                    "job_delete_not_found org_id=%s path=%s job_id=%s stem=%s",
-                    org_id,
-                    normalized_path,
-                    job_id,
-                    stem,
-                )
-                action = "not_found"
-            else:
-                job = get_current_job()
-                job_id = job.id if job else None
-                logger.warning(
-                    "job_delete_ambiguous org_id=%s path=%s job_id=%s stem=%s count=%s ids=%s",
-                    org_id,
-                    normalized_path,
-                    job_id,
-                    stem,
-                    found_count,
-                    [str(cert_id) for cert_id in found_ids],
-                )
-                action = "ambiguous"
-            _log_delete_result(
-                org_id=org_id,
-                path=normalized_path,
-                strategy="by_name",
-                rowcount=rowcount,
-                found_ids_count=found_count,
+            job = get_current_job()
+            job_id = job.id if job else None
+            logger.warning(
+                "job_delete_ambiguous org_id=%s path=%s job_id=%s stem=%s count=%s ids=%s",
+                org_id,
+                normalized_path,
+                job_id,
+                stem,
+                found_count,
+                [str(cert_id) for cert_id in found_ids],
             )
-            strategy = "by_name"
-    _log_job("job_delete_finished", org_id=org_id, path=normalized_path)
+            action = "ambiguous"
+        _log_delete_result(
+            org_id=org_id,
+            path=normalized_path,
+            strategy="by_name",
+            rowcount=rowcount,
+            found_ids_count=found_count,
+        )
+        strategy = "by_name"
     return {"action": action, "path": normalized_path, "strategy": strategy}
+
+
+def delete_certificate_by_path(org_id: int, path: str) -> dict[str, str | None]:
+    normalized_path = str(Path(path).expanduser().resolve(strict=False))
+    _log_job("job_delete_started", org_id=org_id, path=normalized_path)
+    with SessionLocal() as db:
+        result = _delete_certificate_by_path(db, org_id=org_id, normalized_path=normalized_path)
+    _log_job("job_delete_finished", org_id=org_id, path=normalized_path)
+    return result
+
+
+def process_pfx_events(org_id: int, events: list[tuple[str, str]]) -> list[dict[str, object]]:
+    """Apply a coalesced batch of watcher events in one DB session.
+
+    ``events`` holds ``(action, path)`` pairs, ``action`` being ``"ingest"`` or
+    ``"delete"``, at most one per path. Deletes run first, then all ingests go
+    through ``ingest_certificate_paths`` in chunks. Returns one result per
+    event, in order; a file that vanished before its ingest ran is reported as
+    ``missing``.
+    """
+    job = get_current_job()
+    job_id = job.id if job else None
+    logger.info("job_batch_started org_id=%s job_id=%s events=%s", org_id, job_id, len(events))
+    by_path: dict[str, dict[str, object]] = {}
+    normalized = [
+        (action, str(Path(path).expanduser().resolve(strict=False))) for action, path in events
+    ]
+    with SessionLocal() as db:
+        for action, normalized_path in normalized:
+            if action == "delete":
+                by_path[normalized_path] = {
+                    "path": normalized_path,
+                    **_delete_certificate_by_path(
+                        db, org_id=org_id, normalized_path=normalized_path
+                    ),
+                }
+        ingests = [path for action, path in normalized if action != "delete"]
+        for result in certificate_ingest.ingest_certificate_paths(
+            db, org_id=org_id, paths=ingests
+        ):
+            by_path[str(result["path"])] = result
+    results = [by_path[path] for _action, path in normalized]
+    logger.info(
+        "job_batch_finished org_id=%s job_id=%s actions=%s",
+        org_id,
+        job_id,
+        dict(Counter(str(result["action"]) for result in results)),
+    )
+    return results
+
+
+def reconcile_pfx_directories(
+    org_id: int, root: str, directories: list[str], options: dict[str, object]
+) -> dict[str, int]:
+    """Targeted repair of ``directories`` after the watcher had to shed events."""
+    job = get_current_job()
+    job_id = job.id if job else None
+    logger.info(
+        "job_reconcile_started org_id=%s job_id=%s directories=%s",
+        org_id,
+        job_id,
+        len(directories),
+    )
+    with SessionLocal() as db:
+        result = certificate_ingest.reconcile_certificate_directories(
+            db, org_id=org_id, root=Path(root), directories=directories, **options
+        )
+    logger.info("job_reconcile_finished org_id=%s job_id=%s result=%s", org_id, job_id, result)
+    return result
+
+
+def ingest_certificates_job(
+    org_id: int, actor_user_id: str | None, options: dict[str, object]
+) -> dict[str, object]:
+    """Run a full directory ingest, publishing progress in ``job.meta["progress"]``."""
+    job = get_current_job()
+    job_id = job.id if job else None
+    started_at = time.time()
+    logger.info("job_ingest_fs_started org_id=%s job_id=%s", org_id, job_id)
+
+    def publish(progress: dict[str, int]) -> None:
+        if job is None:
+            return
+        job.meta["progress"] = {**progress, "started_at": started_at, "updated_at": time.time()}
+        job.save_meta()
+
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(
+            db, org_id=org_id, progress=publish, **options
+        )
+        if not options.get("dry_run"):
+            log_audit(
+                db=db,
+                org_id=org_id,
+                action="CERT_INGEST_FROM_FS",
+                entity_type="certificate",
+                entity_id=job_id,
+                actor_user_id=uuid.UUID(actor_user_id) if actor_user_id else None,
+                meta={
+                    "inserted": result["inserted"],
+                    "updated": result["updated"],
+                    "failed": result["failed"],
+                    "unchanged": result["unchanged"],
+                    "negative_cache_hits": result["negative_cache_hits"],
+                    "quarantined": result["quarantined"],
+                    "quarantine_skipped": result["quarantine_skipped"],
+                    "total": result["total"],
+                    "pruned": result["pruned"],
+                    "deduped": result["deduped"],
+                    "decoders": result["decoders"],
+                    "limit": options.get("limit", 0),
+                },
+            )
+            db.commit()
+    logger.info(
+        "job_ingest_fs_finished org_id=%s job_id=%s total=%s elapsed=%.1fs",
+        org_id,
+        job_id,
+        result["total"],
+        time.time() - started_at,
+    )
+    return result
@@ -14,6 +14,31 @@ DEFAULT_QUEUE_NAME = "certs"
 
 logger = logging.getLogger(__name__)
 
+# Dedupe-and-enqueue in one round trip. KEYS[1] is the job hash and KEYS[2..]
+# the registries an earlier run of the same id may still be listed in.
+# ARGV[1] is the job id; the rest are the commands RQ would send to enqueue
+# the new job, each given as its argument count followed by its arguments.
+ENQUEUE_UNIQUE_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status == 'queued' or status == 'started' or status == 'deferred' then
+    return status
+end
+if status then
+    redis.call('DEL', KEYS[1])
+    for i = 2, #KEYS do
+        redis.call('ZREM', KEYS[i], ARGV[1])
+    end
+end
+local index = 2
+while index <= #ARGV do
+    local argc = tonumber(ARGV[index])
+    redis.call(unpack(ARGV, index + 1, index + argc))
+    index = index + argc + 1
+end
+return false
+"""
+
+
 def normalize_path(raw_path: str | Path) -> str:
     path = Path(raw_path).expanduser().resolve(strict=False)
     return str(path)
@@ -54,3 +79,44 @@ def enqueue_unique(queue: Queue, func, *args, job_id: str, **kwargs) -> tuple[ob
     new_job = queue.enqueue(func, *args, job_id=job_id, **kwargs)
     logger.info("queue_enqueued job_id=%s", job_id)
     return new_job, False
+
+
+def enqueue_unique_atomic(
+    queue: Queue, func, *args, job_id: str, **kwargs
+) -> tuple[object, bool]:
+    """``enqueue_unique`` as one atomic Redis round trip.
+
+    The job is built client-side and RQ's enqueue commands are captured from
+    an unsent pipeline; a Lua script then checks the status stored under
+    ``job_id`` and replays them only when no queued, started or deferred job
+    holds that id. A stale finished/failed/canceled job is replaced, so the
+    watcher and the API cannot both enqueue the same id.
+    """
+    connection = queue.connection
+    pipe = connection.pipeline(transaction=False)
+    try:
+        job = queue.enqueue(func, *args, job_id=job_id, pipeline=pipe, **kwargs)
+        commands = [command for command, _options in pipe.command_stack]
+    finally:
+        pipe.reset()
+    argv: list[object] = [job_id]
+    for command in commands:
+        argv.append(len(command))
+        argv.extend(command)
+    # Every registry Job.delete() could remove a stale run from (stopped jobs
+    # live in the failed registry).
+    registries = [
+        queue.finished_job_registry.key,
+        queue.failed_job_registry.key,
+        queue.canceled_job_registry.key,
+        queue.scheduled_job_registry.key,
+        queue.deferred_job_registry.key,
+        queue.started_job_registry.key,
+    ]
+    script = connection.register_script(ENQUEUE_UNIQUE_SCRIPT)
+    status = script(keys=[job.key, *registries], args=argv)
+    if status is not None:
+        logger.info("queue_deduped job_id=%s status=%s", job_id, status.decode())
+        return queue.job_class(job_id, connection=connection), True
+    logger.info("queue_enqueued job_id=%s", job_id)
+    return job, False
@@ -0,0 +1,229 @@
+"""Synthetic PFX corpus for ingest benchmarks.
+
+Files follow the naming conventions seen on the real share (``... Senha 1234.pfx``,
+``... senha_abcd.pfx``) and mix the encodings the ingest has to cope with:
+
+* ``aes``: PBES2/AES-256 with PBKDF2 (what current tools write)
+* ``3des``: PKCS#12 PBE with 3DES and a SHA-1 MAC (older Windows exports)
+* ``rc2``: certificates under RC2-40, key under PBES2 (``openssl -legacy`` style);
+  cryptography cannot write RC2, so these bundles are assembled by hand
+* ``open``: no password at all
+* ``wrong_password``: the password in the filename does not open the bundle
+* ``corrupted``: a valid bundle truncated halfway
+
+Usage::
+
+    python -m benchmarks.corpus /tmp/pfx-corpus --files 200
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+from app.services.pkcs12_legacy import KDF_ID_IV, KDF_ID_KEY, KDF_ID_MAC, RC2, _oid, _pkcs12_kdf
+
+KINDS = ("aes", "3des", "rc2", "open", "wrong_password", "corrupted")
+DEFAULT_MIX = {"aes": 50, "3des": 20, "rc2": 10, "open": 5, "wrong_password": 10, "corrupted": 5}
+LEGACY_KDF_ROUNDS = 2048
+FILENAME_STYLES = ("{name} Senha {password}", "{name} senha_{password}", "{name} SENHA-{password}")
+
+
+def _der(tag: int, content: bytes) -> bytes:
+    size = len(content)
+    if size < 0x80:
+        return bytes([tag, size]) + content
+    length = size.to_bytes((size.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(length)]) + length + content
+
+
+def _seq(*items: bytes) -> bytes:
+    return _der(0x30, b"".join(items))
+
+
+def _set(*items: bytes) -> bytes:
+    return _der(0x31, b"".join(items))
+
+
+def _oid_der(dotted: str) -> bytes:
+    return _der(0x06, _oid(dotted))
+
+
+def _octets(value: bytes) -> bytes:
+    return _der(0x04, value)
+
+
+def _integer(value: int) -> bytes:
+    return _der(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big"))
+
+
+def _explicit(value: bytes) -> bytes:
+    return _der(0xA0, value)
+
+
+def _pad(data: bytes, block_size: int) -> bytes:
+    pad = block_size - len(data) % block_size
+    return data + bytes([pad]) * pad
+
+
+def _bmp(password: str) -> bytes:
+    return password.encode("utf-16-be") + b"\x00\x00"
+
+
+def serialize_rc2_bundle(
+    key: rsa.RSAPrivateKey, cert: x509.Certificate, password: str, *, rng: random.Random
+) -> bytes:
+    """PKCS#12 with the cert bag under pbeWithSHAAnd40BitRC2-CBC and a SHA-1 MAC."""
+    local_key_id = _set(_seq(_oid_der("1.2.840.113549.1.9.21"), _set(_octets(b"\x01" * 20))))
+    cert_bag = _seq(
+        _oid_der("1.2.840.113549.1.12.10.1.3"),
+        _explicit(
+            _seq(
+                _oid_der("1.2.840.113549.1.9.22.1"),
+                _explicit(_octets(cert.public_bytes(serialization.Encoding.DER))),
+            )
+        ),
+        local_key_id,
+    )
+    salt = rng.randbytes(8)
+    bmp = _bmp(password)
+    rc2_key = _pkcs12_kdf("sha1", bmp, salt, LEGACY_KDF_ROUNDS, KDF_ID_KEY, 5)
+    iv = _pkcs12_kdf("sha1", bmp, salt, LEGACY_KDF_ROUNDS, KDF_ID_IV, 8)
+    encrypted = RC2(rc2_key, 40).encrypt_cbc(iv, _pad(_seq(cert_bag), RC2.block_size))
+    encrypted_data = _seq(
+        _oid_der("1.2.840.113549.1.7.6"),
+        _explicit(
+            _seq(
+                _integer(0),
+                _seq(
+                    _oid_der("1.2.840.113549.1.7.1"),
+                    _seq(
+                        _oid_der("1.2.840.113549.1.12.1.6"),
+                        _seq(_octets(salt), _integer(LEGACY_KDF_ROUNDS)),
+                    ),
+                    _der(0x80, encrypted),
+                ),
+            )
+        ),
+    )
+    shrouded_key = key.private_bytes(
+        serialization.Encoding.DER,
+        serialization.PrivateFormat.PKCS8,
+        serialization.BestAvailableEncryption(password.encode()),
+    )
+    key_bag = _seq(
+        _oid_der("1.2.840.113549.1.12.10.1.2"), _explicit(shrouded_key), local_key_id
+    )
+    key_data = _seq(_oid_der("1.2.840.113549.1.7.1"), _explicit(_octets(_seq(key_bag))))
+    auth_safe = _seq(encrypted_data, key_data)
+
+    mac_salt = rng.randbytes(8)
+    mac_key = _pkcs12_kdf("sha1", bmp, mac_salt, LEGACY_KDF_ROUNDS, KDF_ID_MAC, 20)
+    mac = hmac.new(mac_key, auth_safe, hashlib.sha1).digest()
+    mac_data = _seq(
+        _seq(_seq(_oid_der("1.3.14.3.2.26"), b"\x05\x00"), _octets(mac)),
+        _octets(mac_salt),
+        _integer(LEGACY_KDF_ROUNDS),
+    )
+    return _seq(
+        _integer(3),
+        _seq(_oid_der("1.2.840.113549.1.7.1"), _explicit(_octets(auth_safe))),
+        mac_data,
+    )
+
+
+def _certificate(key: rsa.RSAPrivateKey, common_name: str, serial: int) -> x509.Certificate:
+    name = x509.Name(
+        [
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "BR"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ICP-Brasil"),
+            x509.NameAttribute(NameOID.COMMON_NAME, common_name),
+        ]
+    )
+    now = datetime.now(timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(serial)
+        .not_valid_before(now - timedelta(days=30))
+        .not_valid_after(now + timedelta(days=335))
+        .sign(key, hashes.SHA256())
+    )
+
+
+def _bundle(kind: str, key, cert, password: str, *, rng: random.Random) -> bytes:
+    if kind == "rc2":
+        return serialize_rc2_bundle(key, cert, password, rng=rng)
+    if kind == "open":
+        encryption = serialization.NoEncryption()
+    elif kind == "3des":
+        encryption = (
+            serialization.PrivateFormat.PKCS12.encryption_builder()
+            .kdf_rounds(LEGACY_KDF_ROUNDS)
+            .key_cert_algorithm(pkcs12.PBES.PBESv1SHA1And3KeyTripleDESCBC)
+            .hmac_hash(hashes.SHA1())
+            .build(password.encode())
+        )
+    else:
+        encryption = serialization.BestAvailableEncryption(password.encode())
+    return pkcs12.serialize_key_and_certificates(b"a1", key, cert, None, encryption)
+
+
+def generate_corpus(
+    root: Path,
+    *,
+    files: int,
+    mix: dict[str, int] | None = None,
+    seed: int = 1234,
+) -> dict[str, int]:
+    """Write ``files`` bundles into ``root`` and return the count per kind."""
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    # RSA keygen dominates generation time; one key signs every certificate.
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=files)
+    counts: dict[str, int] = {}
+    for index, kind in enumerate(kinds, start=1):
+        company = f"EMPRESA {index:05d} LTDA {rng.randrange(10**13, 10**14)}"
+        password = f"{rng.randrange(10**5, 10**6)}"
+        cert = _certificate(key, company, serial=rng.getrandbits(64) | 1)
+        data = _bundle(
+            "aes" if kind in {"wrong_password", "corrupted"} else kind, key, cert, password, rng=rng
+        )
+        if kind == "corrupted":
+            data = data[: len(data) // 2]
+        if kind == "wrong_password":
+            password = f"{int(password) + 1}"
+        if kind == "open":
+            filename = company
+        else:
+            filename = rng.choice(FILENAME_STYLES).format(name=company, password=password)
+        (root / f"{filename}.pfx").write_bytes(data)
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    counts = generate_corpus(args.root, files=args.files, seed=args.seed)
+    print(f"wrote {sum(counts.values())} files to {args.root}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Watcher enqueue microbenchmark: ``enqueue_unique`` vs ``enqueue_unique_atomic``.
+
+Needs a reachable Redis (``REDIS_URL``, default ``redis://localhost:6379/0``);
+it works in a throwaway queue and deletes its keys afterwards. For each
+implementation it times two phases over ``--jobs`` ids:
+
+* ``fresh``: every id is new, so the job is created and pushed
+* ``dedupe``: the same ids again while still queued, so nothing is enqueued
+
+and reports enqueues/sec plus Redis round trips per call (single commands,
+pipeline executions and script calls each count as one).
+
+Usage, from ``backend/``::
+
+    python -m benchmarks.enqueue_bench --jobs 2000
+    python -m benchmarks.enqueue_bench --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import uuid
+from collections.abc import Callable
+
+import redis
+from rq import Queue
+
+from app.workers.queue import DEFAULT_REDIS_URL, enqueue_unique, enqueue_unique_atomic
+
+
+class CountingRedis(redis.Redis):
+    """Redis client that counts network round trips."""
+
+    round_trips = 0
+
+    def execute_command(self, *args, **options):
+        self.round_trips += 1
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def counted_execute(*args, **kwargs):
+            if pipe.command_stack:
+                self.round_trips += 1
+            return execute(*args, **kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+
+def noop(*_args) -> None:
+    """Job target; never runs, the benchmark has no worker."""
+
+
+def _phase(
+    connection: CountingRedis,
+    queue: Queue,
+    enqueue: Callable[..., tuple[object, bool]],
+    job_ids: list[str],
+) -> dict[str, float]:
+    connection.round_trips = 0
+    started = time.perf_counter()
+    for job_id in job_ids:
+        enqueue(queue, noop, 1, job_id, job_id=job_id)
+    elapsed = time.perf_counter() - started
+    return {
+        "per_sec": round(len(job_ids) / elapsed, 1) if elapsed else None,
+        "round_trips": round(connection.round_trips / len(job_ids), 2),
+    }
+
+
+def _cleanup(connection: redis.Redis, queue: Queue, job_ids: list[str]) -> None:
+    keys = [queue.job_class.key_for(job_id) for job_id in job_ids]
+    for offset in range(0, len(keys), 500):
+        connection.delete(*keys[offset : offset + 500])
+    connection.delete(queue.key)
+    connection.srem(queue.redis_queues_keys, queue.key)
+
+
+def run(redis_url: str, *, jobs: int) -> list[dict[str, object]]:
+    connection = CountingRedis.from_url(redis_url)
+    results: list[dict[str, object]] = []
+    for name, enqueue in (
+        ("enqueue_unique", enqueue_unique),
+        ("enqueue_unique_atomic", enqueue_unique_atomic),
+    ):
+        queue = Queue(f"bench-enqueue-{uuid.uuid4().hex[:8]}", connection=connection)
+        queue.get_redis_server_version()  # cached INFO, outside the timed loop
+        job_ids = [f"bench__{uuid.uuid4().hex}" for _ in range(jobs)]
+        try:
+            fresh = _phase(connection, queue, enqueue, job_ids)
+            dedupe = _phase(connection, queue, enqueue, job_ids)
+        finally:
+            _cleanup(connection, queue, job_ids)
+        results.append(
+            {
+                "implementation": name,
+                "jobs": jobs,
+                "fresh_per_sec": fresh["per_sec"],
+                "fresh_round_trips": fresh["round_trips"],
+                "dedupe_per_sec": dedupe["per_sec"],
+                "dedupe_round_trips": dedupe["round_trips"],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000, help="distinct job ids per phase")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", DEFAULT_REDIS_URL))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.redis_url, jobs=args.jobs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = (
+        f"{'implementation':<24} {'fresh/s':>9} {'fresh RTT':>10} {'dedupe/s':>9} {'dedupe RTT':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['implementation']:<24} {row['fresh_per_sec']:>9} {row['fresh_round_trips']:>10} "
+            f"{row['dedupe_per_sec']:>9} {row['dedupe_round_trips']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""End-to-end PFX ingest benchmark against SQLite.
+
+Generates (or reuses) a synthetic corpus and times, per file:
+
+* ``parse_pkcs12`` with the password guessed from the filename
+* ``_extract_metadata`` with the full candidate cascade (cold strategy cache)
+* ``ingest_certificate_from_path`` (what the watcher worker runs)
+
+then ``ingest_certificates_from_fs`` over the whole directory. Each stage
+reports files/sec and the process peak RSS so far (peak RSS never goes down,
+so read it as "after this stage"). The per-file stages also report p50/p99
+latency; the directory stage parses in worker processes and writes whole
+batches, so it has no per-file latency and reports throughput only.
+
+Usage, from ``backend/``::
+
+    python -m benchmarks.ingest_bench --files 200
+    python -m benchmarks.ingest_bench --corpus /tmp/pfx-corpus --workers 4 --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.db.base import Base  # noqa: E402
+from app.services import certificate_ingest  # noqa: E402
+from app.services.certificate_fs import list_certificate_files  # noqa: E402
+from app.services.pfx_strategies import StrategyLearner  # noqa: E402
+from benchmarks.corpus import generate_corpus  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _report(stage: str, files: int, elapsed: float, samples: list[float]) -> dict[str, object]:
+    return {
+        "stage": stage,
+        "files": files,
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(files / elapsed, 1) if elapsed else None,
+        "p50_ms": round(statistics.median(samples) * 1000, 2) if samples else None,
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 2) if samples else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _reset_caches() -> None:
+    certificate_ingest.STRATEGIES = StrategyLearner()
+    certificate_ingest.KNOWN_FAILURES.clear()
+    certificate_ingest.QUARANTINED.clear()
+
+
+def _session_factory(database: Path) -> sessionmaker[Session]:
+    database.unlink(missing_ok=True)
+    engine = create_engine(f"sqlite+pysqlite:///{database}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
+
+
+def _time_each(paths: list[Path], func: Callable[[Path], object]) -> tuple[float, list[float]]:
+    samples: list[float] = []
+    started = time.perf_counter()
+    for path in paths:
+        before = time.perf_counter()
+        try:
+            func(path)
+        except Exception:  # failures are part of the corpus
+            pass
+        samples.append(time.perf_counter() - before)
+    return time.perf_counter() - started, samples
+
+
+def run(corpus: Path, workdir: Path, *, workers: int, org_id: int = 1) -> list[dict[str, object]]:
+    paths = [path for path, _ in list_certificate_files(corpus)]
+    results: list[dict[str, object]] = []
+
+    elapsed, samples = _time_each(
+        paths,
+        lambda path: certificate_ingest.parse_pkcs12(
+            path, certificate_ingest.guess_password_from_path(path) or ""
+        ),
+    )
+    results.append(_report("parse_pkcs12", len(paths), elapsed, samples))
+
+    _reset_caches()
+    elapsed, samples = _time_each(
+        paths,
+        lambda path: certificate_ingest._extract_metadata(
+            path, certificate_ingest._candidate_passwords(path)
+        ),
+    )
+    results.append(_report("_extract_metadata", len(paths), elapsed, samples))
+
+    _reset_caches()
+    SessionLocal = _session_factory(workdir / "per-file.sqlite3")
+
+    def ingest_one(path: Path) -> None:
+        with SessionLocal() as db:
+            certificate_ingest.ingest_certificate_from_path(db, org_id=org_id, path=path)
+
+    elapsed, samples = _time_each(paths, ingest_one)
+    results.append(_report("ingest_certificate_from_path", len(paths), elapsed, samples))
+
+    _reset_caches()
+    SessionLocal = _session_factory(workdir / "bulk.sqlite3")
+    certificate_ingest.settings.certs_root_path = corpus
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        certificate_ingest.ingest_certificates_from_fs(
+            db, org_id=org_id, workers=workers, full_rescan=True
+        )
+    results.append(
+        _report("ingest_certificates_from_fs", len(paths), time.perf_counter() - started, [])
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, help="existing corpus directory (default: generate)")
+    parser.add_argument("--files", type=int, default=200, help="files to generate")
+    parser.add_argument("--workers", type=int, default=1, help="parse workers for the bulk stage")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pfx-bench-") as tmp:
+        workdir = Path(tmp)
+        corpus = args.corpus
+        if corpus is None:
+            corpus = workdir / "corpus"
+            counts = generate_corpus(corpus, files=args.files, seed=args.seed)
+            print(f"generated {args.files} files: {counts}", file=sys.stderr)
+        results = run(corpus, workdir, workers=args.workers)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = f"{'stage':<30} {'files':>6} {'files/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        cells = {key: "-" if value is None else value for key, value in row.items()}
+        print(
+            f"{cells['stage']:<30} {cells['files']:>6} {cells['files_per_sec']:>9} "
+            f"{cells['p50_ms']:>9} {cells['p99_ms']:>9} {cells['peak_rss_mb']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
 from sqlalchemy.orm import Session
 
 from app import models
@@ -52,3 +59,42 @@ def create_certificate(db: Session, *, name: str | None = None, **kwargs) -> mod
 
 def headers(user: models.User) -> dict[str, str]:
     return {"X-User-Id": str(user.id), "X-Org-Id": str(user.org_id)}
+
+
+def self_signed_certificate(
+    common_name: str, *, days: int = 365
+) -> tuple[ec.EllipticCurvePrivateKey, x509.Certificate]:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=days))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert
+
+
+def touch(path: Path) -> Path:
+    """Create ``path`` (and its parents) with one byte of content."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x")
+    return path
+
+
+def write_pfx(path: Path, password: str, common_name: str = "Test A1") -> None:
+    """Write a PKCS#12 bundle with a fresh self-signed certificate (unencrypted if no password)."""
+    key, cert = self_signed_certificate(common_name)
+    encryption = (
+        serialization.BestAvailableEncryption(password.encode())
+        if password
+        else serialization.NoEncryption()
+    )
+    path.write_bytes(
+        pkcs12.serialize_key_and_certificates(common_name.encode(), key, cert, None, encryption)
+    )
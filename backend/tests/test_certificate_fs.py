@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from app.services.certificate_fs import list_certificate_files, matches_globs, parse_globs
+from tests.helpers import touch
+
+
+def test_walker_lists_top_level_only_by_default(tmp_path):
+    touch(tmp_path / "b.pfx")
+    touch(tmp_path / "a.P12")
+    touch(tmp_path / "notes.txt")
+    touch(tmp_path / "cliente" / "c.pfx")
+    (tmp_path / "dir.pfx").mkdir()
+
+    files = list_certificate_files(tmp_path)
+
+    assert [path.name for path, _ in files] == ["a.P12", "b.pfx"]
+    assert all(file_stat.st_size == 1 for _, file_stat in files)
+
+
+def test_walker_recurses_with_globs(tmp_path):
+    touch(tmp_path / "root.pfx")
+    touch(tmp_path / "clientes" / "111" / "a.pfx")
+    touch(tmp_path / "clientes" / "222" / "b.pfx")
+    touch(tmp_path / "clientes" / "222" / "arquivo" / "old.pfx")
+    touch(tmp_path / "tmp" / "c.pfx")
+
+    files = list_certificate_files(
+        tmp_path,
+        recursive=True,
+        include=parse_globs("clientes/*, root.pfx"),
+        exclude=parse_globs("*/arquivo"),
+    )
+
+    relative = [path.relative_to(tmp_path).as_posix() for path, _ in files]
+    assert relative == ["clientes/111/a.pfx", "clientes/222/b.pfx", "root.pfx"]
+
+
+def test_matches_globs_is_case_insensitive():
+    assert matches_globs("Clientes/A.PFX", include=("clientes/*",))
+    assert not matches_globs("clientes/a.pfx", exclude=("CLIENTES/*",))
+    assert parse_globs(" a/*, ,b ") == ("a/*", "b")
@@ -1,6 +1,7 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import importlib.util
+import uuid
 from pathlib import Path
 
 helpers_path = Path(__file__).resolve().parent / "helpers.py"
@@ -9,13 +10,25 @@ helpers = importlib.util.module_from_spec(helpers_spec)
 assert helpers_spec and helpers_spec.loader
 helpers_spec.loader.exec_module(helpers)
 
+import pytest
+from sqlalchemy import event
+
 from app import models
 from app.services import certificate_ingest
 from app.services.certificate_ingest import ParsedCertificate
+from app.services.pfx_strategies import StrategyLearner
 
 create_certificate = helpers.create_certificate
 create_user = helpers.create_user
 headers = helpers.headers
+write_pfx = helpers.write_pfx
+
+
+@pytest.fixture(autouse=True)
+def fresh_strategy_learner(monkeypatch):
+    monkeypatch.setattr(certificate_ingest, "STRATEGIES", StrategyLearner())
+    monkeypatch.setattr(certificate_ingest, "KNOWN_FAILURES", {})
+    monkeypatch.setattr(certificate_ingest, "QUARANTINED", {})
 
 
 def test_ingest_counts_and_preserves_valid_data(monkeypatch, tmp_path, test_client_and_session):
@@ -40,7 +53,7 @@ def test_ingest_counts_and_preserves_valid_data(monkeypatch, tmp_path, test_clie
     for filename in ["existing-fail.pfx", "existing-ok.pfx", "new-cert.pfx"]:
         (tmp_path / filename).write_text("dummy")
 
-    def fake_extract_metadata(path, _):
+    def fake_extract_metadata(path, _, **_kwargs):
         if path.name == "existing-ok.pfx":
             return (
                 ParsedCertificate(
@@ -103,9 +116,14 @@ def test_ingest_counts_and_preserves_valid_data(monkeypatch, tmp_path, test_clie
         "inserted": 1,
         "updated": 1,
         "failed": 1,
+        "unchanged": 0,
+        "negative_cache_hits": 0,
+        "quarantined": 0,
+        "quarantine_skipped": 0,
         "total": 3,
         "pruned": 0,
         "deduped": 0,
+        "decoders": {},
         "errors": [
             {"filename": "existing-fail.pfx", "reason": "failed to parse", "exception": None}
         ],
@@ -142,3 +160,1165 @@ def test_guess_password_variations():
     ]
     for filename, expected in cases:
         assert certificate_ingest._guess_password(Path(filename)) == expected
+
+
+def test_ingest_parallel_workers_parse_real_files(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    write_pfx(tmp_path / "alpha senha 1234.pfx", "1234", "Alpha")
+    write_pfx(tmp_path / "beta senha abc.pfx", "abc", "Beta")
+    write_pfx(tmp_path / "gamma.pfx", "", "Gamma")
+    (tmp_path / "broken.pfx").write_bytes(b"not a pfx")
+
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_batch_size", 2)
+
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, workers=2)
+
+    assert result["inserted"] == 3
+    assert result["failed"] == 1
+    assert result["total"] == 4
+    assert result["decoders"] == {"cryptography": 3}
+    with SessionLocal() as db:
+        subjects = {cert.name: cert.subject for cert in db.query(models.Certificate).all()}
+    assert subjects == {
+        "alpha senha 1234": "CN=Alpha",
+        "beta senha abc": "CN=Beta",
+        "gamma": "CN=Gamma",
+    }
+
+
+def test_parallel_parse_bounds_submissions_and_cancels_on_close(monkeypatch, tmp_path):
+    from concurrent.futures import Future
+
+    events: list[object] = []
+
+    class RecordingExecutor:
+        def __init__(self, **_kwargs):
+            pass
+
+        def submit(self, fn, chunk, org_id):
+            events.append(("submit", [path.name for path in chunk]))
+            future: Future = Future()
+            future.set_result(fn(chunk, org_id))
+            return future
+
+        def shutdown(self, *, wait, cancel_futures):
+            events.append(("shutdown", wait, cancel_futures))
+
+    monkeypatch.setattr(certificate_ingest, "ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(
+        certificate_ingest,
+        "_parse_certificate_file",
+        lambda path, _org_id=None: (ParsedCertificate(path, path.stem, *[None] * 8), False),
+    )
+    files = [tmp_path / f"{index:02}.pfx" for index in range(40)]
+
+    stream = certificate_ingest._iter_parsed_certificates(files, workers=2)
+    first, _ = next(stream)
+    # Chunks of 5 files, at most PARSE_WINDOW_PER_WORKER per worker in flight.
+    assert first.name == "00"
+    assert [event[0] for event in events] == ["submit"] * 4
+    stream.close()
+    assert events[-1] == ("shutdown", False, True)
+
+    events.clear()
+    parsed = [item.name for item, _ in certificate_ingest._iter_parsed_certificates(files, workers=2)]
+    assert parsed == [path.stem for path in files]
+    assert events.count(("shutdown", False, True)) == 1
+
+
+def test_ingest_rescan_skips_unchanged_files(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    write_pfx(tmp_path / "alpha senha 1234.pfx", "1234", "Alpha")
+    write_pfx(tmp_path / "beta.pfx", "", "Beta")
+    (tmp_path / "broken.pfx").write_bytes(b"not a pfx")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+
+    parsed_files: list[str] = []
+    real_extract = certificate_ingest._extract_metadata
+
+    def counting_extract(path, candidates, **kwargs):
+        parsed_files.append(path.name)
+        return real_extract(path, candidates, **kwargs)
+
+    monkeypatch.setattr(certificate_ingest, "_extract_metadata", counting_extract)
+
+    with SessionLocal() as db:
+        first = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+    assert (first["inserted"], first["failed"], first["unchanged"]) == (2, 1, 0)
+    assert len(parsed_files) == 3
+
+    parsed_files.clear()
+    with SessionLocal() as db:
+        second = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+    assert (second["inserted"], second["updated"], second["failed"]) == (0, 0, 0)
+    assert second["unchanged"] == 3
+    assert second["total"] == 3
+    assert parsed_files == []
+
+    write_pfx(tmp_path / "beta.pfx", "", "Beta Renewed")
+    with SessionLocal() as db:
+        third = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        renewed = db.query(models.Certificate).filter_by(name="beta").one()
+        manifest = db.get(models.CertIngestManifest, (1, str(tmp_path / "beta.pfx")))
+    assert (third["updated"], third["unchanged"]) == (1, 2)
+    assert parsed_files == ["beta.pfx"]
+    assert renewed.subject == "CN=Beta Renewed"
+    assert manifest.cert_id == renewed.id
+    assert manifest.content_hash is not None
+
+    parsed_files.clear()
+    with SessionLocal() as db:
+        forced = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, full_rescan=True)
+    assert forced["unchanged"] == 0
+    assert len(parsed_files) == 3
+
+    # The rescan decision reads plain rows; nothing is tracked by the session.
+    with SessionLocal() as db:
+        manifest = certificate_ingest._load_manifest(db, org_id=1)
+        assert len(manifest) == 3
+        assert len(db.identity_map) == 0
+
+
+def test_duplicate_stems_are_reported_instead_of_overwritten(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    _, SessionLocal = test_client_and_session
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    write_pfx(tmp_path / "a" / "cert.pfx", "", "Alpha")
+    write_pfx(tmp_path / "b" / "cert.pfx", "", "Beta")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    duplicate_error = certificate_ingest.DUPLICATE_NAME_ERROR.format(
+        name="cert", other=tmp_path / "a" / "cert.pfx"
+    )
+
+    with SessionLocal() as db:
+        first = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, recursive=True)
+        stored = db.query(models.Certificate).filter_by(name="cert").one()
+    assert (first["inserted"], first["failed"]) == (1, 1)
+    assert first["errors"] == [
+        {"filename": "cert.pfx", "reason": duplicate_error, "exception": None}
+    ]
+    assert stored.subject == "CN=Alpha"
+    assert stored.source_path == str(tmp_path / "a" / "cert.pfx")
+
+    # The rescan keeps reporting the collision rather than hiding it as unchanged.
+    with SessionLocal() as db:
+        second = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, recursive=True)
+        manifest_paths = {entry.path for entry in db.query(models.CertIngestManifest)}
+    assert (second["unchanged"], second["failed"]) == (1, 1)
+    assert manifest_paths == {str(tmp_path / "a" / "cert.pfx")}
+
+    (tmp_path / "a" / "cert.pfx").unlink()
+    with SessionLocal() as db:
+        third = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, recursive=True)
+        stored = db.query(models.Certificate).filter_by(name="cert").one()
+    assert (third["updated"], third["failed"]) == (1, 0)
+    assert stored.subject == "CN=Beta"
+
+
+def test_match_index_resolves_without_per_file_queries(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    with SessionLocal() as db:
+        by_sha1 = create_certificate(db, name="renamed-on-disk", sha1_fingerprint="SHA-1")
+        by_name = create_certificate(db, name="cert-3")
+
+    def fake_extract_metadata(path, _, **_kwargs):
+        index = int(path.stem.split("-")[1])
+        return (
+            ParsedCertificate(
+                path=path,
+                name=path.stem,
+                subject=f"CN={path.stem}",
+                issuer=None,
+                serial_number=f"SER-{index}",
+                not_before=None,
+                not_after=None,
+                sha1_fingerprint=f"SHA-{index}",
+                password_used=None,
+                parse_error=None,
+            ),
+            True,
+        )
+
+    for index in range(1, 21):
+        (tmp_path / f"cert-{index}.pfx").write_text("dummy")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_batch_size", 10)
+    monkeypatch.setattr(certificate_ingest, "_extract_metadata", fake_extract_metadata)
+
+    with SessionLocal() as db:
+        selects: list[str] = []
+
+        def count_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", count_selects)
+        try:
+            result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_selects)
+
+    assert (result["inserted"], result["updated"]) == (18, 2)
+    # manifest + parse failures + index preload, then per batch of 10 files one
+    # certificate load and one load of the manifest entries it writes
+    assert len(selects) <= 7
+    with SessionLocal() as db:
+        assert db.get(models.Certificate, by_sha1.id).subject == "CN=cert-1"
+        assert db.get(models.Certificate, by_name.id).sha1_fingerprint == "SHA-3"
+        assert db.query(models.Certificate).count() == 20
+
+
+def test_match_index_tracks_rekeyed_rows():
+    index = certificate_ingest.CertificateMatchIndex(org_id=1)
+    first, second = uuid.uuid4(), uuid.uuid4()
+    index.add(first, sha1="A", serial="S1", name="one")
+    index.add(second, sha1=None, serial="S2", name="two")
+
+    assert index.resolve(sha1="A", serial="S2", name="two") == first
+    assert index.resolve(sha1="Z", serial="S2", name="one") == second
+    assert index.resolve(sha1=None, serial=None, name="one") == first
+
+    index.add(first, sha1="B", serial="S1", name="one")
+    assert index.resolve(sha1="A", serial=None, name="missing") is None
+    assert index.resolve(sha1="B", serial=None, name="missing") == first
+    assert first in index and len(index) == 2
+
+
+def test_bulk_write_upserts_and_marks_failures(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    with SessionLocal() as db:
+        existing_ok = create_certificate(db, name="existing-ok", sha1_fingerprint="SHA-OK")
+        existing_fail = create_certificate(
+            db, name="existing-fail", subject="Keep Subject", sha1_fingerprint="SHA-FAIL"
+        )
+
+    for filename in ["existing-fail.pfx", "existing-ok.pfx", "new-a.pfx", "new-b.p12", "new-b.pfx"]:
+        (tmp_path / filename).write_text("dummy")
+
+    def fake_extract_metadata(path, _, **_kwargs):
+        if path.stem == "existing-fail":
+            return (
+                ParsedCertificate(
+                    path=path,
+                    name=path.stem,
+                    subject=None,
+                    issuer=None,
+                    serial_number=None,
+                    not_before=None,
+                    not_after=None,
+                    sha1_fingerprint=None,
+                    password_used=None,
+                    parse_error="bad password",
+                ),
+                False,
+            )
+        return (
+            ParsedCertificate(
+                path=path,
+                name=path.stem,
+                subject=f"CN={path.name}",
+                issuer="Issuer",
+                serial_number=f"SER-{path.stem}",
+                not_before=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                not_after=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                sha1_fingerprint="SHA-OK" if path.stem == "existing-ok" else f"SHA-{path.stem}",
+                password_used=None,
+                parse_error=None,
+            ),
+            True,
+        )
+
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest, "_extract_metadata", fake_extract_metadata)
+
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, bulk_write=True)
+
+    # new-b.p12 and new-b.pfx share a name: the second one is reported, not written.
+    assert (result["inserted"], result["updated"], result["failed"]) == (2, 1, 2)
+    with SessionLocal() as db:
+        updated = db.get(models.Certificate, existing_ok.id)
+        failed = db.get(models.Certificate, existing_fail.id)
+        new_b = db.query(models.Certificate).filter_by(name="new-b").one()
+        manifest = db.get(models.CertIngestManifest, (1, str(tmp_path / "new-a.pfx")))
+        new_a = db.query(models.Certificate).filter_by(name="new-a").one()
+
+        assert updated.subject == "CN=existing-ok.pfx"
+        assert updated.parse_ok is True
+        assert failed.subject == "Keep Subject"
+        assert failed.parse_ok is False
+        assert failed.parse_error == "bad password"
+        assert failed.source_path == str(tmp_path / "existing-fail.pfx")
+        assert new_b.subject == "CN=new-b.p12"
+        assert manifest.cert_id == new_a.id
+        assert db.query(models.Certificate).count() == 4
+
+
+def test_extract_metadata_falls_back_to_in_process_legacy_decoder(monkeypatch, tmp_path):
+    path = tmp_path / "legacy senha abc.pfx"
+    write_pfx(path, "abc", "Legacy")
+
+    reads: list[Path] = []
+    real_open = Path.open
+
+    def counting_open(self, mode="r", *args, **kwargs):
+        reads.append(self)
+        return real_open(self, mode, *args, **kwargs)
+
+    def unsupported(_raw_bytes, _password):
+        raise ValueError("unsupported algorithm")
+
+    def no_subprocess(*_args, **_kwargs):
+        raise AssertionError("openssl fallback should not run")
+
+    monkeypatch.setattr(certificate_ingest, "load_pkcs12_metadata", unsupported)
+    monkeypatch.setattr(certificate_ingest, "_run_openssl_extract", no_subprocess)
+    monkeypatch.setattr(Path, "open", counting_open)
+    before = certificate_ingest.DECODER_STATS["legacy"]
+
+    parsed, success = certificate_ingest._extract_metadata(
+        path, certificate_ingest._candidate_passwords(path)
+    )
+
+    assert success is True
+    assert parsed.decoder == "legacy"
+    assert parsed.subject == "CN=Legacy"
+    assert parsed.password_used == "abc"
+    assert parsed.content_hash is not None
+    assert certificate_ingest.DECODER_STATS["legacy"] == before + 1
+    # every decoder and password candidate shares a single read of the file
+    assert reads == [path]
+
+
+def test_openssl_fallback_reads_bundle_from_stdin(monkeypatch, tmp_path):
+    path = tmp_path / "fallback senha abc.pfx"
+    write_pfx(path, "abc", "Fallback")
+    calls: list[tuple[list[str], bytes]] = []
+
+    def fake_check_output(cmd, input=None, stderr=None, timeout=None):
+        # Every openssl call is bounded by what is left of the per-file budget.
+        assert 0 < timeout <= certificate_ingest.settings.ingest_file_timeout_seconds
+        calls.append((cmd, input))
+        if cmd[1] == "pkcs12":
+            return b"-----BEGIN CERTIFICATE-----"
+        return (
+            b"subject=CN = Fallback\nissuer=CN = Fallback\nserial=0A\n"
+            b"notBefore=Jan  1 00:00:00 2024 GMT\nnotAfter=Jan  1 00:00:00 2026 GMT\n"
+            b"sha1 Fingerprint=AA:BB\n"
+        )
+
+    def unsupported(_raw_bytes, _password):
+        raise ValueError("unsupported algorithm")
+
+    monkeypatch.setattr(certificate_ingest, "load_pkcs12_metadata", unsupported)
+    monkeypatch.setattr(certificate_ingest, "load_pkcs12_legacy_metadata", unsupported)
+    monkeypatch.setattr(certificate_ingest.subprocess, "check_output", fake_check_output)
+
+    parsed, success = certificate_ingest._extract_metadata(
+        path, certificate_ingest._candidate_passwords(path)
+    )
+
+    assert success is True
+    assert parsed.decoder == "openssl"
+    assert parsed.sha1_fingerprint == "AABB"
+    pkcs12_cmd, pkcs12_input = calls[0]
+    assert "-in" not in pkcs12_cmd
+    assert pkcs12_input == path.read_bytes()
+
+
+def test_learned_strategy_is_tried_first(monkeypatch, tmp_path):
+    # The filename suggests a password, but the bundle actually has none.
+    first = tmp_path / "first senha 123.pfx"
+    second = tmp_path / "second senha 456.pfx"
+    write_pfx(first, "", "First")
+    write_pfx(second, "", "Second")
+    attempts: list[tuple[str, str]] = []
+    real_load = certificate_ingest.load_pkcs12_metadata
+
+    def recording_load(raw_bytes, password):
+        attempts.append(("cryptography", password))
+        return real_load(raw_bytes, password)
+
+    monkeypatch.setattr(certificate_ingest, "load_pkcs12_metadata", recording_load)
+
+    parsed, success = certificate_ingest._extract_metadata(
+        first, certificate_ingest._candidate_passwords(first)
+    )
+    assert success is True
+    assert parsed.strategy == "cryptography:empty"
+    assert attempts == [("cryptography", "123"), ("cryptography", "")]
+
+    attempts.clear()
+    certificate_ingest._extract_metadata(first, certificate_ingest._candidate_passwords(first))
+    assert attempts == [("cryptography", "")]
+
+    # A different file benefits from the global success statistics.
+    attempts.clear()
+    parsed, _ = certificate_ingest._extract_metadata(
+        second, certificate_ingest._candidate_passwords(second)
+    )
+    assert parsed.subject == "CN=Second"
+    assert attempts == [("cryptography", "")]
+
+
+def test_strategy_is_persisted_in_manifest_and_seeds_learner(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    path = tmp_path / "alpha senha 1234.pfx"
+    write_pfx(path, "1234", "Alpha")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+
+    with SessionLocal() as db:
+        certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        entry = db.get(models.CertIngestManifest, (1, str(path)))
+        assert entry.strategy == "cryptography:raw"
+        content_hash = entry.content_hash
+
+    learner = StrategyLearner()
+    monkeypatch.setattr(certificate_ingest, "STRATEGIES", learner)
+    with SessionLocal() as db:
+        certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+    assert learner.hint(content_hash) == "cryptography:raw"
+    assert learner.successes["cryptography:raw"] == 1
+
+
+def test_negative_cache_skips_known_broken_files(monkeypatch, tmp_path, test_client_and_session):
+    client, SessionLocal = test_client_and_session
+    with SessionLocal() as db:
+        dev = create_user(db, role="DEV")
+    broken = tmp_path / "broken senha 123.pfx"
+    broken.write_bytes(b"not a pfx")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    decode_calls: list[str] = []
+    real_decode = certificate_ingest._decode
+
+    def counting_decode(decoder, raw_bytes, password):
+        decode_calls.append(decoder)
+        return real_decode(decoder, raw_bytes, password)
+
+    monkeypatch.setattr(certificate_ingest, "_decode", counting_decode)
+
+    with SessionLocal() as db:
+        first = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        entry = db.query(models.CertParseFailure).one()
+    assert first["failed"] == 1
+    assert first["negative_cache_hits"] == 0
+    assert entry.parser_version == certificate_ingest.PARSER_VERSION
+    assert decode_calls
+
+    # A watcher event on the unchanged file costs one hash, not a decode cascade.
+    certificate_ingest.KNOWN_FAILURES.clear()
+    certificate_ingest.KNOWN_FAILURES[2] = {"other org": "kept"}
+    decode_calls.clear()
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificate_from_path(db, org_id=1, path=broken)
+        entry = db.query(models.CertParseFailure).one()
+    assert result["action"] == "failed"
+    assert result["error"] == first["errors"][0]["reason"]
+    assert decode_calls == []
+    assert entry.hits == 1
+
+    # Renaming changes the password candidates, so the file is retried.
+    renamed = tmp_path / "broken senha 456.pfx"
+    broken.rename(renamed)
+    with SessionLocal() as db:
+        certificate_ingest.ingest_certificate_from_path(db, org_id=1, path=renamed)
+    assert decode_calls
+
+    response = client.delete("/api/v1/admin/certificates/parse-failures", headers=headers(dev))
+    assert response.status_code == 200
+    assert response.json() == {"cleared": 1}
+    # Only the caller's org is dropped from the in-memory cache.
+    assert certificate_ingest.KNOWN_FAILURES == {2: {"other org": "kept"}}
+
+
+def test_rescan_retries_failures_once_negative_cache_is_dropped(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    _, SessionLocal = test_client_and_session
+    (tmp_path / "broken senha 123.pfx").write_bytes(b"not a pfx")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    decode_calls: list[str] = []
+    real_decode = certificate_ingest._decode
+
+    def counting_decode(decoder, raw_bytes, password):
+        decode_calls.append(decoder)
+        return real_decode(decoder, raw_bytes, password)
+
+    monkeypatch.setattr(certificate_ingest, "_decode", counting_decode)
+
+    def rescan() -> tuple[int, int]:
+        with SessionLocal() as db:
+            result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        return result["failed"], result["unchanged"]
+
+    assert rescan() == (1, 0)
+    assert rescan() == (0, 1)
+
+    with SessionLocal() as db:
+        certificate_ingest.clear_parse_failures(db, org_id=1)
+        db.commit()
+    decode_calls.clear()
+    assert rescan() == (1, 0)
+    assert decode_calls
+
+    monkeypatch.setattr(certificate_ingest, "PARSER_VERSION", "next")
+    decode_calls.clear()
+    assert rescan() == (1, 0)
+    assert decode_calls
+    assert rescan() == (0, 1)
+
+
+def test_openssl_subprocess_respects_parse_deadline(monkeypatch, tmp_path):
+    import time
+
+    from app.services.pkcs12_legacy import DecodeDeadlineExceeded, decode_deadline
+
+    slow_openssl = tmp_path / "openssl"
+    slow_openssl.write_text("#!/bin/sh\nsleep 5\n")
+    slow_openssl.chmod(0o755)
+    monkeypatch.setattr(certificate_ingest.settings, "openssl_path", slow_openssl)
+
+    started = time.monotonic()
+    with pytest.raises(DecodeDeadlineExceeded), decode_deadline(started + 0.2):
+        certificate_ingest._run_openssl_extract(b"pfx", "123")
+    assert time.monotonic() - started < 2
+
+
+def test_slow_files_are_quarantined_until_content_changes(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    import time
+
+    _client, SessionLocal = test_client_and_session
+    slow = tmp_path / "slow senha 123.pfx"
+    slow.write_bytes(b"pathological")
+    write_pfx(tmp_path / "fast senha 123.pfx", "123", "fast")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_file_timeout_seconds", 0.05)
+    decode_calls: list[str] = []
+    real_decode = certificate_ingest._decode
+
+    def slow_decode(decoder, raw_bytes, password):
+        decode_calls.append(decoder)
+        if raw_bytes == b"pathological":
+            time.sleep(0.06)
+        return real_decode(decoder, raw_bytes, password)
+
+    monkeypatch.setattr(certificate_ingest, "_decode", slow_decode)
+
+    with SessionLocal() as db:
+        first = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        entry = db.query(models.CertParseFailure).one()
+    assert (first["inserted"], first["failed"]) == (1, 1)
+    assert (first["quarantined"], first["quarantine_skipped"]) == (1, 0)
+    assert "quarantined" in first["errors"][0]["reason"]
+    assert entry.quarantined is True
+    # One slow attempt used the whole budget; the cascade stopped there.
+    assert decode_calls.count(certificate_ingest.DECODER_CRYPTOGRAPHY) == 2
+
+    # Quarantine ignores the password candidates, so a rename does not retry it.
+    certificate_ingest.QUARANTINED.clear()
+    slow.rename(tmp_path / "slow senha 456.pfx")
+    decode_calls.clear()
+    with SessionLocal() as db:
+        second = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, full_rescan=True)
+    assert (second["quarantined"], second["quarantine_skipped"]) == (0, 1)
+    assert second["negative_cache_hits"] == 0
+    assert decode_calls == [certificate_ingest.DECODER_CRYPTOGRAPHY]
+
+    (tmp_path / "slow senha 456.pfx").write_bytes(b"still broken")
+    with SessionLocal() as db:
+        third = certificate_ingest.ingest_certificates_from_fs(db, org_id=1)
+        entry = db.query(models.CertParseFailure).filter_by(quarantined=False).one()
+    assert (third["failed"], third["quarantined"], third["quarantine_skipped"]) == (1, 0, 0)
+    assert entry.parse_error != first["errors"][0]["reason"]
+
+
+def test_oversized_and_costly_bundles_are_refused_before_decoding(monkeypatch, tmp_path):
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.serialization import pkcs12
+
+    key, cert = helpers.self_signed_certificate("Costly")
+    encryption = (
+        serialization.PrivateFormat.PKCS12.encryption_builder()
+        .kdf_rounds(5000)
+        .key_cert_algorithm(pkcs12.PBES.PBESv2SHA256AndAES256CBC)
+        .hmac_hash(hashes.SHA256())
+        .build(b"123")
+    )
+    costly = tmp_path / "costly senha 123.pfx"
+    costly.write_bytes(pkcs12.serialize_key_and_certificates(b"a1", key, cert, None, encryption))
+    huge = tmp_path / "huge.pfx"
+    huge.write_bytes(b"\0" * 4096)
+    decode_calls: list[str] = []
+    monkeypatch.setattr(
+        certificate_ingest, "_decode", lambda decoder, *_args: decode_calls.append(decoder)
+    )
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_max_kdf_iterations", 4096)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_max_file_bytes", 4095)
+
+    parsed, success = certificate_ingest._extract_metadata(costly, ["123"])
+    assert success is False
+    assert parsed.parse_error == "KDF iteration count 5000 exceeds 4096; not parsed"
+    assert parsed.content_hash is not None
+
+    parsed, success = certificate_ingest._extract_metadata(huge, [""])
+    assert success is False
+    assert parsed.parse_error == "file exceeds 4095 bytes; not parsed"
+    assert decode_calls == []
+
+
+def test_ingest_job_reports_progress_and_result(monkeypatch, tmp_path, test_client_and_session):
+    import time
+    from types import SimpleNamespace
+
+    from rq.job import JobStatus
+
+    from app.api.v1.endpoints import admin
+    from app.workers import jobs_certificates
+
+    client, SessionLocal = test_client_and_session
+    with SessionLocal() as db:
+        dev = create_user(db, role="DEV")
+        dev_id = dev.id
+    for index in range(3):
+        write_pfx(tmp_path / f"cert-{index} senha 123.pfx", "123", f"cert-{index}")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_batch_size", 2)
+
+    class FakeJob:
+        def __init__(self, func, args, job_id, meta):
+            self.id = job_id
+            self.func = func
+            self.args = args
+            self.meta = dict(meta)
+            self.status = JobStatus.QUEUED
+            self.exc_info = None
+            self.result = None
+            self.snapshots: list[dict] = []
+
+        def get_status(self):
+            return self.status
+
+        def save_meta(self):
+            self.snapshots.append(dict(self.meta["progress"]))
+
+        def return_value(self):
+            return self.result
+
+    class FakeQueue:
+        jobs: dict[str, FakeJob] = {}
+
+        def enqueue(self, func, *args, job_id=None, meta=None, **kwargs):
+            job = FakeJob(func, args, job_id, meta or {})
+            self.jobs[job_id] = job
+            return job
+
+        def fetch_job(self, job_id):
+            return self.jobs.get(job_id)
+
+    def enqueue_unique(queue, func, *args, job_id, **kwargs):
+        existing = queue.fetch_job(job_id)
+        if existing is not None and existing.status in {JobStatus.QUEUED, JobStatus.STARTED}:
+            return existing, True
+        return queue.enqueue(func, *args, job_id=job_id, **kwargs), False
+
+    monkeypatch.setattr(admin, "get_queue", FakeQueue)
+    monkeypatch.setattr(admin, "enqueue_unique_atomic", enqueue_unique)
+    monkeypatch.setattr(jobs_certificates, "SessionLocal", SessionLocal)
+
+    response = client.post(
+        "/api/v1/admin/certificates/ingest-jobs", json={}, headers=headers(dev)
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert job_id == "ingest-fs-org-1"
+    assert response.json()["status"] == "queued"
+    job = FakeQueue.jobs[job_id]
+    assert job.args[:2] == (1, str(dev_id))
+
+    # The org already has an ingest queued: a second one is refused.
+    duplicate = client.post(
+        "/api/v1/admin/certificates/ingest-jobs", json={}, headers=headers(dev)
+    )
+    assert duplicate.status_code == 409
+    assert FakeQueue.jobs[job_id] is job
+
+    job.status = JobStatus.STARTED
+    monkeypatch.setattr(jobs_certificates, "get_current_job", lambda: job)
+    job.result = job.func(*job.args)
+    assert [snapshot["processed"] for snapshot in job.snapshots] == [0, 2, 3]
+    assert [snapshot["parsed"] for snapshot in job.snapshots] == [0, 2, 3]
+    assert job.snapshots[-1]["inserted"] == 3
+
+    status_response = client.get(
+        f"/api/v1/admin/certificates/ingest-jobs/{job_id}", headers=headers(dev)
+    )
+    body = status_response.json()
+    assert body["status"] == "started"
+    assert (body["processed"], body["total"], body["inserted"]) == (3, 3, 3)
+    assert body["eta_seconds"] == 0
+    assert body["result"] is None
+
+    # On a rescan most files are unchanged; the ETA follows the decode rate.
+    job.meta["progress"] = {
+        **job.snapshots[-1],
+        "processed": 90,
+        "total": 100,
+        "parsed": 1,
+        "to_parse": 11,
+        "started_at": time.time() - 10,
+    }
+    body = client.get(
+        f"/api/v1/admin/certificates/ingest-jobs/{job_id}", headers=headers(dev)
+    ).json()
+    assert 95 <= body["eta_seconds"] <= 105
+
+    job.status = JobStatus.FINISHED
+    body = client.get(
+        f"/api/v1/admin/certificates/ingest-jobs/{job_id}", headers=headers(dev)
+    ).json()
+    assert body["status"] == "finished"
+    assert body["result"]["inserted"] == 3
+    assert body["eta_seconds"] is None
+    with SessionLocal() as db:
+        assert db.query(models.Certificate).count() == 3
+        assert db.query(models.AuditLog).filter_by(action="CERT_INGEST_FROM_FS").count() == 1
+
+    missing = client.get(
+        "/api/v1/admin/certificates/ingest-jobs/missing", headers=headers(dev)
+    )
+    assert missing.status_code == 404
+
+    # Once the run is finished the org can start another.
+    again = client.post("/api/v1/admin/certificates/ingest-jobs", json={}, headers=headers(dev))
+    assert again.status_code == 202
+    assert FakeQueue.jobs[job_id] is not job
+
+
+def test_ingest_stream_yields_ndjson_events(monkeypatch, tmp_path, test_client_and_session):
+    import json
+
+    from app.api.v1.endpoints import admin
+
+    client, SessionLocal = test_client_and_session
+    monkeypatch.setattr(admin, "SessionLocal", SessionLocal)
+    with SessionLocal() as db:
+        dev = create_user(db, role="DEV")
+    write_pfx(tmp_path / "good senha 123.pfx", "123", "good")
+    (tmp_path / "broken.pfx").write_bytes(b"not a pfx")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+
+    with client.stream(
+        "POST", "/api/v1/admin/certificates/ingest-from-fs/stream", json={}, headers=headers(dev)
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert [event["type"] for event in events] == ["progress", "file", "file", "progress", "summary"]
+    files = {event["file"]: event for event in events if event["type"] == "file"}
+    assert files["good senha 123.pfx"]["action"] == "inserted"
+    assert files["good senha 123.pfx"]["decoder"] == "cryptography"
+    assert files["broken.pfx"]["action"] == "failed"
+    assert events[-1]["inserted"] == 1
+    assert events[-1]["failed"] == 1
+    with SessionLocal() as db:
+        assert db.query(models.AuditLog).filter_by(action="CERT_INGEST_FROM_FS").count() == 1
+
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path / "missing")
+    response = client.post(
+        "/api/v1/admin/certificates/ingest-from-fs/stream", json={}, headers=headers(dev)
+    )
+    assert response.status_code == 400
+
+
+def test_ingest_stream_rescans_modified_file(monkeypatch, tmp_path, test_client_and_session):
+    import json
+
+    from sqlalchemy.orm import Session, sessionmaker
+
+    from app.api.v1.endpoints import admin
+
+    client, SessionLocal = test_client_and_session
+    # Same engine, production session semantics (expire on commit).
+    StreamSession = sessionmaker(
+        bind=SessionLocal.kw["bind"], autoflush=False, autocommit=False, class_=Session
+    )
+    monkeypatch.setattr(admin, "SessionLocal", StreamSession)
+    with SessionLocal() as db:
+        dev = create_user(db, role="DEV")
+    target = tmp_path / "rescan senha 123.pfx"
+    write_pfx(target, "123", "rescan")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+
+    def stream():
+        with client.stream(
+            "POST", "/api/v1/admin/certificates/ingest-from-fs/stream", json={}, headers=headers(dev)
+        ) as response:
+            assert response.status_code == 200
+            return [json.loads(line) for line in response.iter_lines() if line]
+
+    assert stream()[-1]["inserted"] == 1
+    write_pfx(target, "123", "rescan")
+    events = stream()
+
+    assert [event["action"] for event in events if event["type"] == "file"] == ["updated"]
+    assert events[-1]["updated"] == 1
+    with SessionLocal() as db:
+        manifest = db.get(models.CertIngestManifest, (1, str(target)))
+        runs = {(run.status, run.inserted, run.updated) for run in db.query(models.CertIngestRun)}
+        assert manifest.mtime_ns == target.stat().st_mtime_ns
+        assert runs == {
+            (certificate_ingest.INGEST_RUN_STATUS_DONE, 1, 0),
+            (certificate_ingest.INGEST_RUN_STATUS_DONE, 0, 1),
+        }
+        assert db.query(models.AuditLog).filter_by(action="CERT_INGEST_FROM_FS").count() == 2
+
+
+def test_interrupted_ingest_resumes_from_checkpoint(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    parsed_names: list[str] = []
+    fail_on = {"cert-4"}
+
+    def fake_extract_metadata(path, _, **_kwargs):
+        if path.stem in fail_on:
+            raise RuntimeError("worker lost")
+        parsed_names.append(path.stem)
+        return (
+            ParsedCertificate(
+                path=path,
+                name=path.stem,
+                subject=f"CN={path.stem}",
+                issuer=None,
+                serial_number=path.stem,
+                not_before=None,
+                not_after=None,
+                sha1_fingerprint=path.stem,
+                password_used=None,
+                parse_error=None,
+            ),
+            True,
+        )
+
+    for index in range(1, 6):
+        (tmp_path / f"cert-{index}.pfx").write_text("dummy")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", tmp_path)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_batch_size", 2)
+    monkeypatch.setattr(certificate_ingest, "_extract_metadata", fake_extract_metadata)
+
+    with SessionLocal() as db:
+        with pytest.raises(RuntimeError):
+            certificate_ingest.ingest_certificates_from_fs(db, org_id=1, full_rescan=True)
+        db.rollback()
+        run = db.query(models.CertIngestRun).one()
+        assert run.status == models.INGEST_RUN_STATUS_RUNNING
+        assert run.last_path == str(tmp_path / "cert-2.pfx")
+        assert db.query(models.Certificate).count() == 2
+        assert len(db.identity_map) <= 1
+
+    fail_on.clear()
+    parsed_names.clear()
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, resume=True)
+        run = db.query(models.CertIngestRun).one()
+        assert run.status == models.INGEST_RUN_STATUS_DONE
+        assert db.query(models.Certificate).count() == 5
+
+    # full_rescan comes from the checkpoint, so cert-3 is parsed again.
+    assert parsed_names == ["cert-3", "cert-4", "cert-5"]
+    assert (result["inserted"], result["total"]) == (5, 5)
+
+
+def test_prune_skipped_when_walk_is_incomplete(monkeypatch, tmp_path, test_client_and_session):
+    import os
+
+    _, SessionLocal = test_client_and_session
+    root = tmp_path / "certs"
+    (root / "cliente").mkdir(parents=True)
+    (root / "cliente" / "hidden.pfx").write_bytes(b"x")
+    with SessionLocal() as db:
+        create_certificate(db, name="hidden", source_path=str(root / "cliente" / "hidden.pfx"))
+        create_certificate(db, name="gone", source_path=str(root / "gone.pfx"))
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", root)
+    real_scandir = os.scandir
+
+    def scandir(path="."):
+        if os.path.basename(path) == "cliente":
+            raise PermissionError(13, "Permission denied", str(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(
+            db, org_id=1, prune_missing=True, recursive=True
+        )
+        remaining = {cert.name for cert in db.query(models.Certificate)}
+
+    assert result["pruned"] == 0
+    assert remaining == {"hidden", "gone"}
+    assert result["errors"] == [
+        {
+            "filename": str(root / "cliente"),
+            "reason": certificate_ingest.UNREADABLE_PATH_ERROR,
+            "exception": None,
+        }
+    ]
+
+
+def test_prune_missing_uses_directory_snapshot(monkeypatch, tmp_path, test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    root = tmp_path / "certs"
+    root.mkdir()
+    elsewhere = tmp_path / "elsewhere.pfx"
+    elsewhere.write_bytes(b"x")
+    with SessionLocal() as db:
+        kept = create_certificate(db, name="kept", source_path=str(root / "kept.pfx"))
+        gone = create_certificate(db, name="gone", source_path=str(root / "gone.pfx"))
+        outside = create_certificate(db, name="outside", source_path=str(elsewhere))
+        outside_gone = create_certificate(
+            db, name="outside-gone", source_path=str(tmp_path / "missing.pfx")
+        )
+        no_path = create_certificate(db, name="no-path")
+    (root / "kept.pfx").write_bytes(b"x")
+    monkeypatch.setattr(certificate_ingest.settings, "certs_root_path", root)
+    monkeypatch.setattr(
+        certificate_ingest,
+        "_extract_metadata",
+        lambda path, _, **_kwargs: (certificate_ingest._failed_certificate(path, "bad"), False),
+    )
+    stat_calls: list[str] = []
+    real_exists = Path.exists
+
+    def counting_exists(self, *args, **kwargs):
+        stat_calls.append(self.name)
+        return real_exists(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "exists", counting_exists)
+
+    with SessionLocal() as db:
+        result = certificate_ingest.ingest_certificates_from_fs(db, org_id=1, prune_missing=True)
+        remaining = {cert.name for cert in db.query(models.Certificate)}
+
+    assert result["pruned"] == 2
+    assert remaining == {kept.name, outside.name, no_path.name}
+    assert gone.name not in remaining and outside_gone.name not in remaining
+    # Only certificates outside the walked root are stat'ed individually.
+    assert sorted(name for name in stat_calls if name.endswith(".pfx")) == [
+        "elsewhere.pfx",
+        "missing.pfx",
+    ]
+
+
+def test_dedupe_keeps_latest_per_sha1_then_serial(test_client_and_session):
+    _, SessionLocal = test_client_and_session
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        old = create_certificate(
+            db, name="old", sha1_fingerprint="AA", last_ingested_at=now - timedelta(days=2)
+        )
+        new = create_certificate(db, name="new", sha1_fingerprint="AA", last_ingested_at=now)
+        never = create_certificate(db, name="never", sha1_fingerprint="AA")
+        serial_old = create_certificate(
+            db, name="serial-old", serial_number="S1", last_ingested_at=now - timedelta(days=1)
+        )
+        serial_new = create_certificate(
+            db, name="serial-new", serial_number="S1", last_ingested_at=now
+        )
+        # Has a sha1, so it is not grouped with the serial-only rows.
+        serial_with_sha1 = create_certificate(
+            db, name="with-sha1", serial_number="S1", sha1_fingerprint="BB"
+        )
+        other_org = models.Certificate(org_id=2, name="other", sha1_fingerprint="AA")
+        db.add(other_org)
+        db.commit()
+
+        removed = certificate_ingest._dedupe_certificates(db, org_id=1)
+        db.commit()
+        remaining = {cert.name for cert in db.query(models.Certificate)}
+
+    assert removed == 3
+    assert remaining == {new.name, serial_new.name, serial_with_sha1.name, "other"}
+    assert not {old.name, never.name, serial_old.name} & remaining
+
+
+def test_process_pfx_events_applies_batch_in_one_session(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    from app.workers import jobs_certificates
+
+    _client, SessionLocal = test_client_and_session
+    sessions = []
+
+    def counting_session():
+        sessions.append(1)
+        return SessionLocal()
+
+    monkeypatch.setattr(jobs_certificates, "SessionLocal", counting_session)
+    for index in range(3):
+        write_pfx(tmp_path / f"batch-{index} senha 123.pfx", "123", f"batch-{index}")
+    gone = tmp_path / "gone.pfx"
+    with SessionLocal() as db:
+        create_certificate(db, name="gone", source_path=str(gone.resolve()))
+
+    events = [("ingest", str(tmp_path / f"batch-{index} senha 123.pfx")) for index in range(3)]
+    events += [("delete", str(gone)), ("ingest", str(tmp_path / "vanished.pfx"))]
+    results = jobs_certificates.process_pfx_events(1, events)
+
+    assert sessions == [1]
+    assert [result["action"] for result in results] == [
+        "inserted",
+        "inserted",
+        "inserted",
+        "deleted",
+        "missing",
+    ]
+    with SessionLocal() as db:
+        names = sorted(cert.name for cert in db.query(models.Certificate))
+    assert names == ["batch-0 senha 123", "batch-1 senha 123", "batch-2 senha 123"]
+
+
+def test_ingest_pfx_batch_commits_per_chunk(monkeypatch, tmp_path, test_client_and_session):
+    from app.workers import jobs_certificates
+
+    _client, SessionLocal = test_client_and_session
+    commits = []
+
+    def counting_session():
+        db = SessionLocal()
+        commit = db.commit
+
+        def counted_commit():
+            commits.append(1)
+            commit()
+
+        db.commit = counted_commit
+        return db
+
+    monkeypatch.setattr(jobs_certificates, "SessionLocal", counting_session)
+    monkeypatch.setattr(certificate_ingest.settings, "ingest_batch_size", 2)
+    paths = []
+    for index in range(3):
+        paths.append(tmp_path / f"chunk-{index} senha 123.pfx")
+        write_pfx(paths[-1], "123", f"chunk-{index}")
+    (tmp_path / "broken senha 123.pfx").write_bytes(b"not a pfx")
+    with SessionLocal() as db:
+        existing = create_certificate(db, name="chunk-0 senha 123")
+        existing_id = existing.id
+
+    results = jobs_certificates.ingest_pfx_batch(
+        1,
+        [
+            str(paths[0]),
+            str(paths[1]),
+            str(paths[0]),
+            str(tmp_path / "broken senha 123.pfx"),
+            str(paths[2]),
+            str(tmp_path / "vanished.pfx"),
+        ],
+    )
+
+    assert [(Path(result["path"]).name, result["action"]) for result in results] == [
+        (paths[0].name, "updated"),
+        (paths[1].name, "inserted"),
+        ("broken senha 123.pfx", "failed"),
+        (paths[2].name, "inserted"),
+        ("vanished.pfx", "missing"),
+    ]
+    assert results[0]["cert_id"] == existing_id
+    assert len(commits) == 2
+    with SessionLocal() as db:
+        manifest = {entry.path for entry in db.query(models.CertIngestManifest)}
+        assert db.query(models.Certificate).count() == 3
+    assert manifest == {str(path.resolve()) for path in paths} | {
+        str((tmp_path / "broken senha 123.pfx").resolve())
+    }
+
+
+def test_reconcile_directories_only_touches_differences(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    _client, SessionLocal = test_client_and_session
+    folder = tmp_path / "cliente"
+    folder.mkdir()
+    kept = folder / "kept senha 123.pfx"
+    write_pfx(kept, "123", "kept")
+    with SessionLocal() as db:
+        certificate_ingest.ingest_certificate_from_path(db, org_id=1, path=kept)
+        stale = create_certificate(db, name="stale", source_path=str(folder / "stale.pfx"))
+        other = create_certificate(db, name="other", source_path=str(tmp_path / "other.pfx"))
+        stale_id, other_id = stale.id, other.id
+    write_pfx(folder / "new senha 123.pfx", "123", "new")
+    write_pfx(folder / "newer senha 123.pfx", "123", "newer")
+    (folder / "notes.txt").write_text("ignored")
+    batches: list[list[str]] = []
+    real_ingest_paths = certificate_ingest.ingest_certificate_paths
+
+    def recording_ingest_paths(db, *, org_id, paths):
+        batches.append([Path(path).name for path in paths])
+        return real_ingest_paths(db, org_id=org_id, paths=paths)
+
+    monkeypatch.setattr(certificate_ingest, "ingest_certificate_paths", recording_ingest_paths)
+    monkeypatch.setattr(
+        certificate_ingest,
+        "ingest_certificate_from_path",
+        lambda *_args, **_kwargs: pytest.fail("reconcile should ingest in batches"),
+    )
+
+    with SessionLocal() as db:
+        result = certificate_ingest.reconcile_certificate_directories(
+            db, org_id=1, root=tmp_path, directories=[str(folder)], recursive=True
+        )
+        assert db.get(models.Certificate, stale_id) is None
+        assert db.get(models.Certificate, other_id) is not None
+    assert result == {
+        "scanned": 3,
+        "inserted": 2,
+        "updated": 0,
+        "failed": 0,
+        "unchanged": 1,
+        "deleted": 1,
+    }
+    assert [sorted(batch) for batch in batches] == [["new senha 123.pfx", "newer senha 123.pfx"]]
+
+
+def test_reconcile_directories_keeps_certificates_of_unlistable_directory(
+    monkeypatch, tmp_path, test_client_and_session
+):
+    import os
+
+    _client, SessionLocal = test_client_and_session
+    folder = tmp_path / "cliente"
+    folder.mkdir()
+    (folder / "kept.pfx").write_bytes(b"x")
+    with SessionLocal() as db:
+        create_certificate(db, name="kept", source_path=str(folder / "kept.pfx"))
+    real_scandir = os.scandir
+
+    def scandir(path="."):
+        if os.path.abspath(path) == str(folder):
+            raise PermissionError(13, "Permission denied", str(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    with SessionLocal() as db:
+        result = certificate_ingest.reconcile_certificate_directories(
+            db, org_id=1, root=tmp_path, directories=[str(folder)], recursive=True
+        )
+        assert db.query(models.Certificate).count() == 1
+    assert (result["scanned"], result["deleted"]) == (0, 0)
+
+    monkeypatch.undo()
+    (folder / "kept.pfx").unlink()
+    folder.rmdir()
+    with SessionLocal() as db:
+        result = certificate_ingest.reconcile_certificate_directories(
+            db, org_id=1, root=tmp_path, directories=[str(folder)], recursive=True
+        )
+    assert result["deleted"] == 1
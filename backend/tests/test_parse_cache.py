@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import certificate_ingest
+from app.services.parse_cache import ParseCache
+from app.services.pfx_strategies import StrategyLearner
+from tests.helpers import write_pfx
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zpopmin(self, key, count=1):
+        zset = self.zsets.get(key, {})
+        popped = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del zset[member]
+        return popped
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
+
+@pytest.fixture()
+def cache(monkeypatch):
+    cache = ParseCache(FakeRedis(), ttl_seconds=60, max_entries=2)
+    monkeypatch.setattr(certificate_ingest, "get_parse_cache", lambda: cache)
+    monkeypatch.setattr(certificate_ingest, "STRATEGIES", StrategyLearner())
+    monkeypatch.setattr(certificate_ingest, "KNOWN_FAILURES", {})
+    monkeypatch.setattr(certificate_ingest, "QUARANTINED", {})
+    return cache
+
+
+def test_cache_evicts_least_recently_used_entries(cache):
+    not_after = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    cache.put("1", "a", {"subject": "CN=a", "not_after": not_after, "strategy": "cryptography:raw"})
+    cache.put("1", "b", {"subject": "CN=b"})
+    assert cache.get("1", "a")["not_after"] == not_after
+    cache.put("1", "c", {"subject": "CN=c"})
+
+    assert cache.get("1", "b") is None
+    assert cache.get("1", "a")["subject"] == "CN=a"
+    assert cache.get("1", "c")["subject"] == "CN=c"
+    assert cache.get("2", "a") is None
+
+
+def test_parse_is_reused_across_files_and_payloads(cache, monkeypatch, tmp_path):
+    original = tmp_path / "empresa senha 'abc123'.pfx"
+    write_pfx(original, "abc123", "Cache A1")
+    copy = tmp_path / "empresa copia senha 'abc123'.pfx"
+    shutil.copy(original, copy)
+
+    first, success = certificate_ingest._parse_certificate_file(original)
+    assert success and first.decoder == "cryptography"
+    stored = list(cache.client.values.values())
+    assert len(stored) == 1
+    assert "abc123" not in stored[0]
+    assert json.loads(stored[0])["strategy"] == "cryptography:unquoted"
+
+    def fail_decode(*_args):
+        raise AssertionError("cache hit should not decrypt")
+
+    monkeypatch.setattr(certificate_ingest, "_decode", fail_decode)
+    second, success = certificate_ingest._parse_certificate_file(copy)
+    assert success
+    assert second.decoder == certificate_ingest.DECODER_CACHE
+    assert second.password_used == "abc123"
+    assert second.sha1_fingerprint == first.sha1_fingerprint
+    assert second.not_after == first.not_after
+
+    assert certificate_ingest.password_for_payload(copy, copy.read_bytes()) == "abc123"
+
+
+def test_cache_hit_requires_the_password_that_opened_the_bytes(cache, tmp_path):
+    original = tmp_path / "a senha 123.pfx"
+    write_pfx(original, "123", "Cache A1")
+    wrong = tmp_path / "b senha 999.pfx"
+    shutil.copy(original, wrong)
+
+    _, success = certificate_ingest._parse_certificate_file(original)
+    assert success
+    (stored,) = cache.client.values.values()
+    content_hash = hashlib.sha256(original.read_bytes()).hexdigest()
+    assert json.loads(stored)["password_digest"] == certificate_ingest._password_digest(
+        content_hash, "123"
+    )
+
+    parsed, success = certificate_ingest._parse_certificate_file(wrong)
+    assert not success
+    assert parsed.decoder != certificate_ingest.DECODER_CACHE
+    assert parsed.password_used is None
+    assert certificate_ingest.password_for_payload(wrong, wrong.read_bytes()) == "999"
@@ -0,0 +1,54 @@
+from app.services.pfx_strategies import DecodeAttempt, StrategyLearner, password_kind
+
+TIERS = {"cryptography": 0, "legacy": 0, "openssl": 1}
+
+
+def _attempts() -> list[DecodeAttempt]:
+    return [
+        DecodeAttempt(decoder, password_kind(password, " 123"), password)
+        for decoder in ("cryptography", "legacy", "openssl")
+        for password in (" 123", "123", "")
+    ]
+
+
+def test_password_kind_labels():
+    assert password_kind("", "abc") == "empty"
+    assert password_kind("abc", "abc") == "raw"
+    assert password_kind("abc", " abc ") == "stripped"
+    assert password_kind("abc", '"abc"') == "unquoted"
+    assert password_kind("abc", None) == "raw"
+
+
+def test_order_prefers_hint_then_tier_then_successes():
+    learner = StrategyLearner()
+    default = learner.order(_attempts(), tiers=TIERS)
+    assert [attempt.strategy for attempt in default[:3]] == [
+        "cryptography:raw",
+        "cryptography:stripped",
+        "cryptography:empty",
+    ]
+
+    learner.record("hash-a", "legacy:empty")
+    learner.record("hash-b", "legacy:empty")
+    learned = learner.order(_attempts(), tiers=TIERS)
+    assert learned[0].strategy == "legacy:empty"
+    # subprocess decoders stay last regardless of their success counts
+    learner.successes["openssl:raw"] = 100
+    assert learner.order(_attempts(), tiers=TIERS)[-3].strategy == "openssl:raw"
+
+    hinted = learner.order(_attempts(), tiers=TIERS, hint="openssl:stripped")
+    assert hinted[0].strategy == "openssl:stripped"
+
+
+def test_hints_are_bounded_and_seed_does_not_double_count():
+    learner = StrategyLearner(max_hints=2)
+    learner.record("a", "cryptography:raw")
+    learner.record("b", "cryptography:raw")
+    learner.record("c", "legacy:raw")
+    assert learner.hint("a") is None
+    assert learner.hint("c") == "legacy:raw"
+
+    learner.seed({"d": "cryptography:raw"}, {"cryptography:raw": 2})
+    learner.seed({"d": "cryptography:raw"}, {"cryptography:raw": 2})
+    assert learner.successes["cryptography:raw"] == 2
+    assert learner.hint("d") == "cryptography:raw"
@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from app.services.certificate_fs import list_certificate_files
+from app.watchers.pfx_directory import PfxDirectoryHandler, WatcherConfig
+from tests.helpers import touch
+
+
+def test_watcher_handles_nested_paths_when_recursive(tmp_path, monkeypatch):
+    def build(recursive):
+        config = WatcherConfig(
+            org_id=1,
+            root_path=tmp_path,
+            debounce_seconds=0,
+            max_events_per_minute=0,
+            recursive=recursive,
+            exclude=("*/arquivo/*",),
+        )
+        handler = PfxDirectoryHandler(config)
+        calls = []
+        monkeypatch.setattr(handler, "_enqueue_ingest", lambda path, event: calls.append(("ing", path)))
+        monkeypatch.setattr(handler, "_enqueue_delete", lambda path, event: calls.append(("del", path)))
+        return handler, calls
+
+    nested = str(tmp_path / "cliente" / "a.pfx")
+    archived = str(tmp_path / "cliente" / "arquivo" / "a.pfx")
+    event = SimpleNamespace(is_directory=False, src_path=nested)
+
+    flat, flat_calls = build(recursive=False)
+    flat.on_created(event)
+    assert flat_calls == []
+
+    handler, calls = build(recursive=True)
+    handler.on_created(event)
+    handler.on_moved(SimpleNamespace(is_directory=False, src_path=nested, dest_path=archived))
+    assert calls == [("ing", nested), ("del", nested)]
+
+
+def test_watcher_filters_like_the_ingest_walk(tmp_path, monkeypatch):
+    root = tmp_path.resolve()
+    files = [
+        touch(root / "arquivo" / "x.pfx"),
+        touch(root / "cliente" / "a.pfx"),
+        touch(root / "cliente" / "b.p12"),
+        touch(root / "cliente" / "notes.txt"),
+    ]
+    config = WatcherConfig(
+        org_id=1,
+        root_path=root,
+        debounce_seconds=0,
+        max_events_per_minute=0,
+        recursive=True,
+        exclude=("arquivo",),
+    )
+    handler = PfxDirectoryHandler(config)
+    calls = []
+    monkeypatch.setattr(handler, "_enqueue_ingest", lambda path, event: calls.append(path))
+    for path in files:
+        handler.on_created(SimpleNamespace(is_directory=False, src_path=str(path)))
+
+    walked = list_certificate_files(root, recursive=True, exclude=config.exclude)
+    assert calls == [str(path) for path, _ in walked]
+    assert calls == [str(files[1]), str(files[2])]
+
+
+def test_event_batcher_coalesces_paths_last_action_wins():
+    from app.watchers.pfx_directory import EventBatcher
+
+    flushed = []
+    batcher = EventBatcher(60, max_paths=3, on_flush=flushed.append)
+    batcher.add("ingest", "/certs/a.pfx")
+    batcher.add("ingest", "/certs/b.pfx")
+    batcher.add("delete", "/certs/a.pfx")
+    assert flushed == []
+    batcher.flush()
+    assert flushed == [[("ingest", "/certs/b.pfx"), ("delete", "/certs/a.pfx")]]
+
+    for name in ("c", "d", "e"):
+        batcher.add("ingest", f"/certs/{name}.pfx")
+    assert len(flushed) == 2 and len(flushed[1]) == 3
+    batcher.flush()
+    assert len(flushed) == 2
+
+
+def test_watcher_enqueues_one_batch_job_per_window(tmp_path, monkeypatch):
+    import threading
+
+    from app.watchers import pfx_directory
+
+    enqueued = []
+    done = threading.Event()
+
+    def fake_enqueue_unique(queue, func, org_id, events, *, job_id):
+        enqueued.append((func, org_id, events, job_id))
+        done.set()
+        return None, False
+
+    monkeypatch.setattr(pfx_directory, "enqueue_unique_atomic", fake_enqueue_unique)
+    config = WatcherConfig(
+        org_id=7,
+        root_path=tmp_path,
+        debounce_seconds=0,
+        max_events_per_minute=0,
+        batch_window_seconds=0.05,
+    )
+    handler = PfxDirectoryHandler(config)
+    paths = [str(tmp_path / f"cert-{index}.pfx") for index in range(50)]
+    for path in paths:
+        handler.on_created(SimpleNamespace(is_directory=False, src_path=path))
+        handler.on_modified(SimpleNamespace(is_directory=False, src_path=path))
+    handler.on_deleted(SimpleNamespace(is_directory=False, src_path=paths[0]))
+
+    assert done.wait(5)
+    [(func, org_id, events, job_id)] = enqueued
+    assert func is pfx_directory.process_pfx_events
+    assert org_id == 7
+    assert job_id.startswith("cert_batch__7__")
+    assert events[-1] == ("delete", paths[0])
+    assert sorted(path for _, path in events) == sorted(paths)
+
+
+def test_trailing_debouncer_waits_for_file_to_settle(tmp_path):
+    from app.watchers.pfx_directory import TrailingDebouncer
+
+    now = [0.0]
+    ready = []
+    debouncer = TrailingDebouncer(
+        2, lambda action, path: ready.append((action, path)), clock=lambda: now[0]
+    )
+    debouncer.stop()  # no background polling; poll() is driven by hand
+    copying = tmp_path / "copying.pfx"
+    copying.write_bytes(b"half")
+    debouncer.add("ingest", str(copying))
+    debouncer.add("ingest", str(copying))
+
+    now[0] = 1.0
+    debouncer.poll()
+    assert ready == []
+
+    # Quiet long enough, but the copy grew since the last event: wait again.
+    copying.write_bytes(b"half and the rest")
+    now[0] = 2.5
+    debouncer.poll()
+    assert ready == []
+    now[0] = 4.0
+    debouncer.poll()
+    assert ready == []
+    now[0] = 4.5
+    debouncer.poll()
+    assert ready == [("ingest", str(copying))]
+    assert len(debouncer) == 0
+
+    # Created then deleted inside the window: only the delete is released.
+    debouncer.add("ingest", str(tmp_path / "temp.pfx"))
+    debouncer.add("delete", str(tmp_path / "temp.pfx"))
+    now[0] = 10.0
+    debouncer.poll()
+    assert ready[-1] == ("delete", str(tmp_path / "temp.pfx"))
+
+
+def test_trailing_debouncer_state_is_bounded(tmp_path):
+    from app.watchers.pfx_directory import TrailingDebouncer
+
+    now = [0.0]
+    ready = []
+    debouncer = TrailingDebouncer(
+        2,
+        lambda action, path: ready.append(path),
+        max_wait_seconds=10,
+        max_pending=3,
+        clock=lambda: now[0],
+    )
+    debouncer.stop()
+    for index in range(5):
+        debouncer.add("delete", f"/certs/{index}.pfx")
+    assert ready == ["/certs/0.pfx", "/certs/1.pfx"]
+    assert len(debouncer) == 3
+
+    # A file that never stops changing is released after max_wait_seconds.
+    growing = tmp_path / "growing.pfx"
+    debouncer.add("ingest", str(growing))
+    growing.write_bytes(b"x")
+    for step in range(1, 7):
+        now[0] = step * 2.0
+        growing.write_bytes(b"x" * (step + 1))
+        debouncer.poll()
+    assert ready[-1] == str(growing)
+    assert len(debouncer) == 0
+
+
+def test_rate_limited_events_are_deferred_not_dropped(tmp_path, monkeypatch):
+    from app.watchers import pfx_directory
+
+    enqueued = []
+
+    def fake_enqueue_unique(queue, func, *args, job_id):
+        enqueued.append((func.__name__, args))
+        return None, False
+
+    monkeypatch.setattr(pfx_directory, "enqueue_unique_atomic", fake_enqueue_unique)
+    config = WatcherConfig(
+        org_id=1,
+        root_path=tmp_path,
+        debounce_seconds=0,
+        max_events_per_minute=2,
+        deferred_max_paths=3,
+    )
+    handler = PfxDirectoryHandler(config)
+    handler._drain_stopped.set()  # drain by hand
+    paths = [str(tmp_path / f"cert-{index}.pfx") for index in range(7)]
+    for path in paths[:5]:
+        handler.on_created(SimpleNamespace(is_directory=False, src_path=path))
+    handler.on_deleted(SimpleNamespace(is_directory=False, src_path=paths[2]))
+    for path in paths[5:]:
+        handler.on_created(SimpleNamespace(is_directory=False, src_path=path))
+
+    # Two events fit the rate; three are deferred, coalescing cert-2's actions.
+    assert [name for name, _ in enqueued] == ["ingest_pfx_file"] * 2
+    assert len(handler._deferred) == 3
+
+    handler.drain()
+    assert len(enqueued) == 2  # still rate limited
+
+    handler.drain(force=True)
+    assert enqueued[2:5] == [
+        ("delete_certificate_by_path", (1, paths[2])),
+        ("ingest_pfx_file", (1, paths[3])),
+        ("ingest_pfx_file", (1, paths[4])),
+    ]
+    # The overflowed paths are repaired with one directory scan.
+    [(name, (org_id, root, directories, options))] = enqueued[5:]
+    assert name == "reconcile_pfx_directories"
+    assert (org_id, root, directories) == (1, str(tmp_path), [str(tmp_path)])
+    assert options == {"recursive": False, "include": [], "exclude": []}
+
+
+def test_reconciler_enqueues_only_differences(tmp_path, test_client_and_session):
+    import os
+
+    from app.watchers.pfx_directory import DirectoryReconciler
+    from tests.helpers import create_certificate
+
+    _client, SessionLocal = test_client_and_session
+    root = tmp_path.resolve()
+    known = root / "known.pfx"
+    known.write_bytes(b"known")
+    (root / "new.pfx").write_bytes(b"new")
+    (root / "readme.txt").write_text("ignored")
+    with SessionLocal() as db:
+        create_certificate(db, name="known", source_path=str(known))
+        create_certificate(db, name="gone", source_path=str(root / "gone.pfx"))
+        create_certificate(db, name="elsewhere", source_path="/outra/pasta/elsewhere.pfx")
+
+    handler = PfxDirectoryHandler(
+        WatcherConfig(org_id=1, root_path=root, debounce_seconds=0, max_events_per_minute=0)
+    )
+    calls = []
+    handler._enqueue_ingest = lambda path, event: calls.append(("ing", path))
+    handler._enqueue_delete = lambda path, event: calls.append(("del", path))
+    reconciler = DirectoryReconciler(handler, session_factory=SessionLocal)
+
+    assert reconciler.run_once() == {"scanned": 2, "ingest": 1, "delete": 1}
+    assert sorted(calls) == [("del", str(root / "gone.pfx")), ("ing", str(root / "new.pfx"))]
+
+    # Only the file that changed since the last pass is picked up again
+    # (plus new.pfx, which the DB still does not know).
+    calls.clear()
+    known.write_bytes(b"known, updated")
+    os.utime(known, ns=(1, 1))
+    reconciler.run_once()
+    assert sorted(calls) == [
+        ("del", str(root / "gone.pfx")),
+        ("ing", str(root / "known.pfx")),
+        ("ing", str(root / "new.pfx")),
+    ]
+
+
+def test_scandir_polling_emitter_diffs_and_backs_off(tmp_path):
+    import os
+    import queue
+
+    from watchdog.observers.api import ObservedWatch
+
+    from app.watchers.scandir_polling import ScandirPollingEmitter
+
+    events = queue.Queue()
+    emitter = ScandirPollingEmitter(
+        events, ObservedWatch(str(tmp_path), recursive=False), min_interval=1, max_interval=8
+    )
+    changed = tmp_path / "changed.pfx"
+    changed.write_bytes(b"v1")
+    (tmp_path / "removed.pfx").write_bytes(b"x")
+    (tmp_path / "notes.txt").write_text("never stat'ed")
+    emitter.on_thread_start()
+
+    def drain():
+        items = []
+        while not events.empty():
+            event, _watch = events.get_nowait()
+            items.append((event.event_type, os.path.basename(event.src_path)))
+        return sorted(items)
+
+    assert emitter.poll() == 0
+    assert [emitter.poll() for _ in range(3)] == [0, 0, 0]
+    assert emitter.interval == 8
+
+    changed.write_bytes(b"v2 is longer")
+    (tmp_path / "removed.pfx").unlink()
+    (tmp_path / "added.pfx").write_bytes(b"new")
+    (tmp_path / "other.txt").write_text("ignored")
+    assert emitter.poll() == 3
+    assert drain() == [
+        ("created", "added.pfx"),
+        ("deleted", "removed.pfx"),
+        ("modified", "changed.pfx"),
+    ]
+    assert emitter.interval == 1
+
+
+def test_watcher_config_file_lists_roots_per_org(tmp_path, monkeypatch):
+    import json
+
+    import pytest
+
+    from app.watchers.pfx_directory import _load_configs
+
+    monkeypatch.setenv("WATCHER_DEBOUNCE_SECONDS", "7")
+    monkeypatch.setenv("WATCHER_RECURSIVE", "false")
+    monkeypatch.delenv("WATCHER_RECONCILE_INTERVAL_SECONDS", raising=False)
+    config_file = tmp_path / "watcher.json"
+    config_file.write_text(
+        json.dumps(
+            [
+                {"org_id": 1, "root": str(tmp_path / "a"), "max_events_per_minute": 10},
+                {
+                    "org_id": 2,
+                    "root": str(tmp_path / "b"),
+                    "debounce_seconds": 1,
+                    "recursive": True,
+                    "include": ["2024/*"],
+                },
+            ]
+        )
+    )
+
+    first, second = _load_configs(config_file)
+    assert (first.org_id, first.root_path) == (1, (tmp_path / "a").resolve())
+    assert (first.debounce_seconds, first.max_events_per_minute, first.recursive) == (7.0, 10, False)
+    assert (second.org_id, second.debounce_seconds, second.recursive) == (2, 1.0, True)
+    assert second.include == ("2024/*",)
+    # An unset WATCHER_RECONCILE_INTERVAL_SECONDS means the dataclass default.
+    default = WatcherConfig(org_id=1, root_path=tmp_path, debounce_seconds=0, max_events_per_minute=0)
+    assert first.reconcile_interval_seconds == default.reconcile_interval_seconds == 300.0
+
+    config_file.write_text(json.dumps([{"org_id": 1, "root": str(tmp_path), "debounce": 1}]))
+    with pytest.raises(ValueError, match="debounce"):
+        _load_configs(config_file)
+    config_file.write_text(json.dumps([{"org_id": 1, "root": str(tmp_path)}] * 2))
+    with pytest.raises(ValueError, match="duplicate"):
+        _load_configs(config_file)
+
+
+def _deny_scandir(monkeypatch, denied):
+    import os
+
+    real_scandir = os.scandir
+
+    def scandir(path="."):
+        if os.path.abspath(path) == os.path.abspath(denied):
+            raise PermissionError(13, "Permission denied", str(path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+
+
+def test_unreadable_subdirectory_is_not_reported_as_deleted(
+    tmp_path, monkeypatch, test_client_and_session
+):
+    import queue
+
+    from watchdog.observers.api import ObservedWatch
+
+    from app.watchers.pfx_directory import DirectoryReconciler
+    from app.watchers.scandir_polling import ScandirPollingEmitter
+    from tests.helpers import create_certificate
+
+    _client, SessionLocal = test_client_and_session
+    root = tmp_path.resolve()
+    hidden = touch(root / "cliente" / "hidden.pfx")
+    touch(root / "top.pfx")
+    with SessionLocal() as db:
+        create_certificate(db, name="hidden", source_path=str(hidden))
+        create_certificate(db, name="top", source_path=str(root / "top.pfx"))
+
+    events = queue.Queue()
+    emitter = ScandirPollingEmitter(events, ObservedWatch(str(root), recursive=True))
+    emitter.on_thread_start()
+    handler = PfxDirectoryHandler(
+        WatcherConfig(
+            org_id=1, root_path=root, debounce_seconds=0, max_events_per_minute=0, recursive=True
+        )
+    )
+    calls = []
+    handler._enqueue_ingest = lambda path, event: calls.append(("ing", path))
+    handler._enqueue_delete = lambda path, event: calls.append(("del", path))
+    reconciler = DirectoryReconciler(handler, session_factory=SessionLocal)
+    reconciler.run_once()
+
+    _deny_scandir(monkeypatch, root / "cliente")
+    unreadable = []
+    files = list_certificate_files(root, recursive=True, unreadable=unreadable)
+    assert [path.name for path, _ in files] == ["top.pfx"]
+    assert unreadable == [root / "cliente"]
+
+    assert emitter.poll() == 0
+    assert events.empty()
+    calls.clear()
+    assert reconciler.run_once()["delete"] == 0
+    assert calls == []
+
+    # Once readable again nothing looks new or changed.
+    monkeypatch.undo()
+    assert emitter.poll() == 0
+    assert reconciler.run_once()["ingest"] == 0
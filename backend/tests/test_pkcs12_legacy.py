@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from app.services.pkcs12_legacy import (
+    RC2,
+    DecodeDeadlineExceeded,
+    Pkcs12DecodeError,
+    decode_deadline,
+    kdf_iterations,
+    load_pkcs12_certificate,
+)
+from tests.helpers import self_signed_certificate
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.mark.parametrize(
+    ("key", "effective_bits", "plaintext", "ciphertext"),
+    [
+        ("0000000000000000", 63, "0000000000000000", "ebb773f993278eff"),
+        ("ffffffffffffffff", 64, "ffffffffffffffff", "278b27e42e2f0d49"),
+        ("3000000000000000", 64, "1000000000000001", "30649edf9be7d2c2"),
+        ("88bca90e90875a7f0f79c384627bafb2", 128, "0000000000000000", "2269552ab0f85ca6"),
+    ],
+)
+def test_rc2_matches_rfc2268_vectors(key, effective_bits, plaintext, ciphertext):
+    cipher = RC2(bytes.fromhex(key), effective_bits)
+    assert cipher.encrypt_block(bytes.fromhex(plaintext)).hex() == ciphertext
+    assert cipher.decrypt_block(bytes.fromhex(ciphertext)).hex() == plaintext
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "mac_hash"),
+    [
+        (pkcs12.PBES.PBESv1SHA1And3KeyTripleDESCBC, hashes.SHA1()),
+        (pkcs12.PBES.PBESv2SHA256AndAES256CBC, hashes.SHA256()),
+    ],
+)
+def test_load_certificate_from_encrypted_bundle(algorithm, mac_hash):
+    key, cert = self_signed_certificate("Legacy A1")
+    _, chain_cert = self_signed_certificate("Chain CA")
+    encryption = (
+        serialization.PrivateFormat.PKCS12.encryption_builder()
+        .kdf_rounds(2048)
+        .key_cert_algorithm(algorithm)
+        .hmac_hash(mac_hash)
+        .build(b"Senha 1234")
+    )
+    data = pkcs12.serialize_key_and_certificates(b"a1", key, cert, [chain_cert], encryption)
+
+    loaded = load_pkcs12_certificate(data, "Senha 1234")
+
+    assert loaded.fingerprint(hashes.SHA1()) == cert.fingerprint(hashes.SHA1())
+    with pytest.raises(Pkcs12DecodeError, match="mac verify failure"):
+        load_pkcs12_certificate(data, "wrong")
+
+
+def test_load_certificate_without_password():
+    key, cert = self_signed_certificate("Open")
+    data = pkcs12.serialize_key_and_certificates(
+        b"open", key, cert, None, serialization.NoEncryption()
+    )
+    assert load_pkcs12_certificate(data, "").subject == cert.subject
+
+
+def test_load_certificate_rejects_garbage():
+    with pytest.raises(Pkcs12DecodeError):
+        load_pkcs12_certificate(b"not a pfx", "")
+
+
+def test_load_certificate_that_cryptography_rejects():
+    # Made with openssl 3.0: an explicit-parameters prime256v1 key and its
+    # self-signed certificate, exported with
+    # `openssl pkcs12 -export -legacy -passout pass:1234` (RC2-40 cert bag,
+    # 3DES key bag, SHA-1 MAC).
+    data = (FIXTURES / "explicit_curve_rc2.pfx").read_bytes()
+    with pytest.raises(ValueError, match="explicit parameters"):
+        pkcs12.load_key_and_certificates(data, b"1234")
+    assert kdf_iterations(data) == 2048
+
+    loaded = load_pkcs12_certificate(data, "1234")
+
+    assert loaded.subject.rfc4514_string() == "CN=Explicit Curve A1"
+    with pytest.raises(Pkcs12DecodeError, match="mac verify failure"):
+        load_pkcs12_certificate(data, "wrong")
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 from types import SimpleNamespace
 
+import pytest
+import redis
+from rq import Queue
 from rq.job import JobStatus
 
-from app.workers.queue import enqueue_unique, sanitize_job_id
+from app.workers import queue as queue_module
+from app.workers.queue import enqueue_unique, enqueue_unique_atomic, sanitize_job_id
 
 
 def test_sanitize_job_id_is_case_insensitive(tmp_path):
@@ -86,3 +90,95 @@ def test_enqueue_unique_reenqueues_finished_jobs():
 
     assert first_deduped is False
     assert queue.enqueued == 1
+
+
+def test_enqueue_unique_atomic_runs_script_against_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    connection = fakeredis.FakeRedis()
+    queue = Queue("certs", connection=connection)
+
+    job, deduped = enqueue_unique_atomic(queue, print, "payload", job_id="job-1")
+    assert deduped is False
+    assert connection.lrange(queue.key, 0, -1) == [b"job-1"]
+    stored = queue.fetch_job("job-1")
+    assert stored.get_status() == JobStatus.QUEUED
+    assert stored.args == ("payload",)
+
+    again, deduped = enqueue_unique_atomic(queue, print, "payload", job_id="job-1")
+    assert deduped is True
+    assert again.id == "job-1"
+    assert connection.lrange(queue.key, 0, -1) == [b"job-1"]
+
+    # A finished run is replaced and dropped from its registry.
+    connection.lpop(queue.key)
+    connection.hset(job.key, "status", JobStatus.FINISHED.value)
+    connection.zadd(queue.finished_job_registry.key, {"job-1": 1})
+    _, deduped = enqueue_unique_atomic(queue, print, "payload", job_id="job-1")
+    assert deduped is False
+    assert connection.zcard(queue.finished_job_registry.key) == 0
+    assert connection.lrange(queue.key, 0, -1) == [b"job-1"]
+    assert queue.fetch_job("job-1").get_status() == JobStatus.QUEUED
+
+    # So is a stale scheduled or stopped run, whatever registry still lists it.
+    connection.lpop(queue.key)
+    connection.hset(job.key, "status", JobStatus.STOPPED.value)
+    connection.zadd(queue.scheduled_job_registry.key, {"job-1": 1})
+    connection.zadd(queue.deferred_job_registry.key, {"job-1": 1})
+    connection.zadd(queue.failed_job_registry.key, {"job-1": 1})
+    _, deduped = enqueue_unique_atomic(queue, print, "payload", job_id="job-1")
+    assert deduped is False
+    for registry in (
+        queue.scheduled_job_registry,
+        queue.deferred_job_registry,
+        queue.failed_job_registry,
+    ):
+        assert connection.zcard(registry.key) == 0
+
+
+def test_enqueue_unique_atomic_sends_one_script_call():
+    calls = []
+
+    class RecordingRedis(redis.Redis):
+        def execute_command(self, *args, **options):
+            raise AssertionError(f"unexpected round trip: {args[0]}")
+
+        def register_script(self, script):
+            assert script == queue_module.ENQUEUE_UNIQUE_SCRIPT
+
+            def run(keys, args):
+                calls.append((keys, args))
+                return b"queued"
+
+            return run
+
+    queue = Queue("certs", connection=RecordingRedis())
+    queue.redis_server_version = (7, 0, 0)
+    job, deduped = enqueue_unique_atomic(queue, print, "payload", job_id="job-1")
+
+    assert deduped is True
+    assert job.id == "job-1"
+    (keys, args), = calls
+    assert keys == [
+        job.key,
+        queue.finished_job_registry.key,
+        queue.failed_job_registry.key,
+        queue.canceled_job_registry.key,
+        queue.scheduled_job_registry.key,
+        queue.deferred_job_registry.key,
+        queue.started_job_registry.key,
+    ]
+    # ARGV[1] is the job id, then each command as <argc> <name> <key> <values...>.
+    assert args[0] == "job-1"
+    commands = []
+    index = 1
+    while index < len(args):
+        argc = args[index]
+        commands.append(args[index + 1 : index + 1 + argc])
+        index += argc + 1
+    assert index == len(args)
+    names = [(command[0], command[1]) for command in commands]
+    assert ("HSET", job.key) in names
+    assert names[-1] == ("RPUSH", queue.key)
+    assert commands[-1][2:] == ["job-1"]